@@ -27,7 +27,12 @@ API_SERVICE_OPTS = [
                help='The port for the solum API server'),
     cfg.StrOpt('host',
                default='127.0.0.1',
-               help='The listen IP for the solum API server')
+               help='The listen IP for the solum API server'),
+    cfg.IntOpt('max_limit',
+               default=1000,
+               help='The most items a collection request returns. '
+                    'Requests for more, or with no limit, get this many '
+                    'and a link to the next page.'),
 ]
 
 API_PLAN_OPTS = [
@@ -17,12 +17,14 @@ import re
 
 from keystoneclient.middleware import auth_token
 from oslo.config import cfg
+from pecan import core
 from pecan import hooks
 
 from solum.common import context
 from solum.openstack.common.gettextutils import _
 from solum.openstack.common import importutils
 from solum.openstack.common import log as logging
+from solum.openstack.common import strutils
 
 
 LOG = logging.getLogger(__name__)
@@ -126,6 +128,14 @@ class AuthInformationHook(hooks.PecanHook):
             auth_url = cfg.CONF.keystone_authtoken.auth_uri
 
         auth_token_info = state.request.environ.get('keystone.token_info')
+        is_admin = 'admin' in roles
+        # Even admins only see their own project, unless they ask for more.
+        # The parameter is not one of the controllers', so it is dropped.
+        all_tenants = strutils.bool_from_string(
+            state.request.GET.pop('all_tenants', None))
+        if all_tenants and not is_admin:
+            LOG.debug("all_tenants was requested by a non-admin user")
+            core.abort(403, _('Only admins may list all tenants.'))
         identity_status = headers.get('X-Identity-Status')
         if identity_status == 'Confirmed':
             ctx = context.RequestContext(auth_token=recv_auth_token,
@@ -137,7 +147,9 @@ class AuthInformationHook(hooks.PecanHook):
                                          project_domain=project_domain_id,
                                          user_name=user_name,
                                          roles=roles,
-                                         auth_url=auth_url)
+                                         auth_url=auth_url,
+                                         is_admin=is_admin,
+                                         all_tenants=all_tenants)
             state.request.security_context = ctx
         else:
             LOG.debug("The provided identity is not confirmed.")
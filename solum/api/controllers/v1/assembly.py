@@ -15,9 +15,11 @@
 import pecan
 from pecan import rest
 import wsme
+from wsme import types as wtypes
 import wsmeext.pecan as wsme_pecan
 
 from solum.api.controllers.v1.datamodel import assembly
+from solum.api.controllers.v1 import pagination
 from solum.api.handlers import assembly_handler
 from solum.common import exception
 from solum import objects
@@ -97,10 +99,21 @@ class AssembliesController(rest.RestController):
             handler.create(js_data), pecan.request.host_url)
 
     @exception.wrap_wsme_controller_exception
-    @wsme_pecan.wsexpose([assembly.Assembly])
-    def get_all(self):
+    @wsme_pecan.wsexpose([assembly.Assembly], int, wtypes.text, wtypes.text,
+                         wtypes.text, wtypes.text, wtypes.text, wtypes.text,
+                         wtypes.text, wtypes.text)
+    def get_all(self, limit=None, marker=None, sort_key=None, sort_dir=None,
+                name=None, status=None, plan_uuid=None, created_after=None,
+                created_before=None):
         """Return all assemblies, based on the query provided."""
         handler = assembly_handler.AssemblyHandler(
             pecan.request.security_context)
+        query = pagination.get_query(limit, marker, sort_key, sort_dir,
+                                     name=name, status=status,
+                                     plan_uuid=plan_uuid,
+                                     created_after=created_after,
+                                     created_before=created_before)
+        objs = handler.get_all(**query)
+        pagination.set_next_link(objs, query)
         return [assembly.Assembly.from_db_model(assm, pecan.request.host_url)
-                for assm in handler.get_all()]
+                for assm in objs]
@@ -16,6 +16,7 @@ from wsme import types as wtypes
 import wsmeext.pecan as wsme_pecan
 
 from solum.api.controllers.v1.datamodel import extension
+from solum.api.controllers.v1 import pagination
 from solum.api.handlers import extension_handler
 from solum.common import exception
 from solum import objects
@@ -77,10 +78,17 @@ class ExtensionsController(rest.RestController):
         return extension.Extension.from_db_model(obj, pecan.request.host_url)
 
     @exception.wrap_wsme_controller_exception
-    @wsme_pecan.wsexpose([extension.Extension])
-    def get_all(self):
+    @wsme_pecan.wsexpose([extension.Extension], int, wtypes.text, wtypes.text,
+                         wtypes.text, wtypes.text, wtypes.text, wtypes.text)
+    def get_all(self, limit=None, marker=None, sort_key=None, sort_dir=None,
+                name=None, created_after=None, created_before=None):
         """Return all extensions, based on the query provided."""
         handler = extension_handler.ExtensionHandler(
             pecan.request.security_context)
+        query = pagination.get_query(limit, marker, sort_key, sort_dir,
+                                     name=name, created_after=created_after,
+                                     created_before=created_before)
+        objs = handler.get_all(**query)
+        pagination.set_next_link(objs, query)
         return [extension.Extension.from_db_model(obj, pecan.request.host_url)
-                for obj in handler.get_all()]
+                for obj in objs]
@@ -14,9 +14,11 @@
 
 import pecan
 from pecan import rest
+from wsme import types as wtypes
 import wsmeext.pecan as wsme_pecan
 
 from solum.api.controllers.v1.datamodel import infrastructure
+from solum.api.controllers.v1 import pagination
 from solum.api.handlers import infrastructure_handler
 from solum.common import exception
 from solum import objects
@@ -82,13 +84,21 @@ class InfrastructureStacksController(rest.RestController):
             pecan.request.host_url)
 
     @exception.wrap_wsme_controller_exception
-    @wsme_pecan.wsexpose([infrastructure.InfrastructureStack])
-    def get_all(self):
+    @wsme_pecan.wsexpose([infrastructure.InfrastructureStack], int,
+                         wtypes.text, wtypes.text, wtypes.text, wtypes.text,
+                         wtypes.text, wtypes.text)
+    def get_all(self, limit=None, marker=None, sort_key=None, sort_dir=None,
+                name=None, created_after=None, created_before=None):
         """Return all stacks, based on the query provided."""
         handler = infrastructure_handler.InfrastructureStackHandler(
             pecan.request.security_context)
+        query = pagination.get_query(limit, marker, sort_key, sort_dir,
+                                     name=name, created_after=created_after,
+                                     created_before=created_before)
+        objs = handler.get_all(**query)
+        pagination.set_next_link(objs, query)
         return [infrastructure.InfrastructureStack.from_db_model(
-            assm, pecan.request.host_url) for assm in handler.get_all()]
+            assm, pecan.request.host_url) for assm in objs]
 
 
 class InfrastructureController(rest.RestController):
@@ -0,0 +1,80 @@
+# Copyright 2014 - Rackspace Hosting
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Paging, sorting and filtering of collection requests."""
+
+import datetime
+
+from oslo.config import cfg
+import pecan
+from six.moves import urllib
+
+from solum.common import exception
+from solum.openstack.common.gettextutils import _
+from solum.openstack.common import timeutils
+
+cfg.CONF.import_opt('max_limit', 'solum.api.app', group='api')
+
+
+def get_query(limit=None, marker=None, sort_key=None, sort_dir=None,
+              **filters):
+    """Return the handler get_all arguments of a collection request.
+
+    The limit is capped at api.max_limit, created_after and created_before
+    are read as ISO 8601 times, and filters left out of the request are
+    dropped.
+    """
+    max_limit = cfg.CONF.api.max_limit
+    try:
+        limit = max_limit if limit is None else int(limit)
+    except ValueError:
+        raise exception.BadRequest(reason=_('Limit must be an integer'))
+    if limit < 1:
+        raise exception.BadRequest(reason=_('Limit must be positive'))
+    filters = dict((key, value) for key, value in filters.items()
+                   if value is not None)
+    for key in ('created_after', 'created_before'):
+        if key in filters:
+            try:
+                filters[key] = timeutils.normalize_time(
+                    timeutils.parse_isotime(filters[key]))
+            except ValueError:
+                raise exception.BadRequest(
+                    reason=_('%s must be an ISO 8601 time') % key)
+    return {'limit': min(limit, max_limit),
+            'marker': marker,
+            'sort_key': sort_key,
+            'sort_dir': sort_dir,
+            'filters': filters}
+
+
+def set_next_link(items, query):
+    """Link the response to the page after `items`, if there can be one.
+
+    The link goes in a Link header, so that the body of collection
+    responses stays a plain list.
+    """
+    if not items or len(items) < query['limit']:
+        return
+    params = dict(query['filters'])
+    params.update((key, query[key]) for key in ('limit', 'sort_key',
+                                                'sort_dir')
+                  if query[key] is not None)
+    params['marker'] = items[-1].uuid
+    for key, value in params.items():
+        if isinstance(value, datetime.datetime):
+            params[key] = value.isoformat()
+    url = '%s%s?%s' % (pecan.request.host_url, pecan.request.path,
+                       urllib.parse.urlencode(sorted(params.items())))
+    pecan.response.headers['Link'] = '<%s>; rel="next"' % url
@@ -20,6 +20,7 @@ from pecan import rest
 import wsmeext.pecan as wsme_pecan
 
 from solum.api.controllers.v1.datamodel import plan
+from solum.api.controllers.v1 import pagination
 from solum.api.handlers import plan_handler
 from solum.common import exception
 from solum.common import yamlutils
@@ -126,11 +127,18 @@ class PlansController(rest.RestController):
 
     @exception.wrap_pecan_controller_exception
     @pecan.expose(content_type='application/x-yaml')
-    def get_all(self):
+    def get_all(self, limit=None, marker=None, sort_key=None, sort_dir=None,
+                name=None, created_after=None, created_before=None):
         """Return all plans, based on the query provided."""
         handler = plan_handler.PlanHandler(pecan.request.security_context)
+        query = pagination.get_query(limit, marker, sort_key, sort_dir,
+                                     name=name,
+                                     created_after=created_after,
+                                     created_before=created_before)
+        objs = handler.get_all(**query)
+        pagination.set_next_link(objs, query)
         plan_yml = yamlutils.dump([yaml_content(obj)
-                                   for obj in handler.get_all()
+                                   for obj in objs
                                    if obj and obj.raw_content])
         pecan.response.status = 200
         return plan_yml
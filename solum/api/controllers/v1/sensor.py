@@ -16,6 +16,7 @@ from wsme import types as wtypes
 import wsmeext.pecan as wsme_pecan
 
 from solum.api.controllers.v1.datamodel import sensor
+from solum.api.controllers.v1 import pagination
 from solum.api.handlers import sensor_handler
 from solum.common import exception
 from solum import objects
@@ -72,9 +73,16 @@ class SensorsController(rest.RestController):
         return sensor.Sensor.from_db_model(obj, pecan.request.host_url)
 
     @exception.wrap_wsme_controller_exception
-    @wsme_pecan.wsexpose([sensor.Sensor])
-    def get_all(self):
+    @wsme_pecan.wsexpose([sensor.Sensor], int, wtypes.text, wtypes.text,
+                         wtypes.text, wtypes.text, wtypes.text, wtypes.text)
+    def get_all(self, limit=None, marker=None, sort_key=None, sort_dir=None,
+                name=None, created_after=None, created_before=None):
         """Return all sensors, based on the query provided."""
         handler = sensor_handler.SensorHandler(pecan.request.security_context)
+        query = pagination.get_query(limit, marker, sort_key, sort_dir,
+                                     name=name, created_after=created_after,
+                                     created_before=created_before)
+        objs = handler.get_all(**query)
+        pagination.set_next_link(objs, query)
         return [sensor.Sensor.from_db_model(obj, pecan.request.host_url)
-                for obj in handler.get_all()]
+                for obj in objs]
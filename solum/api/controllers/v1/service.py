@@ -12,9 +12,11 @@
 
 import pecan
 from pecan import rest
+from wsme import types as wtypes
 import wsmeext.pecan as wsme_pecan
 
 from solum.api.controllers.v1.datamodel import service
+from solum.api.controllers.v1 import pagination
 from solum.api.handlers import service_handler
 from solum.common import exception
 from solum import objects
@@ -76,10 +78,17 @@ class ServicesController(rest.RestController):
             pecan.request.host_url)
 
     @exception.wrap_wsme_controller_exception
-    @wsme_pecan.wsexpose([service.Service])
-    def get_all(self):
+    @wsme_pecan.wsexpose([service.Service], int, wtypes.text, wtypes.text,
+                         wtypes.text, wtypes.text, wtypes.text, wtypes.text)
+    def get_all(self, limit=None, marker=None, sort_key=None, sort_dir=None,
+                name=None, created_after=None, created_before=None):
         """Return all services, based on the query provided."""
         handler = service_handler.ServiceHandler(
             pecan.request.security_context)
+        query = pagination.get_query(limit, marker, sort_key, sort_dir,
+                                     name=name, created_after=created_after,
+                                     created_before=created_before)
+        objs = handler.get_all(**query)
+        pagination.set_next_link(objs, query)
         return [service.Service.from_db_model(ser, pecan.request.host_url)
-                for ser in handler.get_all()]
+                for ser in objs]
@@ -92,11 +92,20 @@ class TriggerController(rest.RestController):
         except StandardError:
             LOG.info("Expected fields not found in request body.")
 
+        builds = None
         try:
             handler = assembly_handler.AssemblyHandler(None)
-            handler.trigger_workflow(trigger_id, commit_sha, status_url)
+            builds = handler.trigger_workflow(trigger_id, commit_sha,
+                                              status_url)
         except exception.ResourceNotFound:
             handler = pipeline_handler.PipelineHandler(None)
             handler.trigger_workflow(trigger_id)
 
         pecan.response.status = 202
+        if builds:
+            # A trigger coalesced into a build in progress gets that
+            # build, so the caller can follow it on the builder API.
+            pecan.response.content_type = 'application/json'
+            pecan.response.text = six.text_type(json.dumps(
+                {'builds': [{'uuid': b.uuid, 'name': b.name,
+                             'state': b.state} for b in builds]}))
@@ -24,6 +24,7 @@ from solum.deployer import api as deploy_api
 from solum import objects
 from solum.objects import assembly
 from solum.objects import image
+from solum.openstack.common.gettextutils import _
 from solum.openstack.common import log as logging
 from solum.worker import api
 
@@ -38,6 +39,12 @@ API_SERVICE_OPTS = [
     cfg.StrOpt('rebuild_phrase',
                default='solum retry tests',
                help='Comment phrase to trigger rebuilding'),
+    cfg.IntOpt('build_coalesce_window',
+               default=3600,
+               help=('Seconds during which a pending or running build of an '
+                     'assembly commit absorbs further triggers for the same '
+                     'commit instead of starting another build. 0 disables '
+                     'coalescing.')),
 ]
 
 LOG = logging.getLogger(__name__)
@@ -65,7 +72,11 @@ class AssemblyHandler(handler.Handler):
 
     def trigger_workflow(self, trigger_id, commit_sha='',
                          status_url=None):
-        """Get trigger by trigger id and start git workflow associated."""
+        """Get trigger by trigger id and start git workflow associated.
+
+        Returns the build of each artifact, which is the build already in
+        progress when the trigger was coalesced into it.
+        """
         # Note: self.context will be None at this point as this is a
         # non-authenticated request.
         db_obj = objects.registry.Assembly.get_by_trigger_id(None,
@@ -81,14 +92,15 @@ class AssemblyHandler(handler.Handler):
                                                    db_obj.plan_id)
 
         artifacts = plan_obj.raw_content.get('artifacts', [])
-        for arti in artifacts:
-            self._build_artifact(assem=db_obj, artifact=arti,
-                                 commit_sha=commit_sha,
-                                 status_url=status_url)
+        return [self._build_artifact(assem=db_obj, artifact=arti,
+                                     commit_sha=commit_sha,
+                                     status_url=status_url)
+                for arti in artifacts]
 
     def update(self, id, data):
         """Modify a resource."""
         db_obj = objects.registry.Assembly.get_by_uuid(self.context, id)
+        data = self._scoped_plan(data)[0]
         db_obj.update(data)
         db_obj.save(self.context)
         return db_obj
@@ -109,6 +121,10 @@ class AssemblyHandler(handler.Handler):
 
     def create(self, data):
         """Create a new resource."""
+        data, plan_obj = self._scoped_plan(data)
+        if plan_obj is None:
+            raise exception.BadRequest(reason=_('The plan was not given'))
+
         db_obj = objects.registry.Assembly()
         db_obj.update(data)
         db_obj.uuid = str(uuid.uuid4())
@@ -123,9 +139,6 @@ class AssemblyHandler(handler.Handler):
 
         db_obj.create(self.context)
 
-        plan_obj = objects.registry.Plan.get_by_id(self.context,
-                                                   db_obj.plan_id)
-
         artifacts = plan_obj.raw_content.get('artifacts', [])
         for arti in artifacts:
             self._build_artifact(assem=db_obj, artifact=arti,
@@ -148,7 +161,31 @@ class AssemblyHandler(handler.Handler):
         image.user_id = self.context.user
         image.project_id = self.context.tenant
         image.state = IMAGE_STATES.PENDING
-        image.create(self.context)
+        image.assembly_id = assem.id
+        image.commit_sha = commit_sha or None
+
+        # Webhooks often fire several times for one commit (push, pull
+        # request sync, retries); let them share a single build.
+        window = CONF.api.build_coalesce_window
+        if commit_sha and window > 0:
+            in_progress = image.create_unless_in_progress(self.context,
+                                                          window)
+            if in_progress is not None:
+                LOG.info("Build %s of %s at %s is already %s, not starting "
+                         "another one" % (in_progress.uuid, assem.uuid,
+                                          commit_sha, in_progress.state))
+                if status_url:
+                    LOG.info("Not reporting build %s to %s, it reports to "
+                             "the status URL it was started with" %
+                             (in_progress.uuid, status_url))
+                return in_progress
+        else:
+            image.create(self.context)
+        # The worker's statuses do not replace those set by the deployer
+        # (see the conductor), so the statuses of the last deploy go first.
+        objects.registry.Assembly.update_status(
+            self.context, assem.id, ASSEMBLY_STATES.PENDING,
+            keep_states=(ASSEMBLY_STATES.DELETING,))
         test_cmd = artifact.get('unittest_cmd')
         status_token = artifact.get('status_token')
 
@@ -169,8 +206,10 @@ class AssemblyHandler(handler.Handler):
             image_format=image.image_format,
             assembly_id=assem.id,
             test_cmd=test_cmd,
-            source_creds_ref=deploy_keys_ref)
+            source_creds_ref=deploy_keys_ref,
+            assembly_uuid=assem.uuid)
+        return image
 
-    def get_all(self):
+    def get_all(self, **kwargs):
         """Return all assemblies, based on the query provided."""
-        return objects.registry.AssemblyList.get_all(self.context)
+        return objects.registry.AssemblyList.get_all(self.context, **kwargs)
@@ -47,6 +47,6 @@ class ComponentHandler(handler.Handler):
         db_obj.create(self.context)
         return db_obj
 
-    def get_all(self):
+    def get_all(self, **kwargs):
         """Return all components."""
-        return objects.registry.ComponentList.get_all(self.context)
+        return objects.registry.ComponentList.get_all(self.context, **kwargs)
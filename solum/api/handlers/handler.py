@@ -13,6 +13,7 @@
 # under the License.
 
 from solum.common import exception as solum_exception
+from solum import objects
 
 
 class Handler(object):
@@ -42,7 +43,26 @@ class Handler(object):
         excp = solum_exception.NotImplemented()
         raise excp
 
-    def get_all(self):
+    def get_all(self, **kwargs):
         """Return all resources, based on the query provided."""
         excp = solum_exception.NotImplemented()
         raise excp
+
+    def _scoped_plan(self, data):
+        """Look up the plan named by data within the context.
+
+        Returns a copy of data with plan_uuid replaced by plan_id, and
+        the plan, or None when data names none. Raises ResourceNotFound
+        when the context cannot see the plan, before anything refers to
+        it.
+        """
+        data = dict(data)
+        plan_uuid = data.pop('plan_uuid', None)
+        if plan_uuid is not None:
+            plan = objects.registry.Plan.get_by_uuid(self.context, plan_uuid)
+            data['plan_id'] = plan.id
+            return data, plan
+        if data.get('plan_id') is not None:
+            return data, objects.registry.Plan.get_by_id(self.context,
+                                                         data['plan_id'])
+        return data, None
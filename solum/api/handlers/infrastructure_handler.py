@@ -80,6 +80,7 @@ class InfrastructureStackHandler(handler.Handler):
                                                  parameters=parameters)
         return created_stack['stack']['id']
 
-    def get_all(self):
+    def get_all(self, **kwargs):
         """Return all stacks, based on the query provided."""
-        return objects.registry.InfrastructureStackList.get_all(self.context)
+        return objects.registry.InfrastructureStackList.get_all(
+            self.context, **kwargs)
@@ -26,6 +26,7 @@ from solum.common import exception
 from solum.common import heat_utils
 from solum.common import yamlutils
 from solum import objects
+from solum.openstack.common.gettextutils import _
 from solum.openstack.common import log as logging
 
 LOG = logging.getLogger(__name__)
@@ -100,11 +101,10 @@ class PipelineHandler(handler.Handler):
 
         ctx = {}
         # service urls.
-        kc = self._clients.keystone()
-        ctx['heat_service_url'] = kc.client.service_catalog.url_for(
+        ctx['heat_service_url'] = self._clients.url_for(
             service_type='orchestration',
             endpoint_type='publicURL')
-        ctx['build_service_url'] = kc.client.service_catalog.url_for(
+        ctx['build_service_url'] = self._clients.url_for(
             service_type='image_builder',
             endpoint_type='publicURL')
 
@@ -179,6 +179,7 @@ class PipelineHandler(handler.Handler):
     def update(self, id, data):
         """Modify a resource."""
         db_obj = objects.registry.Pipeline.get_by_uuid(self.context, id)
+        data = self._scoped_plan(data)[0]
         db_obj.update(data)
         db_obj.save(self.context)
         return db_obj
@@ -195,6 +196,10 @@ class PipelineHandler(handler.Handler):
 
     def create(self, data):
         """Create a new resource."""
+        data, plan_obj = self._scoped_plan(data)
+        if plan_obj is None:
+            raise exception.BadRequest(reason=_('The plan was not given'))
+
         db_obj = objects.registry.Pipeline()
         db_obj.update(data)
         db_obj.uuid = str(uuid.uuid4())
@@ -212,6 +217,6 @@ class PipelineHandler(handler.Handler):
 
         return db_obj
 
-    def get_all(self):
+    def get_all(self, **kwargs):
         """Return all pipelines, based on the query provided."""
-        return objects.registry.PipelineList.get_all(self.context)
+        return objects.registry.PipelineList.get_all(self.context, **kwargs)
@@ -100,6 +100,6 @@ class PlanHandler(handler.Handler):
         db_obj.create(self.context)
         return db_obj
 
-    def get_all(self):
+    def get_all(self, **kwargs):
         """Return all plans."""
-        return objects.registry.PlanList.get_all(self.context)
+        return objects.registry.PlanList.get_all(self.context, **kwargs)
@@ -47,6 +47,6 @@ class ServiceHandler(handler.Handler):
         db_obj.create(self.context)
         return db_obj
 
-    def get_all(self):
+    def get_all(self, **kwargs):
         """Return all services."""
-        return objects.registry.ServiceList.get_all(self.context)
+        return objects.registry.ServiceList.get_all(self.context, **kwargs)
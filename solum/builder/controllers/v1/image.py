@@ -49,6 +49,12 @@ class Image(api_types.Base):
     created_image_id = wtypes.text
     """The id of the created image in glance."""
 
+    commit_sha = wtypes.text
+    """The commit being built, when triggered for a specific commit."""
+
+    stage_timings = {wtypes.text: float}
+    """Seconds the build spent in each stage, once it has finished."""
+
     @classmethod
     def sample(cls):
         return cls(uri='http://example.com/v1/images/b3e0d79',
@@ -68,6 +74,8 @@ class Image(api_types.Base):
 class ImageController(rest.RestController):
     """Manages operations on a single image."""
 
+    _custom_actions = {'cancel': ['POST']}
+
     def __init__(self, image_id):
         super(ImageController, self).__init__()
         self._id = image_id
@@ -82,6 +90,14 @@ class ImageController(rest.RestController):
         host_url = pecan.request.host_url
         return Image.from_db_model(handler.get(self._id), host_url)
 
+    @exception.wrap_wsme_controller_exception
+    @wsme_pecan.wsexpose(status_code=202)
+    def cancel(self):
+        """Cancel the build of this image."""
+        handler = image_handler.ImageHandler(
+            pecan.request.security_context)
+        handler.cancel(self._id)
+
 
 class ImagesController(rest.RestController):
     """Manages operations on the images collection."""
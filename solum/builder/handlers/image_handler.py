@@ -15,6 +15,7 @@
 import uuid
 
 from solum.api.handlers import handler
+from solum.common import exception
 from solum import objects
 from solum.objects import image
 from solum.openstack.common import log as logging
@@ -30,6 +31,15 @@ class ImageHandler(handler.Handler):
         """Return an image."""
         return objects.registry.Image.get_by_uuid(self.context, id)
 
+    def cancel(self, id):
+        """Cancel the build of an image."""
+        db_obj = objects.registry.Image.get_by_uuid(self.context, id)
+        if db_obj.state not in (image.States.PENDING, image.States.BUILDING):
+            raise exception.BuildNotInProgress(id=id)
+        db_obj.state = image.States.ERROR
+        db_obj.save(self.context)
+        api.API(context=self.context).cancel(build_id=db_obj.id)
+
     def create(self, data):
         """Create a new resource."""
         db_obj = objects.registry.Image()
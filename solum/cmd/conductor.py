@@ -38,9 +38,15 @@ def main():
 
     cfg.CONF.import_opt('topic', 'solum.conductor.config', group='conductor')
     cfg.CONF.import_opt('host', 'solum.conductor.config', group='conductor')
+    cfg.CONF.import_opt('rpc_executor', 'solum.conductor.config',
+                        group='conductor')
+    cfg.CONF.import_opt('rpc_pool_size', 'solum.conductor.config',
+                        group='conductor')
     endpoints = [
         default_handler.Handler(),
     ]
     server = service.Service(cfg.CONF.conductor.topic,
-                             cfg.CONF.conductor.host, endpoints)
+                             cfg.CONF.conductor.host, endpoints,
+                             executor=cfg.CONF.conductor.rpc_executor,
+                             pool_size=cfg.CONF.conductor.rpc_pool_size)
     server.serve()
@@ -20,6 +20,7 @@ import sys
 
 from oslo.config import cfg
 
+from solum.common import catalog
 from solum.common.rpc import service
 from solum.deployer.handlers import heat as heat_handler
 from solum.deployer.handlers import noop as noop_handler
@@ -32,6 +33,7 @@ LOG = logging.getLogger(__name__)
 def main():
     cfg.CONF(sys.argv[1:], project='solum')
     logging.setup('solum')
+    catalog.load()
 
     LOG.info(_('Starting server in PID %s') % os.getpid())
     LOG.debug("Configuration:")
@@ -39,6 +41,10 @@ def main():
 
     cfg.CONF.import_opt('topic', 'solum.deployer.config', group='deployer')
     cfg.CONF.import_opt('host', 'solum.deployer.config', group='deployer')
+    cfg.CONF.import_opt('rpc_executor', 'solum.deployer.config',
+                        group='deployer')
+    cfg.CONF.import_opt('rpc_pool_size', 'solum.deployer.config',
+                        group='deployer')
     cfg.CONF.import_opt('handler', 'solum.deployer.config', group='deployer')
 
     handlers = {
@@ -51,5 +57,7 @@ def main():
     ]
 
     server = service.Service(cfg.CONF.deployer.topic,
-                             cfg.CONF.deployer.host, endpoints)
+                             cfg.CONF.deployer.host, endpoints,
+                             executor=cfg.CONF.deployer.rpc_executor,
+                             pool_size=cfg.CONF.deployer.rpc_pool_size)
     server.serve()
@@ -16,8 +16,11 @@
 
 import logging as std_logging
 import os
+import signal
 import sys
 
+import eventlet
+from eventlet import corolocal
 from oslo.config import cfg
 
 import solum
@@ -28,6 +31,8 @@ from solum.openstack.common import log as logging
 from solum.worker.handlers import noop as noop_handler
 from solum.worker.handlers import shell as shell_handler
 from solum.worker.handlers import shell_nobuild as shell_nobuild_handler
+from solum.worker import pool
+from solum.worker import updates
 
 LOG = logging.getLogger(__name__)
 
@@ -35,6 +40,8 @@ LOG = logging.getLogger(__name__)
 def main():
     cfg.CONF(sys.argv[1:], project='solum')
     logging.setup('solum')
+    # Builds run in green threads, each with its own trace data.
+    solum.TLS = corolocal.local()
     solum.TLS.trace = trace_data.TraceData()
 
     LOG.info(_('Starting server in PID %s') % os.getpid())
@@ -42,8 +49,16 @@ def main():
     cfg.CONF.log_opt_values(LOG, std_logging.DEBUG)
 
     cfg.CONF.import_opt('topic', 'solum.worker.config', group='worker')
+    cfg.CONF.import_opt('cancel_topic', 'solum.worker.config',
+                        group='worker')
     cfg.CONF.import_opt('host', 'solum.worker.config', group='worker')
+    cfg.CONF.import_opt('rpc_executor', 'solum.worker.config',
+                        group='worker')
+    cfg.CONF.import_opt('rpc_pool_size', 'solum.worker.config',
+                        group='worker')
     cfg.CONF.import_opt('handler', 'solum.worker.config', group='worker')
+    cfg.CONF.import_opt('max_concurrent_builds', 'solum.worker.config',
+                        group='worker')
 
     handlers = {
         'noop': noop_handler.Handler,
@@ -51,10 +66,25 @@ def main():
         'shell_nobuild': shell_nobuild_handler.Handler,
     }
 
+    handler = handlers[cfg.CONF.worker.handler]()
     endpoints = [
-        handlers[cfg.CONF.worker.handler](),
+        pool.BuildPool(handler, cfg.CONF.worker.max_concurrent_builds),
     ]
 
     server = service.Service(cfg.CONF.worker.topic,
-                             cfg.CONF.worker.host, endpoints)
-    server.serve()
+                             cfg.CONF.worker.host, endpoints,
+                             executor=cfg.CONF.worker.rpc_executor,
+                             pool_size=cfg.CONF.worker.rpc_pool_size)
+    # The build server blocks while the pool is full; cancels have a
+    # queue and a server of their own so that they still get through.
+    cancels = service.Service(cfg.CONF.worker.cancel_topic,
+                              cfg.CONF.worker.host,
+                              [pool.Canceller(handler)])
+    eventlet.spawn_n(cancels.serve)
+    # Send the build updates still waiting in the buffer before exiting,
+    # they may hold the final state of a build.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve()
+    finally:
+        updates.job_updates.flush()
@@ -12,23 +12,103 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import os.path
+import os
+import signal
 
 from solum.common import exception
+from solum.common import yamlutils
+from solum.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+ENTITIES = ('templates', 'workbooks')
+
+
+class Catalog(object):
+    """Files under etc/solum, read once and kept in memory.
+
+    An entry is read again when the mtime of its file changes, or once
+    reload() has been called. The parsed form of a yaml entry is kept
+    along with its text, and must not be modified by callers.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+        self._entries = {}
+
+    def load(self, entities=ENTITIES):
+        """Read and parse every entry of the given entities."""
+        for entity in entities:
+            entity_dir = os.path.join(self.root, entity)
+            if not os.path.isdir(entity_dir):
+                continue
+            for file_name in os.listdir(entity_dir):
+                name, ext = os.path.splitext(file_name)
+                try:
+                    if ext == '.yaml':
+                        self.get_parsed(entity, name)
+                    else:
+                        self.get(entity, name, ext[1:])
+                except (exception.ObjectNotFound, ValueError) as ex:
+                    LOG.warn("Could not load %s/%s: %s" %
+                             (entity, file_name, ex))
+
+    def reload(self):
+        """Forget every entry, so that each is read again when used."""
+        self._entries.clear()
+
+    def get(self, entity, name, content_type='yaml'):
+        return self._entry(entity, name, content_type)['text']
+
+    def get_parsed(self, entity, name):
+        entry = self._entry(entity, name, 'yaml')
+        if 'parsed' not in entry:
+            entry['parsed'] = yamlutils.load(entry['text'])
+        return entry['parsed']
+
+    def _entry(self, entity, name, content_type):
+        file_path = os.path.join(self.root, entity,
+                                 '%s.%s' % (name, content_type))
+        try:
+            mtime = os.stat(file_path).st_mtime
+            entry = self._entries.get(file_path)
+            if entry is None or entry['mtime'] != mtime:
+                with open(file_path) as fd:
+                    entry = {'mtime': mtime, 'text': fd.read()}
+                self._entries[file_path] = entry
+        except Exception:
+            raise exception.ObjectNotFound(
+                name=entity, id=name)
+        return entry
+
+
+_catalog = Catalog(os.path.join(os.path.dirname(__file__), '..', '..',
+                                'etc', 'solum'))
 
 
 def get(entity, name, content_type='yaml'):
-    """This reads a file's contents from local storage.
+    """This returns a file's contents from local storage.
 
     /etc/solum/<entity>/name.<content_type>
     """
-    proj_dir = os.path.join(os.path.dirname(__file__), '..', '..')
-    file_path = os.path.join(proj_dir, 'etc', 'solum', entity,
-                             '%s.%s' % (name, content_type))
-    file_path = os.path.realpath(file_path)
-    try:
-        with open(file_path) as fd:
-            return fd.read()
-    except Exception:
-        raise exception.ObjectNotFound(
-            name=entity, id=name)
+    return _catalog.get(entity, name, content_type)
+
+
+def get_parsed(entity, name):
+    """This returns the parsed contents of a yaml file from local storage.
+
+    /etc/solum/<entity>/name.yaml
+    """
+    return _catalog.get_parsed(entity, name)
+
+
+def load():
+    """Read every template and workbook, and read them again on SIGHUP."""
+    _catalog.load()
+
+    def _reload(signum, frame):
+        LOG.info("Reloading the template and workbook catalog")
+        _catalog.reload()
+        _catalog.load()
+
+    signal.signal(signal.SIGHUP, _reload)
@@ -12,6 +12,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import time
+
 from glanceclient import client as glanceclient
 from heatclient import client as heatclient
 from mistralclient.api import client as mistralclient
@@ -125,6 +127,14 @@ mistral_client_opts = [
                 help=_("If set the server certificate will not be verified "
                        "while using Mistral."))]
 
+client_opts = [
+    cfg.IntOpt('service_catalog_cache_ttl',
+               default=600,
+               help=_('Seconds an endpoint looked up in the service catalog '
+                      'is reused for before it is looked up again. 0 '
+                      'disables the cache.'))]
+
+cfg.CONF.register_opts(client_opts)
 cfg.CONF.register_opts(barbican_client_opts, group='barbican_client')
 cfg.CONF.register_opts(glance_client_opts, group='glance_client')
 cfg.CONF.register_opts(heat_client_opts, group='heat_client')
@@ -134,6 +144,38 @@ cfg.CONF.register_opts(swift_client_opts, group='swift_client')
 cfg.CONF.register_opts(mistral_client_opts, group='mistral_client')
 
 
+class EndpointCache(object):
+    """Process wide cache of service catalog lookups.
+
+    Endpoints are cached per project as well as per lookup arguments
+    (region, service type, endpoint type), since a catalog may hold
+    project specific endpoints such as object-store URLs.
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+
+    def url_for(self, context, keystone, **kwargs):
+        """Return an endpoint, calling keystone() only on a cache miss."""
+        ttl = cfg.CONF.service_catalog_cache_ttl
+        key = (getattr(context, 'tenant', None),) + tuple(
+            sorted(kwargs.items()))
+        now = time.time()
+        entry = self._endpoints.get(key)
+        if entry is not None and now - entry[1] < ttl:
+            return entry[0]
+        url = keystone().client.service_catalog.url_for(**kwargs)
+        if ttl > 0:
+            self._endpoints[key] = (url, now)
+        return url
+
+    def clear(self):
+        self._endpoints.clear()
+
+
+endpoint_cache = EndpointCache()
+
+
 class OpenStackClients(object):
     """Convenience class to create and cache client instances."""
 
@@ -149,7 +191,7 @@ class OpenStackClients(object):
         self._mistral = None
 
     def url_for(self, **kwargs):
-        return self.keystone().client.service_catalog.url_for(**kwargs)
+        return endpoint_cache.url_for(self.context, self.keystone, **kwargs)
 
     @property
     def auth_url(self):
@@ -21,7 +21,8 @@ class RequestContext(context.RequestContext):
     def __init__(self, auth_token=None, user=None, tenant=None, domain=None,
                  user_domain=None, project_domain=None, is_admin=False,
                  read_only=False, request_id=None, user_name=None, roles=None,
-                 auth_url=None, trust_id=None, auth_token_info=None):
+                 auth_url=None, trust_id=None, auth_token_info=None,
+                 all_tenants=False):
         super(RequestContext, self).__init__(auth_token=auth_token,
                                              user=user, tenant=tenant,
                                              domain=domain,
@@ -36,6 +37,9 @@ class RequestContext(context.RequestContext):
         self.auth_url = auth_url
         self.trust_id = trust_id
         self.auth_token_info = auth_token_info
+        # Set by the API for admins asking for ?all_tenants=1; not sent
+        # over RPC, other services work on rows they are given.
+        self.all_tenants = all_tenants
 
     def to_dict(self):
         data = super(RequestContext, self).to_dict()
@@ -241,6 +241,11 @@ class ResourceExists(ObjectNotUnique):
     code = 409
 
 
+class BuildNotInProgress(SolumException):
+    msg_fmt = _("The build of image %(id)s is not in progress.")
+    code = 409
+
+
 class ResourceStillReferenced(SolumException):
     msg_fmt = _("The %(name)s resource cannot be deleted because one or more"
                 " resources reference it.")
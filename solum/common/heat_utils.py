@@ -12,8 +12,57 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import time
+
+from oslo.config import cfg
+
+from solum.openstack.common.gettextutils import _
+
+heat_utils_opts = [
+    cfg.IntOpt('network_parameters_cache_ttl',
+               default=300,
+               help=_('Seconds the networks found for a project are reused '
+                      'for in stack parameters before Neutron is asked '
+                      'again. 0 disables the cache.'))]
+
+cfg.CONF.register_opts(heat_utils_opts)
+
+
+class NetworkParametersCache(object):
+    """Process wide cache of the network stack parameters of projects."""
+
+    def __init__(self):
+        self._params = {}
+
+    def get(self, osc):
+        """Return the parameters, listing networks only on a cache miss."""
+        ttl = cfg.CONF.network_parameters_cache_ttl
+        key = getattr(osc.context, 'tenant', None)
+        now = time.time()
+        entry = self._params.get(key)
+        if entry is not None and now - entry[1] < ttl:
+            return dict(entry[0])
+        params = _list_network_parameters(osc)
+        if ttl > 0:
+            self._params[key] = (params, now)
+        return dict(params)
+
+    def invalidate(self, tenant=None):
+        """Forget the parameters of a project, or of all projects."""
+        if tenant is None:
+            self._params.clear()
+        else:
+            self._params.pop(tenant, None)
+
+
+network_cache = NetworkParametersCache()
+
 
 def get_network_parameters(osc):
+    return network_cache.get(osc)
+
+
+def _list_network_parameters(osc):
     # TODO(julienvey) In the long term, we should have optional parameters
     # if the user wants to override this default behaviour
     params = {}
@@ -14,13 +14,21 @@
 
 """Common RPC service and API tools for Solum."""
 
+import contextlib
+import json
+
 import eventlet
+from eventlet import semaphore
 from oslo.config import cfg
 from oslo import messaging
+import six
 
 import solum.common.context
 from solum import objects
 from solum.openstack.common import jsonutils
+from solum.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
 
 
 # NOTE(paulczar):
@@ -39,10 +47,40 @@ TRANSPORT_ALIASES = {
     'solum.openstack.common.rpc.impl_zmq': 'zmq',
 }
 
+rpc_opts = [
+    cfg.BoolOpt('rpc_send_token_info',
+                default=False,
+                help=('Send the keystone token body, service catalog '
+                      'included, with the context of RPC messages. '
+                      'Receivers then need not ask keystone for the '
+                      'catalog, at the cost of much larger messages.')),
+    cfg.IntOpt('rpc_stats_interval',
+               default=60,
+               help=('Seconds between two logs of the RPC messages a '
+                     'service is handling and has waiting. Nothing is '
+                     'logged while these stay the same. 0 disables the '
+                     'logs.'))]
+
+cfg.CONF.register_opts(rpc_opts)
+
+
+def _is_primitive(entity):
+    if isinstance(entity, dict):
+        return all(isinstance(k, six.string_types) and _is_primitive(v)
+                   for k, v in entity.items())
+    if isinstance(entity, list):
+        return all(_is_primitive(v) for v in entity)
+    return entity is None or isinstance(
+        entity, six.string_types + six.integer_types + (float, bool))
+
 
 class JsonPayloadSerializer(messaging.NoOpSerializer):
     @staticmethod
     def serialize_entity(context, entity):
+        # Most arguments are plain values already; checking is cheaper
+        # than converting them.
+        if _is_primitive(entity):
+            return entity
         return jsonutils.to_primitive(entity, convert_instances=True)
 
 
@@ -62,42 +100,151 @@ class RequestContextSerializer(messaging.Serializer):
         return self._base.deserialize_entity(context, entity)
 
     def serialize_context(self, context):
-        return context.to_dict()
+        values = context.to_dict()
+        if not cfg.CONF.rpc_send_token_info:
+            values.pop('auth_token_info', None)
+        # user_identity is derived from the other fields.
+        values.pop('user_identity', None)
+        return dict((k, v) for k, v in values.items() if v is not None)
 
     def deserialize_context(self, context):
         return solum.common.context.RequestContext.from_dict(context)
 
 
+_TRANSPORT = None
+_CLIENTS = {}
+
+
+def get_transport():
+    """Return the transport shared by the RPC servers and clients."""
+    global _TRANSPORT
+    if _TRANSPORT is None:
+        _TRANSPORT = messaging.get_transport(cfg.CONF,
+                                             aliases=TRANSPORT_ALIASES)
+    return _TRANSPORT
+
+
+def get_client(topic):
+    """Return the RPC client of a topic, kept for the life of the process.
+
+    The context of a request is given with each call or cast, so a
+    single client serves every caller of a topic.
+    """
+    client = _CLIENTS.get(topic)
+    if client is None:
+        client = _make_client(get_transport(), topic)
+        _CLIENTS[topic] = client
+    return client
+
+
+def cleanup():
+    """Close the shared transport and forget the clients built on it."""
+    global _TRANSPORT
+    _CLIENTS.clear()
+    if _TRANSPORT is not None:
+        _TRANSPORT.cleanup()
+        _TRANSPORT = None
+
+
+def _make_client(transport, topic):
+    serializer = RequestContextSerializer(JsonPayloadSerializer())
+    target = messaging.Target(topic=topic)
+    return messaging.RPCClient(transport, target, serializer=serializer)
+
+
+class ServiceStats(object):
+    """Gauges of the RPC messages of a service, and a bound on them.
+
+    At most `size` messages are handled at once; the others wait.
+    """
+
+    def __init__(self, topic, size):
+        self.topic = topic
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = semaphore.Semaphore(size)
+        self._logged = None
+
+    @contextlib.contextmanager
+    def handling(self):
+        self.waiting += 1
+        try:
+            self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def log(self):
+        gauges = (self.in_flight, self.waiting)
+        if gauges != self._logged:
+            self._logged = gauges
+            LOG.info('rpc_stats %s' % json.dumps(
+                {'topic': self.topic, 'in_flight': self.in_flight,
+                 'waiting': self.waiting}, sort_keys=True))
+
+
+class Endpoint(object):
+    """Wrap an RPC endpoint so that its methods count in ServiceStats."""
+
+    def __init__(self, endpoint, stats):
+        self._endpoint = endpoint
+        self._stats = stats
+
+    def __getattr__(self, name):
+        attr = getattr(self._endpoint, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def handle(*args, **kwargs):
+            with self._stats.handling():
+                return attr(*args, **kwargs)
+        return handle
+
+
 class Service(object):
     _server = None
 
-    def __init__(self, topic, server, handlers):
+    def __init__(self, topic, server, handlers, executor='blocking',
+                 pool_size=1):
         serializer = RequestContextSerializer(JsonPayloadSerializer())
-        transport = messaging.get_transport(cfg.CONF,
-                                            aliases=TRANSPORT_ALIASES)
+        if executor == 'blocking':
+            pool_size = 1
+        self.stats = ServiceStats(topic, pool_size)
+        endpoints = [Endpoint(handler, self.stats) for handler in handlers]
         # TODO(asalkeld) add support for version='x.y'
         target = messaging.Target(topic=topic, server=server)
-        self._server = messaging.get_rpc_server(transport, target, handlers,
+        self._server = messaging.get_rpc_server(get_transport(), target,
+                                                endpoints,
+                                                executor=executor,
                                                 serializer=serializer)
 
     def serve(self):
         objects.load()
+        if cfg.CONF.rpc_stats_interval > 0:
+            eventlet.spawn(self._log_stats)
         self._server.start()
         self._server.wait()
 
+    def _log_stats(self):
+        while True:
+            eventlet.sleep(cfg.CONF.rpc_stats_interval)
+            self.stats.log()
+
 
 class API(object):
     def __init__(self, transport=None, context=None, topic=None):
-        serializer = RequestContextSerializer(JsonPayloadSerializer())
-        if transport is None:
-            transport = messaging.get_transport(cfg.CONF,
-                                                aliases=TRANSPORT_ALIASES)
         self._context = context
         if topic is None:
             topic = ''
-        target = messaging.Target(topic=topic)
-        self._client = messaging.RPCClient(transport, target,
-                                           serializer=serializer)
+        if transport is None:
+            self._client = get_client(topic)
+        else:
+            self._client = _make_client(transport, topic)
 
     def _call(self, method, *args, **kwargs):
         return self._client.call(self._context, method, *args, **kwargs)
@@ -105,5 +252,9 @@ class API(object):
     def _cast(self, method, *args, **kwargs):
         self._client.cast(self._context, method, *args, **kwargs)
 
+    def _fanout_cast(self, method, *args, **kwargs):
+        client = self._client.prepare(fanout=True)
+        client.cast(self._context, method, *args, **kwargs)
+
     def echo(self, message):
         self._cast('echo', message=message)
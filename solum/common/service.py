@@ -14,6 +14,7 @@
 
 from oslo.config import cfg
 
+from solum.common import catalog
 from solum import objects
 from solum.openstack.common import log as logging
 
@@ -22,3 +23,4 @@ def prepare_service(argv=[]):
     cfg.CONF(argv[1:], project='solum')
     logging.setup('solum')
     objects.load()
+    catalog.load()
@@ -27,7 +27,14 @@ class API(service.API):
                                   topic=cfg.CONF.conductor.topic)
 
     def build_job_update(self, build_id, state, description, created_image_id,
-                         assembly_id):
+                         assembly_id, timings=None):
         self._cast('build_job_update', build_id=build_id, state=state,
                    description=description, created_image_id=created_image_id,
-                   assembly_id=assembly_id)
+                   assembly_id=assembly_id, timings=timings)
+
+    def build_job_updates(self, updates):
+        self._cast('build_job_updates', updates=updates)
+
+    def update_assembly_status(self, assembly_id, status):
+        self._cast('update_assembly_status', assembly_id=assembly_id,
+                   status=status)
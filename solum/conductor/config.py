@@ -24,6 +24,22 @@ SERVICE_OPTS = [
     cfg.StrOpt('host',
                default='localhost',
                help='The location of the conductor rpc queue'),
+    cfg.StrOpt('rpc_executor',
+               default='blocking',
+               choices=['blocking', 'eventlet'],
+               help=('How the conductor handles RPC messages: "blocking" '
+                     'handles one message at a time, "eventlet" handles '
+                     'each in its own green thread.')),
+    cfg.IntOpt('rpc_pool_size',
+               default=64,
+               help=('With the eventlet executor, the number of messages '
+                     'the conductor handles at once. Further messages wait '
+                     'for one of these to finish.')),
+    cfg.FloatOpt('assembly_status_coalesce_interval',
+                 default=1.0,
+                 help=('Seconds an assembly status change waits before it '
+                       'is written, so that only the last of several quick '
+                       'changes is. 0 writes every change at once.')),
 ]
 
 opt_group = cfg.OptGroup(
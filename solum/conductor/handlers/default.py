@@ -14,44 +14,94 @@
 
 """Solum Conductor default handler."""
 
+import collections
+
+import eventlet
+from oslo.config import cfg
+
 from solum import objects
+from solum.objects import assembly
 from solum.objects import image
 from solum.openstack.common import log as logging
 
 LOG = logging.getLogger(__name__)
 
+ASSEMBLY_STATES = assembly.States
 IMAGE_STATES = image.States
 
+# Assembly statuses set by the deployer. A status held back here never
+# replaces one of them: the API sets the assembly PENDING when it starts a
+# build, so only statuses of a build already deployed are dropped.
+DEPLOYER_STATES = (ASSEMBLY_STATES.DEPLOYING, ASSEMBLY_STATES.READY,
+                   ASSEMBLY_STATES.ERROR, ASSEMBLY_STATES.DELETING,
+                   ASSEMBLY_STATES.ERROR_STACK_CREATE_FAILED,
+                   ASSEMBLY_STATES.ERROR_STACK_DELETE_FAILED)
+
+cfg.CONF.import_opt('assembly_status_coalesce_interval',
+                    'solum.conductor.config', group='conductor')
+
 
 class Handler(object):
     def __init__(self):
         super(Handler, self).__init__()
         objects.load()
+        self._assembly_status = collections.OrderedDict()
+        self._status_timer = None
 
     def echo(self, ctxt, message):
         LOG.debug("%s" % message)
 
     def build_job_update(self, ctxt, build_id, state, description,
-                         created_image_id, assembly_id):
-        image = objects.registry.Image.get_by_id(ctxt, build_id)
-        image.state = state
-        image.description = description
-        image.created_image_id = created_image_id
-        image.save(ctxt)
-
-        # create the component if needed.
-        if assembly_id is not None:
-            assem = objects.registry.Assembly.get_by_id(ctxt,
-                                                        assembly_id)
-            if not any([comp for comp in assem.components
-                        if 'Image_Build' in comp.description]):
-                comp_name = "Heat_Stack_for_%s" % assem.name
-                stack_id = None
-                if assem.heat_stack_component is not None:
-                    stack_id = assem.heat_stack_component.heat_stack_id
-                objects.registry.Component.assign_and_create(ctxt, assem,
-                                                             comp_name,
-                                                             'Image_Build',
-                                                             'Image Build job',
-                                                             created_image_id,
-                                                             stack_id)
+                         created_image_id, assembly_id, timings=None):
+        values = {'state': state,
+                  'description': description,
+                  'created_image_id': created_image_id}
+        if timings is not None:
+            values['stage_timings'] = timings
+        objects.registry.Image.update_build(ctxt, build_id, values,
+                                            assembly_id)
+
+    def build_job_updates(self, ctxt, updates):
+        """Apply a batch of build updates, in the order they were made.
+
+        Only the last update of each build is written; timings are kept
+        from the last update that had them. Builds that already completed
+        or failed are not written (see Image.update_build), so a late or
+        redelivered batch does no harm.
+        """
+        latest = collections.OrderedDict()
+        for update in updates:
+            previous = latest.pop(update['build_id'], None)
+            update = dict(update)
+            if previous is not None and update.get('timings') is None:
+                update['timings'] = previous.get('timings')
+            latest[update['build_id']] = update
+        for update in latest.values():
+            self.build_job_update(ctxt, **update)
+
+    def update_assembly_status(self, ctxt, assembly_id, status):
+        """Record an assembly status, coalescing quick successive changes.
+
+        The worker casts a deploy right after its last status, so the
+        deployer may well set the assembly DEPLOYING or READY before that
+        status is written; it is then dropped.
+        """
+        self._assembly_status[assembly_id] = (ctxt, status)
+        interval = cfg.CONF.conductor.assembly_status_coalesce_interval
+        if interval <= 0:
+            self._write_assembly_status()
+        elif self._status_timer is None:
+            self._status_timer = eventlet.spawn_after(
+                interval, self._write_assembly_status)
+
+    def _write_assembly_status(self):
+        self._status_timer = None
+        pending = self._assembly_status
+        self._assembly_status = collections.OrderedDict()
+        for assembly_id, (ctxt, status) in pending.items():
+            try:
+                objects.registry.Assembly.update_status(
+                    ctxt, assembly_id, status, keep_states=DEPLOYER_STATES)
+            except Exception:
+                LOG.exception("Could not set status of assembly %s to %s" %
+                              (assembly_id, status))
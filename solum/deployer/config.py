@@ -24,6 +24,17 @@ SERVICE_OPTS = [
     cfg.StrOpt('host',
                default='localhost',
                help='The location of the deployer rpc queue'),
+    cfg.StrOpt('rpc_executor',
+               default='blocking',
+               choices=['blocking', 'eventlet'],
+               help=('How the deployer handles RPC messages: "blocking" '
+                     'handles one message at a time, "eventlet" handles '
+                     'each in its own green thread.')),
+    cfg.IntOpt('rpc_pool_size',
+               default=64,
+               help=('With the eventlet executor, the number of messages '
+                     'the deployer handles at once. Further messages wait '
+                     'for one of these to finish.')),
     cfg.StrOpt('handler',
                default='heat',
                help='The deployer endpoint to deploy'),
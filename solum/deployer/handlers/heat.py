@@ -14,16 +14,20 @@
 
 """Solum Deployer Heat handler."""
 
-import time
+import functools
+import hashlib
+import json
 
-from heatclient import exc
+import eventlet
 from oslo.config import cfg
-import yaml
 
 from solum.common import catalog
 from solum.common import clients
+from solum.common import context
 from solum.common import exception
 from solum.common import heat_utils
+from solum.common import solum_keystoneclient
+from solum.deployer import watcher
 from solum import objects
 from solum.objects import assembly
 from solum.openstack.common import log as logging
@@ -38,17 +42,22 @@ OPT_GROUP = cfg.OptGroup(name='deployer',
 SERVICE_OPTS = [
     cfg.IntOpt('max_attempts',
                default=2000,
-               help=('Number of attempts to query the Heat stack for '
+               help=('Number of times a Heat stack is checked for '
                      'finding out the status of the created stack and '
                      'getting url of the DU created in the stack')),
     cfg.IntOpt('wait_interval',
                default=1,
-               help=('Sleep time interval between two attempts of querying '
-                     'the Heat stack. This interval is in seconds.')),
+               help=('Time interval between two checks of the same Heat '
+                     'stack. This interval is in seconds.')),
     cfg.FloatOpt('growth_factor',
                  default=1.1,
                  help=('Factor by which sleep time interval increases. '
                        'This value should be >= 1.0')),
+    cfg.BoolOpt('prewarm_network_parameters',
+                default=False,
+                help=('Look up the networks of every project with an '
+                      'assembly when the deployer starts, so that first '
+                      'deploys do not wait on Neutron.')),
 ]
 
 cfg.CONF.register_group(OPT_GROUP)
@@ -61,6 +70,28 @@ class Handler(object):
     def __init__(self):
         super(Handler, self).__init__()
         objects.load()
+        self._watcher = watcher.StackWatcher(
+            cfg.CONF.deployer.wait_interval,
+            cfg.CONF.deployer.growth_factor,
+            cfg.CONF.deployer.max_attempts)
+        if cfg.CONF.deployer.prewarm_network_parameters:
+            eventlet.spawn(self._prewarm_network_parameters)
+
+    def _prewarm_network_parameters(self):
+        admin_ctxt = context.RequestContext(is_admin=True)
+        trusts = {}
+        for assem in objects.registry.AssemblyList.get_all(admin_ctxt):
+            if assem.trust_id:
+                trusts.setdefault(assem.project_id, assem.trust_id)
+        for project_id, trust_id in trusts.items():
+            try:
+                ctxt = context.RequestContext(trust_id=trust_id)
+                ctxt = solum_keystoneclient.KeystoneClientV3(ctxt).context
+                heat_utils.get_network_parameters(
+                    clients.OpenStackClients(ctxt))
+            except Exception as ex:
+                LOG.warn("Could not look up networks of project %s: %s" %
+                         (project_id, ex))
 
     def echo(self, ctxt, message):
         LOG.debug("%s" % message)
@@ -76,26 +107,14 @@ class Handler(object):
         assem = objects.registry.Assembly.get_by_id(ctxt, assem_id)
         stack_id = self._find_id_if_stack_exists(osc, assem)
 
-        if stack_id is not None:
-            osc.heat().stacks.delete(stack_id)
-
-            wait_interval = cfg.CONF.deployer.wait_interval
-            growth_factor = cfg.CONF.deployer.growth_factor
-            stack_name = self._get_stack_name(assem)
-            for count in range(cfg.CONF.deployer.max_attempts):
-                stack_id = self._get_stack_id_from_heat(osc, stack_name)
-                if stack_id is None:
-                    break
-                time.sleep(wait_interval)
-                wait_interval *= growth_factor
-
         if stack_id is None:
             assem.destroy(ctxt)
             return
 
-        if stack_id is not None:
-            assem.status = STATES.ERROR_STACK_DELETE_FAILED
-            assem.save(ctxt)
+        osc.heat().stacks.delete(stack_id)
+        self._watcher.watch_delete(
+            ctxt, stack_id,
+            functools.partial(self._on_stack_deleted, ctxt, assem.id))
 
     def deploy(self, ctxt, assembly_id, image_id):
         osc = clients.OpenStackClients(ctxt)
@@ -121,8 +140,21 @@ class Handler(object):
         stack_name = self._get_stack_name(assem)
 
         stack_id = self._find_id_if_stack_exists(osc, assem)
+        fingerprint = self._get_fingerprint(template, parameters)
 
         if stack_id is not None:
+            comp = assem.heat_stack_component
+            if (comp.stack_fingerprint == fingerprint and
+                    assem.application_uri):
+                LOG.debug("Stack %s is up to date, not updating it" %
+                          stack_id)
+                assem.status = STATES.READY
+                assem.save(ctxt)
+                return
+
+            # Until the update completes the stack matches no deploy.
+            comp.stack_fingerprint = None
+            comp.save(ctxt)
             osc.heat().stacks.update(stack_id,
                                      stack_name=stack_name,
                                      template=template,
@@ -135,10 +167,11 @@ class Handler(object):
 
             comp_name = 'Heat_Stack_for_%s' % assem.name
             comp_description = 'Heat Stack %s' % (
-                yaml.load(template).get('description'))
+                catalog.get_parsed('templates',
+                                   template_flavor).get('description'))
             objects.registry.Component.assign_and_create(ctxt, assem,
                                                          comp_name,
-                                                         'Heat Stack',
+                                                         'heat_stack',
                                                          comp_description,
                                                          created_stack['stack']
                                                          ['links'][0]['href'],
@@ -146,35 +179,45 @@ class Handler(object):
         assem.status = STATES.DEPLOYING
         assem.save(ctxt)
 
-        self._update_assembly_status(ctxt, assem, osc, stack_id)
-
-    def _update_assembly_status(self, ctxt, assem, osc, stack_id):
-
-        wait_interval = cfg.CONF.deployer.wait_interval
-        growth_factor = cfg.CONF.deployer.growth_factor
-        got_stack_status = False
-
-        for count in range(cfg.CONF.deployer.max_attempts):
-            stack = osc.heat().stacks.get(stack_id)
-            if stack.status == 'COMPLETE':
-                host_url = self._parse_server_url(stack)
-                if host_url is not None:
-                    assem.status = STATES.READY
-                    assem.application_uri = host_url
-                    assem.save(ctxt)
-                    got_stack_status = True
-                    break
-            elif stack.status == 'FAILED':
-                assem.status = STATES.ERROR
-                assem.save(ctxt)
-                got_stack_status = True
-                break
-
-            time.sleep(wait_interval)
-            wait_interval *= growth_factor
-
-        if not got_stack_status:
+        self._watcher.watch(
+            ctxt, stack_id,
+            functools.partial(self._on_stack_settled, ctxt, assem.id,
+                              fingerprint))
+
+    def _get_fingerprint(self, template, parameters):
+        """Digest of what a deploy asks the stack to be."""
+        digest = hashlib.sha256(template.encode('utf-8'))
+        digest.update(json.dumps(parameters, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _on_stack_settled(self, ctxt, assembly_id, fingerprint, outcome,
+                          stack):
+        assem = objects.registry.Assembly.get_by_id(ctxt, assembly_id)
+        if outcome == watcher.COMPLETE:
+            host_url = self._parse_server_url(stack)
+            if host_url is None:
+                # The outputs may not be filled in yet; check again later.
+                return False
+            comp = assem.heat_stack_component
+            if comp is not None:
+                comp.stack_fingerprint = fingerprint
+                comp.save(ctxt)
+            assem.status = STATES.READY
+            assem.application_uri = host_url
+        elif outcome == watcher.FAILED:
+            # The project's networks may have changed under the stack.
+            heat_utils.network_cache.invalidate(ctxt.tenant)
+            assem.status = STATES.ERROR
+        else:
             assem.status = STATES.ERROR_STACK_CREATE_FAILED
+        assem.save(ctxt)
+
+    def _on_stack_deleted(self, ctxt, assembly_id, outcome, stack):
+        assem = objects.registry.Assembly.get_by_id(ctxt, assembly_id)
+        if outcome == watcher.DELETED:
+            assem.destroy(ctxt)
+        else:
+            assem.status = STATES.ERROR_STACK_DELETE_FAILED
             assem.save(ctxt)
 
     def _parse_server_url(self, heat_output):
@@ -187,11 +230,3 @@ class Handler(object):
         if assem.heat_stack_component is not None:
             return assem.heat_stack_component.heat_stack_id
         return None
-
-    def _get_stack_id_from_heat(self, osc, stack_name):
-        try:
-            stack = osc.heat().stacks.get(stack_name)
-            if stack is not None:
-                return stack.identifier.split('/')[-1]
-        except exc.HTTPNotFound:
-            return None
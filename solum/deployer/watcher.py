@@ -0,0 +1,189 @@
+# Copyright 2014 - Rackspace Hosting
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Watch in-flight Heat stacks until they settle."""
+
+import collections
+import time
+
+import eventlet
+
+from solum.common import clients
+from solum.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+# What a watched stack ended up as, passed to the watch callback.
+COMPLETE = 'COMPLETE'
+FAILED = 'FAILED'
+DELETED = 'DELETED'
+TIMEOUT = 'TIMEOUT'
+
+
+class Watch(object):
+    def __init__(self, ctxt, stack_id, callback, interval, deleting):
+        self.ctxt = ctxt
+        self.stack_id = stack_id
+        self.callback = callback
+        self.interval = interval
+        self.deleting = deleting
+        self.attempts = 0
+        self.due = time.time() + interval
+
+
+class StackWatcher(object):
+    """Track every in-flight stack of a deployer from one green thread.
+
+    Stacks are checked with one stacks.list call per tenant and round,
+    instead of one stacks.get loop per stack. The wait between two checks
+    of a stack starts at `interval` seconds and grows by `growth_factor`;
+    a stack still in progress after `max_attempts` checks times out.
+
+    Once a stack settles its callback is called with the outcome and the
+    stack (None for deleted stacks and timeouts). A callback may return
+    False to keep watching the stack.
+
+    The clients of a tenant are kept from round to round. They are built
+    again after a listing failed with them, which replaces an expired
+    token, and dropped once the tenant has no stack left to watch.
+    """
+
+    def __init__(self, interval, growth_factor, max_attempts):
+        self.interval = interval
+        self.growth_factor = growth_factor
+        self.max_attempts = max_attempts
+        self._watches = {}
+        self._clients = {}
+        self._thread = None
+
+    def __len__(self):
+        return len(self._watches)
+
+    def watch(self, ctxt, stack_id, callback):
+        """Report on a stack being created or updated."""
+        self._add(Watch(ctxt, stack_id, callback, self.interval, False))
+
+    def watch_delete(self, ctxt, stack_id, callback):
+        """Report on a stack being deleted."""
+        self._add(Watch(ctxt, stack_id, callback, self.interval, True))
+
+    def wait(self):
+        """Wait until every watched stack has settled."""
+        if self._thread is not None:
+            self._thread.wait()
+
+    def _add(self, watch):
+        self._watches[watch.stack_id] = watch
+        if self._thread is None:
+            self._thread = eventlet.spawn(self._run)
+
+    def _run(self):
+        try:
+            while self._watches:
+                next_due = min(w.due for w in self._watches.values())
+                eventlet.sleep(max(0, next_due - time.time()))
+                self._check_due()
+        finally:
+            self._thread = None
+            self._clients.clear()
+
+    def _get_clients(self, ctxt):
+        key = (ctxt.tenant, ctxt.trust_id)
+        osc = self._clients.get(key)
+        if osc is None:
+            osc = clients.OpenStackClients(ctxt)
+            self._clients[key] = osc
+        return osc
+
+    def _check_due(self):
+        now = time.time()
+        by_tenant = collections.defaultdict(list)
+        for watch in self._watches.values():
+            if watch.due <= now:
+                by_tenant[watch.ctxt.tenant].append(watch)
+
+        for watches in by_tenant.values():
+            # Any context of the tenant can see all of its stacks.
+            ctxt = watches[0].ctxt
+            try:
+                osc = self._get_clients(ctxt)
+                stacks = dict((stack.id, stack) for stack in
+                              osc.heat().stacks.list(filters={
+                                  'id': [w.stack_id for w in watches]}))
+            except Exception as ex:
+                LOG.warn("Could not list stacks: %s" % ex)
+                self._clients.pop((ctxt.tenant, ctxt.trust_id), None)
+                osc = stacks = None
+
+            for watch in watches:
+                # A stack that cannot be checked is checked again next
+                # round, like when the listing fails.
+                outcome = None
+                stack = None
+                if stacks is not None:
+                    try:
+                        outcome, stack = self._check(osc, stacks, watch)
+                    except Exception as ex:
+                        LOG.warn("Could not check stack %s: %s" %
+                                 (watch.stack_id, ex))
+                self._advance(watch, outcome, stack)
+
+        tenants = set(w.ctxt.tenant for w in self._watches.values())
+        for key in list(self._clients):
+            if key[0] not in tenants:
+                del self._clients[key]
+
+    def _check(self, osc, stacks, watch):
+        stack = stacks.get(watch.stack_id)
+        outcome = self._outcome(watch, stack)
+        if outcome == COMPLETE:
+            # Listings leave out the outputs.
+            stack = osc.heat().stacks.get(watch.stack_id)
+        elif outcome == DELETED:
+            stack = None
+        return outcome, stack
+
+    def _outcome(self, watch, stack):
+        if watch.deleting:
+            if stack is None or stack.stack_status == 'DELETE_COMPLETE':
+                return DELETED
+            if stack.stack_status == 'DELETE_FAILED':
+                return FAILED
+        elif stack is not None:
+            if stack.status in (COMPLETE, FAILED):
+                return stack.status
+        return None
+
+    def _advance(self, watch, outcome, stack):
+        watch.attempts += 1
+        if outcome is None and watch.attempts >= self.max_attempts:
+            outcome = TIMEOUT
+        if outcome is not None:
+            if self._notify(watch, outcome, stack):
+                del self._watches[watch.stack_id]
+                return
+            if watch.attempts >= self.max_attempts:
+                del self._watches[watch.stack_id]
+                self._notify(watch, TIMEOUT, None)
+                return
+        watch.interval *= self.growth_factor
+        watch.due = time.time() + watch.interval
+
+    def _notify(self, watch, outcome, stack):
+        """Call the callback of a watch, returning whether it is done."""
+        try:
+            return watch.callback(outcome, stack) is not False
+        except Exception:
+            LOG.exception("Stack %s callback failed" % watch.stack_id)
+            return True
@@ -46,8 +46,11 @@ class CrudMixin(object):
 
 class CrudListMixin(object):
     @classmethod
-    def get_all(cls, context):
+    def get_all(cls, context, limit=None, marker=None, sort_key=None,
+                sort_dir=None, filters=None):
         """Retrieve all applications for the active context.
 
-        Context may be global or tenant scoped.
+        Context may be global or tenant scoped. Without a limit every
+        matching item is returned; with one, at most `limit` items after
+        the item whose uuid is `marker`.
         """
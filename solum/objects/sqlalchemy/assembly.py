@@ -26,7 +26,12 @@ class Assembly(sql.Base, abstract.Assembly):
 
     __tablename__ = 'assembly'
     __resource__ = 'assemblies'
-    __table_args__ = sql.table_args()
+    __table_args__ = sql.table_args(
+        sa.Index('ix_assembly_project_id_created_at', 'project_id',
+                 'created_at'),
+        sa.Index('ix_assembly_project_id_uuid', 'project_id', 'uuid'),
+        sa.Index('ix_assembly_uuid', 'uuid', unique=True),
+        sa.Index('ix_assembly_trigger_id', 'trigger_id', unique=True))
 
     id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
     uuid = sa.Column(sa.String(36), nullable=False)
@@ -41,6 +46,8 @@ class Assembly(sql.Base, abstract.Assembly):
     status = sa.Column(sa.String(36))
     application_uri = sa.Column(sa.String(1024))
 
+    _plan_uuid = sql.related_uuid('plan', plan_id)
+
     @classmethod
     def _raise_trigger_not_found(cls, item_id):
         """Raise a NotFound exception."""
@@ -56,7 +63,8 @@ class Assembly(sql.Base, abstract.Assembly):
 
     @property
     def plan_uuid(self):
-        return objects.registry.Plan.get_by_id(None, self.plan_id).uuid
+        return self._related_uuid('_plan_uuid', objects.registry.Plan,
+                                  'plan_id')
 
     @plan_uuid.setter
     def plan_uuid(self, value):
@@ -81,6 +89,21 @@ class Assembly(sql.Base, abstract.Assembly):
             session.query(self.__class__).filter_by(
                 id=self.id).delete()
 
+    @classmethod
+    def update_status(cls, context, assembly_id, status, keep_states=()):
+        """Set the status of an assembly without loading it.
+
+        A status in keep_states is left as it is; the check is part of the
+        UPDATE, so it holds against concurrent writers.
+        """
+        session = sql.Base.get_session()
+        query = session.query(cls).filter_by(id=assembly_id)
+        if keep_states:
+            query = query.filter(sa.or_(cls.status == sa.null(),
+                                        ~cls.status.in_(keep_states)))
+        with session.begin():
+            query.update({'status': status}, synchronize_session=False)
+
     @property
     def heat_stack_component(self):
         session = sql.Base.get_session()
@@ -92,5 +115,5 @@ class AssemblyList(abstract.AssemblyList):
     """Represent a list of assemblies in sqlalchemy."""
 
     @classmethod
-    def get_all(cls, context):
-        return AssemblyList(sql.model_query(context, Assembly))
+    def get_all(cls, context, **kwargs):
+        return AssemblyList(sql.collection_query(context, Assembly, **kwargs))
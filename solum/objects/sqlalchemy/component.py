@@ -26,7 +26,12 @@ class Component(sql.Base, abstract.Component):
 
     __tablename__ = 'component'
     __resource__ = 'components'
-    __table_args__ = sql.table_args()
+    __table_args__ = sql.table_args(
+        sa.Index('ix_component_project_id_created_at', 'project_id',
+                 'created_at'),
+        sa.Index('ix_component_project_id_uuid', 'project_id', 'uuid'),
+        sa.Index('ix_component_uuid', 'uuid', unique=True),
+        sa.Index('ix_component_assembly_id', 'assembly_id'))
 
     id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
     uuid = sa.Column(sa.String(36))
@@ -40,12 +45,14 @@ class Component(sql.Base, abstract.Component):
     parent_component_id = sa.Column(sa.Integer, sa.ForeignKey('component.id'))
     resource_uri = sa.Column(sa.String(1024))
     heat_stack_id = sa.Column(sa.String(36))
+    stack_fingerprint = sa.Column(sa.String(64))
+
+    _assembly_uuid = sql.related_uuid('assembly', assembly_id)
 
     @property
     def assembly_uuid(self):
-        if self.assembly_id is None:
-            return None
-        return objects.registry.Assembly.get_by_id(None, self.assembly_id).uuid
+        return self._related_uuid('_assembly_uuid',
+                                  objects.registry.Assembly, 'assembly_id')
 
     @assembly_uuid.setter
     def assembly_uuid(self, assembly_uuid):
@@ -78,5 +85,6 @@ class ComponentList(abstract.ComponentList):
     """Represent a list of components in sqlalchemy."""
 
     @classmethod
-    def get_all(cls, context):
-        return ComponentList(sql.model_query(context, Component))
+    def get_all(cls, context, **kwargs):
+        return ComponentList(sql.collection_query(
+            context, Component, **kwargs))
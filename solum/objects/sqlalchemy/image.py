@@ -12,10 +12,18 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+import uuid
+
 import sqlalchemy as sa
 
+from solum import objects
 from solum.objects import image as abstract
 from solum.objects.sqlalchemy import models as sql
+from solum.openstack.common import timeutils
+
+IN_PROGRESS_STATES = (abstract.States.PENDING, abstract.States.BUILDING)
+FINAL_STATES = (abstract.States.COMPLETE, abstract.States.ERROR)
 
 
 class Image(sql.Base, abstract.Image):
@@ -23,7 +31,13 @@ class Image(sql.Base, abstract.Image):
 
     __tablename__ = 'image'
     __resource__ = 'images'
-    __table_args__ = sql.table_args()
+    __table_args__ = sql.table_args(
+        sa.Index('ix_image_project_id_created_at', 'project_id',
+                 'created_at'),
+        sa.Index('ix_image_project_id_uuid', 'project_id', 'uuid'),
+        sa.Index('ix_image_uuid', 'uuid', unique=True),
+        sa.Index('ix_image_assembly_id_commit_sha',
+                 'assembly_id', 'commit_sha'))
 
     id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
     uuid = sa.Column(sa.String(36), nullable=False)
@@ -38,11 +52,109 @@ class Image(sql.Base, abstract.Image):
     base_image_id = sa.Column(sa.String(36))
     created_image_id = sa.Column(sa.String(36))
     image_format = sa.Column(sa.String(12))
+    assembly_id = sa.Column(sa.Integer)
+    commit_sha = sa.Column(sa.String(40))
+    stage_timings = sa.Column(sql.JSONEncodedDict(1024))
+
+    @classmethod
+    def _in_progress_query(cls, session, assembly_id, name, commit_sha,
+                           max_age):
+        since = timeutils.utcnow() - datetime.timedelta(seconds=max_age)
+        return session.query(cls).filter(
+            cls.assembly_id == assembly_id,
+            cls.name == name,
+            cls.commit_sha == commit_sha,
+            cls.state.in_(IN_PROGRESS_STATES),
+            cls.created_at >= since).order_by(sa.desc(cls.created_at))
+
+    @classmethod
+    def get_in_progress(cls, context, assembly_id, name, commit_sha,
+                        max_age):
+        """Return a pending or running build of a commit, if any.
+
+        Builds created more than max_age seconds ago are not considered,
+        so a build lost by a worker does not absorb every later request.
+        """
+        session = sql.Base.get_session()
+        return cls._in_progress_query(session, assembly_id, name, commit_sha,
+                                      max_age).first()
+
+    def create_unless_in_progress(self, context, max_age):
+        """Create this build, unless its commit is already being built.
+
+        The assembly row stays locked from the lookup of the build in
+        progress until this one is stored, so that of concurrent requests
+        for a commit only the first creates a build. Returns the build in
+        progress (see get_in_progress), or None once this one is created.
+        """
+        session = sql.Base.get_session()
+        assembly = objects.registry.Assembly
+        with session.begin():
+            session.query(assembly.id).filter_by(
+                id=self.assembly_id).with_for_update().scalar()
+            in_progress = self._in_progress_query(
+                session, self.assembly_id, self.name, self.commit_sha,
+                max_age).first()
+            if in_progress is not None:
+                return in_progress
+            session.add(self)
+
+    @classmethod
+    def update_build(cls, context, build_id, values, assembly_id=None):
+        """Record the progress of a build, in a single transaction.
+
+        The image row is updated in place rather than loaded and merged.
+        A build that already completed or failed is left as it is, so
+        that a late update cannot bring it back to life. The first update
+        of a build of an assembly also gives the assembly its Image_Build
+        component, whose resource_uri follows the created image.
+        """
+        session = sql.Base.get_session()
+        with session.begin():
+            updated = session.query(cls).filter(
+                cls.id == build_id,
+                sa.or_(cls.state == sa.null(),
+                       ~cls.state.in_(FINAL_STATES))).update(
+                values, synchronize_session=False)
+            if not updated:
+                if session.query(cls.id).filter_by(id=build_id).scalar():
+                    return
+                cls._raise_not_found(build_id)
+            if assembly_id is None:
+                return
+
+            assembly = objects.registry.Assembly
+            component = objects.registry.Component
+            built = session.query(component).filter_by(
+                assembly_id=assembly_id, component_type='Image_Build')
+            created_image_id = values.get('created_image_id')
+            if created_image_id is not None:
+                if built.update({'resource_uri': created_image_id},
+                                synchronize_session=False):
+                    return
+            elif session.query(built.exists()).scalar():
+                return
+
+            assem_name = session.query(assembly.name).filter_by(
+                id=assembly_id).scalar()
+            stack_id = session.query(component.heat_stack_id).filter_by(
+                assembly_id=assembly_id,
+                component_type='heat_stack').limit(1).scalar()
+            session.add(component(
+                uuid=str(uuid.uuid4()),
+                name='Heat_Stack_for_%s' % assem_name,
+                component_type='Image_Build',
+                description='Image Build job',
+                assembly_id=assembly_id,
+                user_id=context.user,
+                project_id=context.tenant,
+                resource_uri=created_image_id,
+                heat_stack_id=stack_id))
 
 
 class ImageList(abstract.ImageList):
     """Represent a list of images in sqlalchemy."""
 
     @classmethod
-    def get_all(cls, context):
-        return ImageList(sql.model_query(context, Image))
+    def get_all(cls, context, **kwargs):
+        return ImageList(sql.collection_query(context, Image, **kwargs))
@@ -0,0 +1,43 @@
+# Copyright 2014 - Rackspace
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Index the project scoped lookups
+
+Revision ID: 2c4b7e9a13d5
+Revises: 5a7c2e4f9b10
+Create Date: 2014-10-29 14:02:37.118204
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '2c4b7e9a13d5'
+down_revision = '5a7c2e4f9b10'
+
+TABLES = ['assembly', 'component', 'image', 'pipeline', 'plan']
+
+
+def upgrade():
+    for table in TABLES:
+        op.create_index('ix_%s_project_id_created_at' % table, table,
+                        ['project_id', 'created_at'])
+        op.create_index('ix_%s_project_id_uuid' % table, table,
+                        ['project_id', 'uuid'])
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index('ix_%s_project_id_uuid' % table, table_name=table)
+        op.drop_index('ix_%s_project_id_created_at' % table,
+                      table_name=table)
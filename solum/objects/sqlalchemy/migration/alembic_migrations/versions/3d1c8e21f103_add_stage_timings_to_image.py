@@ -0,0 +1,38 @@
+# Copyright 2014 - Rackspace
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Record how long each stage of an image build took
+
+Revision ID: 3d1c8e21f103
+Revises: 967f7110360e
+Create Date: 2014-10-22 14:03:47.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from solum.objects.sqlalchemy import models
+
+# revision identifiers, used by Alembic.
+revision = '3d1c8e21f103'
+down_revision = '967f7110360e'
+
+
+def upgrade():
+    op.add_column('image', sa.Column('stage_timings',
+                                     models.JSONEncodedDict(1024)))
+
+
+def downgrade():
+    op.drop_column('image', 'stage_timings')
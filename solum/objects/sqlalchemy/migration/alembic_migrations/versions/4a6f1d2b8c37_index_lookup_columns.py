@@ -0,0 +1,53 @@
+# Copyright 2014 - Rackspace
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Index the columns rows are looked up by
+
+Revision ID: 4a6f1d2b8c37
+Revises: 2c4b7e9a13d5
+Create Date: 2014-11-03 09:47:12.402611
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4a6f1d2b8c37'
+down_revision = '2c4b7e9a13d5'
+
+UUID_TABLES = ['assembly', 'component', 'execution', 'extension', 'image',
+               'infrastructure_stack', 'operation', 'pipeline', 'plan',
+               'sensor', 'service']
+
+INDEXES = [
+    ('assembly', ['trigger_id'], True),
+    ('pipeline', ['trigger_id'], True),
+    ('component', ['assembly_id'], False),
+    ('image', ['assembly_id', 'commit_sha'], False),
+    ('execution', ['pipeline_id', 'created_at'], False),
+    ('userlogs', ['assembly_uuid', 'created_at'], False),
+] + [(table, ['uuid'], True) for table in UUID_TABLES]
+
+
+def _name(table, columns):
+    return 'ix_%s_%s' % (table, '_'.join(columns))
+
+
+def upgrade():
+    for table, columns, unique in INDEXES:
+        op.create_index(_name(table, columns), table, columns, unique=unique)
+
+
+def downgrade():
+    for table, columns, unique in INDEXES:
+        op.drop_index(_name(table, columns), table_name=table)
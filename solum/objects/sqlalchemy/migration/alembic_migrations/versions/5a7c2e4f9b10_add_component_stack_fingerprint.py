@@ -0,0 +1,36 @@
+# Copyright 2014 - Rackspace
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Remember what was last deployed to a heat stack
+
+Revision ID: 5a7c2e4f9b10
+Revises: 3d1c8e21f103
+Create Date: 2014-10-24 10:21:05.630184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5a7c2e4f9b10'
+down_revision = '3d1c8e21f103'
+
+
+def upgrade():
+    op.add_column('component', sa.Column('stack_fingerprint',
+                                         sa.String(length=64)))
+
+
+def downgrade():
+    op.drop_column('component', 'stack_fingerprint')
@@ -0,0 +1,37 @@
+# Copyright 2014 - Rackspace
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Record the assembly and commit an image is built for
+
+Revision ID: 967f7110360e
+Revises: 450600086a09
+Create Date: 2014-10-20 10:12:31.273551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '967f7110360e'
+down_revision = '450600086a09'
+
+
+def upgrade():
+    op.add_column('image', sa.Column('assembly_id', sa.Integer))
+    op.add_column('image', sa.Column('commit_sha', sa.String(40)))
+
+
+def downgrade():
+    op.drop_column('image', 'commit_sha')
+    op.drop_column('image', 'assembly_id')
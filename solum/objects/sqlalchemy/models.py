@@ -21,9 +21,14 @@ import json
 from oslo.config import cfg
 from oslo.db import exception as db_exc
 from oslo.db.sqlalchemy import models
+from oslo.db.sqlalchemy import utils as db_utils
 import six
 from six import moves
+import sqlalchemy
 from sqlalchemy.ext import declarative
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy import orm
+from sqlalchemy.orm import attributes
 from sqlalchemy.orm import exc
 from sqlalchemy import types
 
@@ -31,26 +36,55 @@ from solum.common import exception
 from solum.common import yamlutils
 from solum import objects
 from solum.objects import sqlalchemy as object_sqla
+from solum.openstack.common.gettextutils import _
+from solum.openstack.common import timeutils
 
 
-def table_args():
+def table_args(*indexes):
+    """Return the __table_args__ of a model, with the given indexes."""
     cfg.CONF.import_opt('connection', 'oslo.db.options',
                         group='database')
-    if cfg.CONF.database.connection is None:
-        # this is only within some object tests where
+    engine_args = None
+    if cfg.CONF.database.connection is not None:
+        # the connection is only unset within some object tests where
         # the object classes are directly imported.
-        return None
-    engine_name = moves.urllib.parse.urlparse(
-        cfg.CONF.database.connection).scheme
-    if engine_name == 'mysql':
-        return {'mysql_engine': 'InnoDB',
-                'mysql_charset': "utf8"}
-    return None
+        engine_name = moves.urllib.parse.urlparse(
+            cfg.CONF.database.connection).scheme
+        if engine_name == 'mysql':
+            engine_args = {'mysql_engine': 'InnoDB',
+                           'mysql_charset': "utf8"}
+    if not indexes:
+        return engine_args
+    if engine_args is None:
+        return indexes
+    return indexes + (engine_args,)
+
+
+def related_uuid(table, key):
+    """Return a property reading the uuid of the row a foreign key points at.
+
+    The uuid is selected by a subquery of the query of the rows, so that
+    listing rows with the uuid costs a single query, and nothing else of
+    the related rows is read.
+
+    :param table: name of the table the foreign key points at
+    :param key: the foreign key column
+    """
+    related = sqlalchemy.table(table, sqlalchemy.column('id'),
+                               sqlalchemy.column('uuid')).alias()
+    return orm.column_property(
+        sqlalchemy.select([related.c.uuid]).where(
+            related.c.id == key).correlate_except(related).as_scalar())
 
 
 def model_query(context, model, *args, **kwargs):
     """Query helper.
 
+    Rows of other projects than the one of the context are left out,
+    unless the context is an admin one that asked for all tenants (see
+    solum.api.auth). Contexts without a project, such as the None context
+    of internal lookups, see every row.
+
     :param context: context to query under
     :param session: if present, the session to use
     """
@@ -58,9 +92,82 @@ def model_query(context, model, *args, **kwargs):
     session = kwargs.get('session') or object_sqla.get_session()
 
     query = session.query(model, *args)
+    all_tenants = context is not None and context.is_admin and getattr(
+        context, 'all_tenants', False)
+    if (context is not None and not all_tenants and
+            context.tenant is not None and hasattr(model, 'project_id')):
+        query = query.filter(model.project_id == context.tenant)
     return query
 
 
+def collection_query(context, model, limit=None, marker=None, sort_key=None,
+                     sort_dir=None, filters=None, query=None):
+    """Query one page of a collection.
+
+    Pages are read by keyset: the page after `marker` starts right after
+    that row in the sort order, so a page costs the same however deep
+    into the collection it is.
+
+    :param context: context to query under
+    :param model: model of the collection
+    :param limit: the most rows to return, all of them if None
+    :param marker: uuid (or id for models without one) of the last row of
+                   the previous page
+    :param sort_key: column to sort on, id if None. Rows are sorted on id
+                     after it, so that the order is total.
+    :param sort_dir: 'asc' (the default) or 'desc'
+    :param filters: column values the rows must have; 'created_after'
+                    and 'created_before' bound created_at instead, and
+                    'plan_uuid' matches the plan of the rows
+    :param query: query to start from, model_query if None
+    """
+    if query is None:
+        query = model_query(context, model)
+    columns = model.__table__.columns
+
+    filters = dict(filters or {})
+    created_after = filters.pop('created_after', None)
+    created_before = filters.pop('created_before', None)
+    plan_uuid = filters.pop('plan_uuid', None)
+    for key, value in sorted(six.iteritems(filters)):
+        if key not in columns:
+            raise exception.BadRequest(
+                reason=_('Cannot filter on %s') % key)
+        query = query.filter(getattr(model, key) == value)
+    if created_after is not None:
+        query = query.filter(model.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(model.created_at < created_before)
+    if plan_uuid is not None:
+        if 'plan_id' not in columns:
+            raise exception.BadRequest(
+                reason=_('Cannot filter on plan_uuid'))
+        plan = objects.registry.Plan
+        query = query.join(plan, model.plan_id == plan.id).filter(
+            plan.uuid == plan_uuid)
+
+    sort_dir = sort_dir or 'asc'
+    if sort_dir not in ('asc', 'desc'):
+        raise exception.BadRequest(
+            reason=_('Cannot sort in direction %s') % sort_dir)
+    sort_keys = ['id']
+    if sort_key is not None and sort_key != 'id':
+        if sort_key not in columns:
+            raise exception.BadRequest(
+                reason=_('Cannot sort on %s') % sort_key)
+        sort_keys.insert(0, sort_key)
+
+    marker_obj = None
+    if marker is not None:
+        if 'uuid' in columns:
+            marker_obj = model.get_by_uuid(context, marker)
+        else:
+            marker_obj = model.get_by_id(context, marker)
+
+    return db_utils.paginate_query(query, model, limit, sort_keys,
+                                   marker=marker_obj, sort_dir=sort_dir)
+
+
 class SolumBase(models.TimestampMixin, models.ModelBase):
 
     metadata = None
@@ -84,19 +191,34 @@ class SolumBase(models.TimestampMixin, models.ModelBase):
     @classmethod
     def get_by_id(cls, context, item_id):
         try:
-            session = SolumBase.get_session()
-            return session.query(cls).filter_by(id=item_id).one()
+            return model_query(context, cls).filter_by(id=item_id).one()
         except exc.NoResultFound:
             cls._raise_not_found(item_id)
 
     @classmethod
     def get_by_uuid(cls, context, item_uuid):
         try:
-            session = SolumBase.get_session()
-            return session.query(cls).filter_by(uuid=item_uuid).one()
+            return model_query(context, cls).filter_by(
+                uuid=item_uuid).one()
         except exc.NoResultFound:
             cls._raise_not_found(item_uuid)
 
+    def _related_uuid(self, name, model, key):
+        """Return the uuid of the row the foreign key `key` points at.
+
+        The uuid is taken from the column_property `name` (see
+        related_uuid) as loaded with this row. It is read from the
+        database instead for rows created or re-pointed in this process,
+        whose property is unloaded, expired or stale.
+        """
+        item_id = getattr(self, key)
+        if item_id is None:
+            return None
+        uuid = self.__dict__.get(name)
+        if uuid is None or sa_inspect(self).attrs[key].history.has_changes():
+            uuid = model.get_by_id(None, item_id).uuid
+        return uuid
+
     @classmethod
     def _raise_duplicate_object(cls):
         if hasattr(cls, '__resource__'):
@@ -117,12 +239,56 @@ class SolumBase(models.TimestampMixin, models.ModelBase):
                 setattr(self, field, data[field])
 
     def save(self, context):
+        """Write the changes made to this row.
+
+        A row read from the database is written with one UPDATE of the
+        columns changed since it was read or last saved, along with
+        updated_at; nothing is written when none changed. Dicts may be
+        changed in place, so dict columns holding one are compared with
+        the stored dicts, read back here rather than kept from every load.
+        """
         if objects.transition_schema():
             self.add_forward_schema_changes()
 
+        state = sa_inspect(self)
+        if state.key is None:
+            # Never stored; let the session work out the insert.
+            session = SolumBase.get_session()
+            with session.begin():
+                session.merge(self)
+            return
+
+        values = {}
+        dicts = []
+        for column in self.__table__.columns:
+            if column.name not in state.dict:
+                continue
+            value = state.dict[column.name]
+            if isinstance(column.type, DICT_TYPES) and value is not None:
+                dicts.append(column.name)
+            elif state.attrs[column.name].history.has_changes():
+                values[column.name] = value
+
         session = SolumBase.get_session()
+        query = session.query(self.__class__).filter_by(id=self.id)
+        if dicts:
+            stored = query.with_entities(
+                *[getattr(self.__class__, name) for name in dicts]).first()
+            if stored is None:
+                self._raise_not_found(self.id)
+            for name, stored_value in zip(dicts, stored):
+                if state.dict[name] != stored_value:
+                    values[name] = state.dict[name]
+        if not values:
+            return
+        values['updated_at'] = timeutils.utcnow()
+
         with session.begin():
-            session.merge(self)
+            updated = query.update(values, synchronize_session=False)
+        if not updated:
+            self._raise_not_found(self.id)
+        for key, value in six.iteritems(values):
+            attributes.set_committed_value(self, key, value)
 
     def create(self, context):
         session = SolumBase.get_session()
@@ -180,3 +346,6 @@ class YAMLEncodedDict(types.TypeDecorator):
         if value is not None:
             value = yamlutils.load(value)
         return value
+
+
+DICT_TYPES = (JSONEncodedDict, YAMLEncodedDict)
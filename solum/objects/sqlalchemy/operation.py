@@ -21,7 +21,8 @@ class Operation(sql.Base, abstract.Operation):
 
     __resource__ = 'operations'
     __tablename__ = 'operation'
-    __table_args__ = sql.table_args()
+    __table_args__ = sql.table_args(
+        sa.Index('ix_operation_uuid', 'uuid', unique=True))
 
     id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
     uuid = sa.Column(sa.String(36), nullable=False)
@@ -38,5 +39,6 @@ class OperationList(abstract.OperationList):
     """Represent a list of operations in sqlalchemy."""
 
     @classmethod
-    def get_all(cls, context):
-        return OperationList(sql.model_query(context, Operation))
+    def get_all(cls, context, **kwargs):
+        return OperationList(sql.collection_query(
+            context, Operation, **kwargs))
@@ -29,7 +29,12 @@ class Pipeline(sql.Base, abstract.Pipeline):
 
     __resource__ = 'pipelines'
     __tablename__ = 'pipeline'
-    __table_args__ = sql.table_args()
+    __table_args__ = sql.table_args(
+        sqlalchemy.Index('ix_pipeline_project_id_created_at', 'project_id',
+                         'created_at'),
+        sqlalchemy.Index('ix_pipeline_project_id_uuid', 'project_id', 'uuid'),
+        sqlalchemy.Index('ix_pipeline_uuid', 'uuid', unique=True),
+        sqlalchemy.Index('ix_pipeline_trigger_id', 'trigger_id', unique=True))
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True,
                            autoincrement=True)
@@ -46,9 +51,12 @@ class Pipeline(sql.Base, abstract.Pipeline):
     trigger_id = sqlalchemy.Column(sqlalchemy.String(36))
     trust_id = sqlalchemy.Column(sqlalchemy.String(255))
 
+    _plan_uuid = sql.related_uuid('plan', plan_id)
+
     @property
     def plan_uuid(self):
-        return objects.registry.Plan.get_by_id(None, self.plan_id).uuid
+        return self._related_uuid('_plan_uuid', objects.registry.Plan,
+                                  'plan_id')
 
     @plan_uuid.setter
     def plan_uuid(self, value):
@@ -97,5 +105,5 @@ class PipelineList(abstract.PipelineList):
     """Represent a list of pipelines in sqlalchemy."""
 
     @classmethod
-    def get_all(cls, context):
-        return PipelineList(sql.model_query(context, Pipeline))
+    def get_all(cls, context, **kwargs):
+        return PipelineList(sql.collection_query(context, Pipeline, **kwargs))
@@ -23,7 +23,11 @@ class Plan(sql.Base, abstract.Plan):
 
     __resource__ = 'plans'
     __tablename__ = 'plan'
-    __table_args__ = sql.table_args()
+    __table_args__ = sql.table_args(
+        sqlalchemy.Index('ix_plan_project_id_created_at', 'project_id',
+                         'created_at'),
+        sqlalchemy.Index('ix_plan_project_id_uuid', 'project_id', 'uuid'),
+        sqlalchemy.Index('ix_plan_uuid', 'uuid', unique=True))
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True,
                            autoincrement=True)
@@ -45,5 +49,5 @@ class PlanList(abstract.PlanList):
     """Represent a list of plans in sqlalchemy."""
 
     @classmethod
-    def get_all(cls, context):
-        return PlanList(sql.model_query(context, Plan))
+    def get_all(cls, context, **kwargs):
+        return PlanList(sql.collection_query(context, Plan, **kwargs))
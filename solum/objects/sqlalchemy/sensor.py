@@ -21,7 +21,8 @@ class Sensor(sql.Base, abstract.Sensor):
 
     __resource__ = 'sensors'
     __tablename__ = 'sensor'
-    __table_args__ = sql.table_args()
+    __table_args__ = sql.table_args(
+        sqlalchemy.Index('ix_sensor_uuid', 'uuid', unique=True))
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True,
                            autoincrement=True)
@@ -41,5 +42,5 @@ class SensorList(abstract.SensorList):
     """Represent a list of sensors in sqlalchemy."""
 
     @classmethod
-    def get_all(cls, context):
-        return SensorList(sql.model_query(context, Sensor))
+    def get_all(cls, context, **kwargs):
+        return SensorList(sql.collection_query(context, Sensor, **kwargs))
@@ -23,7 +23,9 @@ class Userlog(sql.Base, abstract.Userlog):
 
     __tablename__ = 'userlogs'
     __resource__ = 'userlogs'
-    __table_args__ = sql.table_args()
+    __table_args__ = sql.table_args(
+        sa.Index('ix_userlogs_assembly_uuid_created_at',
+                 'assembly_uuid', 'created_at'))
 
     id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
     assembly_uuid = sa.Column(sa.String(36), nullable=False)
@@ -37,5 +39,5 @@ class UserlogList(abstract.UserlogList):
     """Represent a list of userlogs in sqlalchemy."""
 
     @classmethod
-    def get_all(cls, context):
-        return UserlogList(sql.model_query(context, Userlog))
+    def get_all(cls, context, **kwargs):
+        return UserlogList(sql.collection_query(context, Userlog, **kwargs))
@@ -12,6 +12,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
 import json
 
 import mock
@@ -158,10 +159,37 @@ class TestAssembliesController(base.BaseTestCase):
         self.assertEqual(fake_assembly.user_id, resp['result'][0].user_id)
         self.assertEqual(fake_assembly.application_uri,
                          resp['result'][0].application_uri)
-        hand_get.assert_called_with()
+        hand_get.assert_called_with(limit=1000, marker=None, sort_key=None,
+                                    sort_dir=None, filters={})
         self.assertEqual(200, resp_mock.status)
         self.assertIsNotNone(resp)
 
+    def test_assemblies_get_all_page(self, AssemblyHandler,
+                                     resp_mock, request_mock):
+        hand_get = AssemblyHandler.return_value.get_all
+        fake_assemblies = [fakes.FakeAssembly(), fakes.FakeAssembly()]
+        fake_assemblies[1].uuid = 'last-uuid'
+        hand_get.return_value = fake_assemblies
+        resp_mock.headers = {}
+        request_mock.path = '/v1/assemblies'
+        resp = assembly.AssembliesController().get_all(
+            limit=2, status='READY', created_after='2014-06-01T12:00:00Z')
+        self.assertEqual(2, len(resp['result']))
+        hand_get.assert_called_with(
+            limit=2, marker=None, sort_key=None, sort_dir=None,
+            filters={'status': 'READY',
+                     'created_after': datetime.datetime(2014, 6, 1, 12)})
+        self.assertEqual(
+            '<http://test_url:8080/test/v1/assemblies?'
+            'created_after=2014-06-01T12%3A00%3A00&limit=2&marker=last-uuid'
+            '&status=READY>; rel="next"', resp_mock.headers['Link'])
+
+    def test_assemblies_get_all_bad_limit(self, AssemblyHandler,
+                                          resp_mock, request_mock):
+        assembly.AssembliesController().get_all(limit=0)
+        self.assertEqual(400, resp_mock.status)
+        self.assertFalse(AssemblyHandler.return_value.get_all.called)
+
     @mock.patch('solum.objects.registry.Plan')
     def test_assemblies_post(self, mock_Plan, AssemblyHandler,
                              resp_mock, request_mock):
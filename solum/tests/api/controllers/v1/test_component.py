@@ -123,7 +123,8 @@ class TestComponentsController(base.BaseTestCase):
         hand_get_all.return_value = [fake_component]
         obj = component.ComponentsController()
         resp = obj.get_all()
-        hand_get_all.assert_called_with()
+        hand_get_all.assert_called_with(limit=1000, marker=None, sort_key=None,
+                                        sort_dir=None, filters={})
         self.assertIsNotNone(resp)
         self.assertEqual(fake_component.name, resp['result'][0].name)
         self.assertEqual(fake_component.description,
@@ -148,7 +148,8 @@ class TestPipelinesController(base.BaseTestCase):
                          resp['result'][0].project_id)
         self.assertEqual(fake_pipeline.uuid, resp['result'][0].uuid)
         self.assertEqual(fake_pipeline.user_id, resp['result'][0].user_id)
-        hand_get.assert_called_with()
+        hand_get.assert_called_with(limit=1000, marker=None, sort_key=None,
+                                    sort_dir=None, filters={})
         self.assertEqual(200, resp_mock.status)
         self.assertIsNotNone(resp)
 
@@ -203,7 +203,8 @@ class TestPlansController(base.BaseTestCase):
         resp_yml = yaml.load(resp)
         self.assertEqual(fake_plan.raw_content['name'], resp_yml[0]['name'])
         self.assertEqual(200, resp_mock.status)
-        hand_get.assert_called_with()
+        hand_get.assert_called_with(limit=1000, marker=None, sort_key=None,
+                                    sort_dir=None, filters={})
 
     def test_plans_post(self, PlanHandler, resp_mock, request_mock):
         request_mock.body = 'version: 1\nname: ex_plan1\ndescription: dsc1.'
@@ -173,7 +173,8 @@ class TestSensorsController(base.BaseTestCase):
                          resp['result'][0].description)
         self.assertEqual(fake_sensor.project_id, resp['result'][0].project_id)
         self.assertEqual(fake_sensor.uuid, resp['result'][0].uuid)
-        hand_get_all.assert_called_with()
+        hand_get_all.assert_called_with(limit=1000, marker=None, sort_key=None,
+                                        sort_dir=None, filters={})
         self.assertEqual(200, resp_mock.status)
 
     def test_sensors_post(self, handler_mock, resp_mock, request_mock):
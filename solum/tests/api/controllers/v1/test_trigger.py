@@ -38,6 +38,20 @@ class TestTriggerController(base.BaseTestCase):
         tw = assem_mock.return_value.trigger_workflow
         tw.assert_called_once_with('test_id', '', None)
 
+    def test_trigger_post_returns_builds(self, pipe_mock, assem_mock,
+                                         resp_mock, request_mock):
+        build = fakes.FakeImage()
+        build.state = 'BUILDING'
+        tw = assem_mock.return_value.trigger_workflow
+        tw.return_value = [build]
+        obj = trigger.TriggerController()
+        obj.post('test_id')
+        self.assertEqual(202, resp_mock.status)
+        self.assertEqual({'builds': [{'uuid': build.uuid,
+                                      'name': build.name,
+                                      'state': 'BUILDING'}]},
+                         json.loads(resp_mock.text))
+
     def test_trigger_post_on_github_webhook(self, pipe_mock, assem_mock,
                                             resp_mock, request_mock):
         status_url = 'https://api.github.com/repos/u/r/statuses/{sha}'
@@ -13,8 +13,10 @@
 # under the License.
 
 import mock
+from oslo.config import cfg
 
 from solum.api.handlers import assembly_handler
+from solum.common import exception
 from solum.objects import assembly
 from solum.tests import base
 from solum.tests import fakes
@@ -52,11 +54,15 @@ class TestAssemblyHandler(base.BaseTestCase):
                 'plan_uuid': 'input_plan_uuid'}
         db_obj = fakes.FakeAssembly()
         mock_registry.Assembly.get_by_uuid.return_value = db_obj
+        mock_registry.Plan.get_by_uuid.return_value = fakes.FakePlan()
         handler = assembly_handler.AssemblyHandler(self.ctx)
         res = handler.update('test_id', data)
         self.assertEqual(db_obj.user_id, res.user_id)
         db_obj.save.assert_called_once_with(self.ctx)
-        db_obj.update.assert_called_once_with(data)
+        db_obj.update.assert_called_once_with({'user_id': 'new_user_id',
+                                               'plan_id': 8})
+        mock_registry.Plan.get_by_uuid.assert_called_once_with(
+            self.ctx, 'input_plan_uuid')
         mock_registry.Assembly.get_by_uuid.assert_called_once_with(self.ctx,
                                                                    'test_id')
 
@@ -70,7 +76,7 @@ class TestAssemblyHandler(base.BaseTestCase):
         db_obj = fakes.FakeAssembly()
         mock_registry.Assembly.return_value = db_obj
         fp = fakes.FakePlan()
-        mock_registry.Plan.get_by_id.return_value = fp
+        mock_registry.Plan.get_by_uuid.return_value = fp
         fp.raw_content = {
             'name': 'theplan',
             'artifacts': [{'name': 'nodeus',
@@ -86,7 +92,9 @@ class TestAssemblyHandler(base.BaseTestCase):
 
         handler = assembly_handler.AssemblyHandler(self.ctx)
         res = handler.create(data)
-        db_obj.update.assert_called_once_with(data)
+        db_obj.update.assert_called_once_with({'user_id': 'new_user_id',
+                                               'uuid': 'input_uuid',
+                                               'plan_id': 8})
         db_obj.create.assert_called_once_with(self.ctx)
         self.assertEqual(db_obj, res)
         git_info = {
@@ -100,7 +108,8 @@ class TestAssemblyHandler(base.BaseTestCase):
             build_id=8, name='nodeus', assembly_id=8,
             git_info=git_info, test_cmd=None,
             base_image_id='auto', source_format='heroku',
-            source_creds_ref=None, image_format='qcow2')
+            source_creds_ref=None, image_format='qcow2',
+            assembly_uuid='test_uuid')
 
         mock_kc.return_value.create_trust_context.assert_called_once_with()
 
@@ -115,7 +124,7 @@ class TestAssemblyHandler(base.BaseTestCase):
         db_obj = fakes.FakeAssembly()
         mock_registry.Assembly.return_value = db_obj
         fp = fakes.FakePlan()
-        mock_registry.Plan.get_by_id.return_value = fp
+        mock_registry.Plan.get_by_uuid.return_value = fp
         fp.raw_content = {
             'name': 'theplan',
             'artifacts': [{'name': 'nodeus',
@@ -132,7 +141,9 @@ class TestAssemblyHandler(base.BaseTestCase):
 
         handler = assembly_handler.AssemblyHandler(self.ctx)
         res = handler.create(data)
-        db_obj.update.assert_called_once_with(data)
+        db_obj.update.assert_called_once_with({'user_id': 'new_user_id',
+                                               'uuid': 'input_uuid',
+                                               'plan_id': 8})
         db_obj.create.assert_called_once_with(self.ctx)
         self.assertEqual(db_obj, res)
         git_info = {
@@ -146,10 +157,30 @@ class TestAssemblyHandler(base.BaseTestCase):
             build_id=8, name='nodeus', assembly_id=8,
             git_info=git_info,
             test_cmd=None, base_image_id='auto', source_format='heroku',
-            source_creds_ref='secret_ref_uri', image_format='qcow2')
+            source_creds_ref='secret_ref_uri', image_format='qcow2',
+            assembly_uuid='test_uuid')
 
         mock_kc.return_value.create_trust_context.assert_called_once_with()
 
+    @mock.patch('solum.common.solum_keystoneclient.KeystoneClientV3')
+    def test_create_with_unseen_plan(self, mock_kc, mock_registry):
+        data = {'user_id': 'new_user_id',
+                'plan_uuid': 'other_tenant_plan'}
+        mock_registry.Plan.get_by_uuid.side_effect = (
+            exception.ResourceNotFound(name='plan', id='other_tenant_plan'))
+        handler = assembly_handler.AssemblyHandler(self.ctx)
+        self.assertRaises(exception.ResourceNotFound, handler.create, data)
+        self.assertFalse(mock_registry.Assembly.called)
+        self.assertFalse(mock_kc.called)
+
+    @mock.patch('solum.common.solum_keystoneclient.KeystoneClientV3')
+    def test_create_without_plan(self, mock_kc, mock_registry):
+        handler = assembly_handler.AssemblyHandler(self.ctx)
+        self.assertRaises(exception.BadRequest, handler.create,
+                          {'user_id': 'new_user_id'})
+        self.assertFalse(mock_registry.Assembly.called)
+        self.assertFalse(mock_kc.called)
+
     @mock.patch('solum.common.solum_keystoneclient.KeystoneClientV3')
     @mock.patch('solum.deployer.api.API.destroy')
     def test_delete(self, mock_deploy, mock_kc, mock_registry):
@@ -179,7 +210,8 @@ class TestAssemblyHandler(base.BaseTestCase):
         handler = assembly_handler.AssemblyHandler(self.ctx)
         handler._build_artifact = mock.MagicMock()
         handler._context_from_trust_id = mock.MagicMock(return_value=self.ctx)
-        handler.trigger_workflow(trigger_id)
+        builds = handler.trigger_workflow(trigger_id)
+        self.assertEqual([handler._build_artifact.return_value], builds)
         handler._build_artifact.assert_called_once_with(assem=db_obj,
                                                         artifact=artifacts[0],
                                                         commit_sha='',
@@ -189,3 +221,74 @@ class TestAssemblyHandler(base.BaseTestCase):
             None, trigger_id)
         mock_registry.Plan.get_by_id.assert_called_once_with(self.ctx,
                                                              db_obj.plan_id)
+
+    @mock.patch('solum.worker.api.API.perform_action')
+    def test_build_artifact_coalesces_commit(self, mock_pa, mock_registry):
+        db_obj = fakes.FakeAssembly()
+        image = fakes.FakeImage()
+        building = fakes.FakeImage()
+        mock_registry.Image.return_value = image
+        image.create_unless_in_progress.return_value = building
+        artifact = {'name': 'nodeus', 'artifact_type': 'heroku',
+                    'content': {'href': 'https://example.com/ex.git'},
+                    'language_pack': 'auto'}
+        handler = assembly_handler.AssemblyHandler(self.ctx)
+        res = handler._build_artifact(db_obj, artifact, commit_sha='abc123',
+                                      status_url='https://example.com/s')
+        self.assertEqual(building, res)
+        image.create_unless_in_progress.assert_called_once_with(self.ctx,
+                                                                3600)
+        self.assertEqual('abc123', image.commit_sha)
+        self.assertEqual(db_obj.id, image.assembly_id)
+        self.assertFalse(image.create.called)
+        self.assertFalse(mock_pa.called)
+        self.assertFalse(mock_registry.Assembly.update_status.called)
+
+    @mock.patch('solum.worker.api.API.perform_action')
+    def test_build_artifact_first_of_commit(self, mock_pa, mock_registry):
+        db_obj = fakes.FakeAssembly()
+        image = fakes.FakeImage()
+        mock_registry.Image.return_value = image
+        image.create_unless_in_progress.return_value = None
+        artifact = {'name': 'nodeus', 'artifact_type': 'heroku',
+                    'content': {'href': 'https://example.com/ex.git'},
+                    'language_pack': 'auto'}
+        handler = assembly_handler.AssemblyHandler(self.ctx)
+        res = handler._build_artifact(db_obj, artifact, commit_sha='abc123')
+        self.assertEqual(image, res)
+        self.assertFalse(image.create.called)
+        self.assertEqual(1, mock_pa.call_count)
+        mock_registry.Assembly.update_status.assert_called_once_with(
+            self.ctx, db_obj.id, 'PENDING', keep_states=('DELETING',))
+
+    @mock.patch('solum.worker.api.API.perform_action')
+    def test_build_artifact_without_commit(self, mock_pa, mock_registry):
+        db_obj = fakes.FakeAssembly()
+        image = fakes.FakeImage()
+        mock_registry.Image.return_value = image
+        artifact = {'name': 'nodeus', 'artifact_type': 'heroku',
+                    'content': {'href': 'https://example.com/ex.git'},
+                    'language_pack': 'auto'}
+        handler = assembly_handler.AssemblyHandler(self.ctx)
+        res = handler._build_artifact(db_obj, artifact)
+        self.assertEqual(image, res)
+        self.assertFalse(image.create_unless_in_progress.called)
+        image.create.assert_called_once_with(self.ctx)
+        self.assertIsNone(image.commit_sha)
+        self.assertEqual(db_obj.id, image.assembly_id)
+        self.assertEqual(1, mock_pa.call_count)
+
+    @mock.patch('solum.worker.api.API.perform_action')
+    def test_build_artifact_coalescing_disabled(self, mock_pa, mock_registry):
+        cfg.CONF.set_override('build_coalesce_window', 0, group='api')
+        db_obj = fakes.FakeAssembly()
+        image = fakes.FakeImage()
+        mock_registry.Image.return_value = image
+        artifact = {'name': 'nodeus', 'artifact_type': 'heroku',
+                    'content': {'href': 'https://example.com/ex.git'},
+                    'language_pack': 'auto'}
+        handler = assembly_handler.AssemblyHandler(self.ctx)
+        handler._build_artifact(db_obj, artifact, commit_sha='abc123')
+        self.assertFalse(image.create_unless_in_progress.called)
+        image.create.assert_called_once_with(self.ctx)
+        self.assertEqual(1, mock_pa.call_count)
@@ -53,11 +53,13 @@ class TestPipelineHandler(base.BaseTestCase):
                 'plan_uuid': 'input_plan_uuid'}
         db_obj = fakes.FakePipeline()
         mock_registry.Pipeline.get_by_uuid.return_value = db_obj
+        mock_registry.Plan.get_by_uuid.return_value = fakes.FakePlan()
         handler = pipeline_handler.PipelineHandler(self.ctx)
         res = handler.update('test_id', data)
         self.assertEqual(db_obj.user_id, res.user_id)
         db_obj.save.assert_called_once_with(self.ctx)
-        db_obj.update.assert_called_once_with(data)
+        db_obj.update.assert_called_once_with({'user_id': 'new_user_id',
+                                               'plan_id': 8})
         mock_registry.Pipeline.get_by_uuid.assert_called_once_with(self.ctx,
                                                                    'test_id')
 
@@ -70,7 +72,7 @@ class TestPipelineHandler(base.BaseTestCase):
         db_obj = fakes.FakePipeline()
         mock_registry.Pipeline.return_value = db_obj
         fp = fakes.FakePlan()
-        mock_registry.Plan.get_by_id.return_value = fp
+        mock_registry.Plan.get_by_uuid.return_value = fp
         fp.raw_content = {
             'name': 'theplan',
             'artifacts': [{'name': 'nodeus',
@@ -86,13 +88,24 @@ class TestPipelineHandler(base.BaseTestCase):
         handler._execute_workbook = mock.MagicMock()
         handler._ensure_workbook = mock.MagicMock()
         res = handler.create(data)
-        db_obj.update.assert_called_once_with(data)
+        db_obj.update.assert_called_once_with({'user_id': 'new_user_id',
+                                               'uuid': 'input_uuid',
+                                               'plan_id': 8})
         handler._execute_workbook.assert_called_once_with(db_obj)
         handler._ensure_workbook.assert_called_once_with(db_obj)
         db_obj.create.assert_called_once_with(self.ctx)
         self.assertEqual(db_obj, res)
         mock_kc.return_value.create_trust_context.assert_called_once_with()
 
+    def test_create_with_unseen_plan(self, mock_registry):
+        data = {'user_id': 'new_user_id',
+                'plan_uuid': 'other_tenant_plan'}
+        mock_registry.Plan.get_by_uuid.side_effect = (
+            exception.ResourceNotFound(name='plan', id='other_tenant_plan'))
+        handler = pipeline_handler.PipelineHandler(self.ctx)
+        self.assertRaises(exception.ResourceNotFound, handler.create, data)
+        self.assertFalse(mock_registry.Pipeline.called)
+
     @mock.patch('solum.common.clients.OpenStackClients')
     @mock.patch('solum.common.catalog.get')
     def test_empty_create_stack(self, mock_get, mock_clients, mock_registry):
@@ -13,6 +13,7 @@
 # under the License.
 
 import mock
+from webob import exc
 
 from solum.api import auth
 from solum.common import context
@@ -63,6 +64,8 @@ class TestAuth(base.BaseTestCase):
                          fakes.fakeAuthTokenHeaders['X-User-Id'])
         self.assertEqual(ctx.roles,
                          [u'admin', u'ResellerAdmin', u'_member_'])
+        self.assertTrue(ctx.is_admin)
+        self.assertFalse(ctx.all_tenants)
         self.assertEqual(ctx.auth_url,
                          fakes.fakeAuthTokenHeaders['X-Auth-Url'])
         self.assertEqual(ctx.user_name,
@@ -85,3 +88,20 @@ class TestAuth(base.BaseTestCase):
         self.assertEqual(fakes.fakeAuthTokenHeaders['X-Auth-Token'],
                          ctx.auth_token)
         self.assertEqual('assert_this', ctx.auth_token_info)
+
+    def test_auth_hook_all_tenants(self, mock_cls):
+        state = mock.Mock(request=fakes.FakePecanRequest())
+        state.request.GET = {'all_tenants': '1', 'limit': '5'}
+        hook = auth.AuthInformationHook()
+        hook.before(state)
+        ctx = state.request.security_context
+        self.assertTrue(ctx.all_tenants)
+        self.assertEqual({'limit': '5'}, state.request.GET)
+
+    def test_auth_hook_all_tenants_not_admin(self, mock_cls):
+        state = mock.Mock(request=fakes.FakePecanRequest())
+        state.request.headers = dict(fakes.fakeAuthTokenHeaders,
+                                     **{'X-Roles': '_member_'})
+        state.request.GET = {'all_tenants': 'true'}
+        hook = auth.AuthInformationHook()
+        self.assertRaises(exc.HTTPForbidden, hook.before, state)
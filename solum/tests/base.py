@@ -18,6 +18,9 @@ from oslo.config import cfg
 from oslotest import base
 import testscenarios
 
+from solum.common import clients
+from solum.common import heat_utils
+
 
 class BaseTestCase(testscenarios.WithScenarios, base.BaseTestCase):
     """Test base class."""
@@ -25,3 +28,5 @@ class BaseTestCase(testscenarios.WithScenarios, base.BaseTestCase):
     def setUp(self):
         super(BaseTestCase, self).setUp()
         self.addCleanup(cfg.CONF.reset)
+        self.addCleanup(clients.endpoint_cache.clear)
+        self.addCleanup(heat_utils.network_cache.invalidate)
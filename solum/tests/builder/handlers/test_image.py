@@ -15,6 +15,7 @@
 import mock
 
 from solum.builder.handlers import image_handler
+from solum.common import exception
 from solum.tests import base
 from solum.tests import fakes
 from solum.tests import utils
@@ -46,3 +47,26 @@ class TestImageHandler(base.BaseTestCase):
         mock_build.assert_called_once_with(res)
         fi.update.assert_called_once_with(data)
         fi.create.assert_called_once_with(self.ctx)
+
+    @mock.patch('solum.worker.api.API.cancel')
+    def test_image_cancel(self, mock_cancel, mock_registry):
+        fi = fakes.FakeImage()
+        fi.state = 'BUILDING'
+        mock_registry.Image.get_by_uuid.return_value = fi
+        handler = image_handler.ImageHandler(self.ctx)
+        handler.cancel('test_id')
+        self.assertEqual('ERROR', fi.state)
+        fi.save.assert_called_once_with(self.ctx)
+        mock_cancel.assert_called_once_with(build_id=fi.id)
+
+    @mock.patch('solum.worker.api.API.cancel')
+    def test_image_cancel_finished_build(self, mock_cancel, mock_registry):
+        fi = fakes.FakeImage()
+        fi.state = 'COMPLETE'
+        mock_registry.Image.get_by_uuid.return_value = fi
+        handler = image_handler.ImageHandler(self.ctx)
+        self.assertRaises(exception.BuildNotInProgress,
+                          handler.cancel, 'test_id')
+        self.assertEqual('COMPLETE', fi.state)
+        self.assertFalse(fi.save.called)
+        self.assertFalse(mock_cancel.called)
@@ -48,6 +48,21 @@ class TestImageController(base.BaseTestCase):
         hand_get.assert_called_with('test_id')
         self.assertEqual(404, resp_mock.status)
 
+    def test_image_cancel(self, ImageHandler, resp_mock, request_mock):
+        hand_cancel = ImageHandler.return_value.cancel
+        cont = image.ImageController('test_id')
+        cont.cancel()
+        hand_cancel.assert_called_with('test_id')
+        self.assertEqual(202, resp_mock.status)
+
+    def test_image_cancel_finished(self, ImageHandler, resp_mock,
+                                   request_mock):
+        hand_cancel = ImageHandler.return_value.cancel
+        hand_cancel.side_effect = exception.BuildNotInProgress(id='test_id')
+        cont = image.ImageController('test_id')
+        cont.cancel()
+        self.assertEqual(409, resp_mock.status)
+
 
 class TestImageAsDict(base.BaseTestCase):
 
@@ -12,8 +12,13 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import datetime
+
+import eventlet
 import mock
+from oslo.config import cfg
 
+from solum.common import context
 from solum.common.rpc import service
 from solum.tests import base
 
@@ -25,8 +30,58 @@ class ServiceTest(base.BaseTestCase):
         rpc_service = service.Service(topic, server, handlers)
         self.assertIsNotNone(rpc_service._server)
 
+    @mock.patch('oslo.messaging.get_rpc_server')
+    def test_executor(self, mock_get_server):
+        handler = mock.MagicMock()
+        rpc_service = service.Service('fake_topic', 'fake_host', [handler],
+                                      executor='eventlet', pool_size=8)
+        args, kwargs = mock_get_server.call_args
+        self.assertEqual('eventlet', kwargs['executor'])
+        endpoint = args[2][0]
+        endpoint.echo({}, message='foo')
+        handler.echo.assert_called_once_with({}, message='foo')
+        self.assertEqual(0, rpc_service.stats.in_flight)
+
+
+class ServiceStatsTest(base.BaseTestCase):
+
+    def test_bounded(self):
+        stats = service.ServiceStats('fake_topic', 2)
+        seen = []
+
+        class Handler(object):
+            def slow(self, ctxt):
+                seen.append((stats.in_flight, stats.waiting))
+                eventlet.sleep(0)
+
+        endpoint = service.Endpoint(Handler(), stats)
+        pool = eventlet.GreenPool()
+        for _ in range(3):
+            pool.spawn(endpoint.slow, {})
+        pool.waitall()
+        self.assertEqual(2, max(in_flight for in_flight, _ in seen))
+        self.assertEqual((0, 0), (stats.in_flight, stats.waiting))
+
+    def test_endpoint_attributes(self):
+        handler = mock.MagicMock(spec=['echo'])
+        endpoint = service.Endpoint(handler, service.ServiceStats('t', 1))
+        self.assertIsNone(getattr(endpoint, 'target', None))
+        self.assertTrue(hasattr(endpoint, 'echo'))
+
+    @mock.patch('solum.common.rpc.service.LOG')
+    def test_log_on_change(self, mock_log):
+        stats = service.ServiceStats('fake_topic', 1)
+        stats.log()
+        stats.log()
+        stats.in_flight = 1
+        stats.log()
+        self.assertEqual(2, mock_log.info.call_count)
+
 
 class APITest(base.BaseTestCase):
+    def setUp(self):
+        super(APITest, self).setUp()
+        self.addCleanup(service.cleanup)
 
     def test_create(self):
         topic = 'fake_topic'
@@ -39,3 +94,67 @@ class APITest(base.BaseTestCase):
         rpc_api._cast = mock.MagicMock()
         rpc_api.echo('foo')
         rpc_api._cast.assert_called_once_with('echo', message='foo')
+
+    def test_client_shared_per_topic(self):
+        first = service.API(context={'user': 'a'}, topic='fake_topic')
+        second = service.API(context={'user': 'b'}, topic='fake_topic')
+        other = service.API(context={}, topic='other_topic')
+        self.assertIs(first._client, second._client)
+        self.assertIsNot(first._client, other._client)
+        self.assertIs(first._client.transport, other._client.transport)
+
+    @mock.patch('oslo.messaging.get_transport')
+    def test_transport_created_once(self, mock_get_transport):
+        service.API(context={}, topic='fake_topic')
+        service.API(context={}, topic='other_topic')
+        service.Service('fake_topic', 'fake_host', [])
+        self.assertEqual(1, mock_get_transport.call_count)
+
+    def test_cast_passes_context(self):
+        rpc_api = service.API(context={'user': 'a'}, topic='fake_topic')
+        with mock.patch.object(rpc_api._client, 'cast') as mock_cast:
+            rpc_api.echo('foo')
+        mock_cast.assert_called_once_with({'user': 'a'}, 'echo',
+                                          message='foo')
+
+
+class SerializerTest(base.BaseTestCase):
+    def setUp(self):
+        super(SerializerTest, self).setUp()
+        self.ctx = context.RequestContext(
+            auth_token='tok', user='u', tenant='t', roles=['admin'],
+            auth_token_info={'token': {'catalog': ['big'] * 100}})
+        self.serializer = service.RequestContextSerializer(
+            service.JsonPayloadSerializer())
+
+    def test_context_without_token_info(self):
+        values = self.serializer.serialize_context(self.ctx)
+        self.assertEqual({'auth_token': 'tok', 'user': 'u', 'tenant': 't',
+                          'roles': ['admin'], 'is_admin': False,
+                          'read_only': False, 'show_deleted': False,
+                          'request_id': self.ctx.request_id},
+                         values)
+        ctx = self.serializer.deserialize_context(values)
+        self.assertEqual('tok', ctx.auth_token)
+        self.assertEqual('t', ctx.tenant)
+        self.assertIsNone(ctx.auth_token_info)
+
+    def test_context_with_token_info(self):
+        cfg.CONF.set_override('rpc_send_token_info', True)
+        values = self.serializer.serialize_context(self.ctx)
+        ctx = self.serializer.deserialize_context(values)
+        self.assertEqual(self.ctx.auth_token_info, ctx.auth_token_info)
+
+    @mock.patch('solum.openstack.common.jsonutils.to_primitive')
+    def test_plain_payload_not_converted(self, mock_to_primitive):
+        entity = {'a': [1, 2.5, 'x', None, True], 'b': {'c': u'd'}}
+        self.assertIs(entity,
+                      self.serializer.serialize_entity(self.ctx, entity))
+        self.assertFalse(mock_to_primitive.called)
+
+    def test_other_payload_converted(self):
+        when = datetime.datetime(2014, 10, 1)
+        self.assertEqual({'at': '2014-10-01T00:00:00.000000',
+                          'ids': [1, 2]},
+                         self.serializer.serialize_entity(
+                             self.ctx, {'at': when, 'ids': (1, 2)}))
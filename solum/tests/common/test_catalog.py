@@ -12,8 +12,9 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import os.path
+import os
 
+import fixtures
 import mock
 
 from solum.common import catalog
@@ -24,34 +25,74 @@ from solum.tests import base
 class TestCatalog(base.BaseTestCase):
     def setUp(self):
         super(TestCatalog, self).setUp()
-        self.proj_dir = os.path.realpath(
-            os.path.join(os.path.dirname(__file__),
-                         '..', '..', '..'))
+        self.root = self.useFixture(fixtures.TempDir()).path
+        os.mkdir(os.path.join(self.root, 'test'))
+        self.catalog = catalog.Catalog(self.root)
+
+    def _write(self, file_name, content, mtime=1000):
+        file_path = os.path.join(self.root, 'test', file_name)
+        with open(file_path, 'w') as fd:
+            fd.write(content)
+        os.utime(file_path, (mtime, mtime))
 
     def test_get_default(self):
-        with mock.patch('solum.common.catalog.open',
-                        mock.mock_open(read_data='test content'),
-                        create=True) as m_open:
-            val = catalog.get('test', 'test_data')
-            self.assertEqual('test content', val)
-            expect = os.path.join(self.proj_dir,
-                                  'etc/solum/test/test_data.yaml')
-            m_open.assert_called_with(expect)
+        self._write('test_data.yaml', 'test content')
+        self.assertEqual('test content',
+                         self.catalog.get('test', 'test_data'))
 
     def test_get_content_type(self):
-        with mock.patch('solum.common.catalog.open',
-                        mock.mock_open(read_data='test content'),
-                        create=True) as m_open:
-            val = catalog.get('test', 'test_data', content_type='fake')
-            self.assertEqual('test content', val)
-            expect = os.path.join(self.proj_dir,
-                                  'etc/solum/test/test_data.fake')
-            m_open.assert_called_with(expect)
+        self._write('test_data.fake', 'test content')
+        self.assertEqual('test content',
+                         self.catalog.get('test', 'test_data',
+                                          content_type='fake'))
 
     def test_get_fail(self):
+        self.assertRaises(exception.ObjectNotFound,
+                          self.catalog.get, 'test', 'test_data')
+
+    def test_get_parsed(self):
+        self._write('test_data.yaml', 'description: test')
+        self.assertEqual({'description': 'test'},
+                         self.catalog.get_parsed('test', 'test_data'))
+
+    def test_file_read_once(self):
+        self._write('test_data.yaml', 'description: test')
+        self.catalog.load(['test'])
         with mock.patch('solum.common.catalog.open',
-                        mock.mock_open(read_data='test content'),
                         create=True) as m_open:
-            m_open.side_effect = IOError('test')
-            self.assertRaises(exception.ObjectNotFound,
-                              catalog.get, 'test', 'test_data')
+            self.catalog.get('test', 'test_data')
+            self.catalog.get_parsed('test', 'test_data')
+            self.assertFalse(m_open.called)
+
+    def test_changed_file_read_again(self):
+        self._write('test_data.yaml', 'description: old')
+        self.catalog.get_parsed('test', 'test_data')
+        self._write('test_data.yaml', 'description: new', mtime=2000)
+        self.assertEqual({'description': 'new'},
+                         self.catalog.get_parsed('test', 'test_data'))
+
+    def test_reload(self):
+        self._write('test_data.yaml', 'description: old')
+        self.catalog.get('test', 'test_data')
+        # Same mtime, so only a reload notices the change.
+        self._write('test_data.yaml', 'description: new')
+        self.assertEqual('description: old',
+                         self.catalog.get('test', 'test_data'))
+        self.catalog.reload()
+        self.assertEqual('description: new',
+                         self.catalog.get('test', 'test_data'))
+
+    def test_load_skips_bad_entries(self):
+        self._write('good.yaml', 'description: test')
+        self._write('bad.yaml', ': :')
+        with mock.patch('solum.common.catalog.LOG') as mock_log:
+            self.catalog.load(['test', 'missing'])
+        self.assertEqual(1, mock_log.warn.call_count)
+        self.assertEqual({'description': 'test'},
+                         self.catalog.get_parsed('test', 'good'))
+
+    def test_shipped_templates(self):
+        template = catalog.get_parsed('templates', 'basic')
+        self.assertIn('description', template)
+        self.assertEqual(catalog.get('templates', 'basic'),
+                         catalog.get('templates', 'basic'))
@@ -25,6 +25,7 @@ from zaqarclient.queues.v1 import client as zaqarclient
 from solum.common import clients
 from solum.common import exception
 from solum.tests import base
+from solum.tests import utils
 
 
 class ClientsTest(base.BaseTestCase):
@@ -38,6 +39,46 @@ class ClientsTest(base.BaseTestCase):
         mock_cat.url_for.assert_called_once_with(service_type='fake_service',
                                                  endpoint_type='fake_endpoint')
 
+    @mock.patch.object(clients.OpenStackClients, 'keystone')
+    def test_url_for_is_cached(self, mock_keystone):
+        mock_cat = mock_keystone.return_value.client.service_catalog
+        ctx = utils.dummy_context()
+        for i in range(2):
+            obj = clients.OpenStackClients(ctx)
+            obj.url_for(service_type='image', endpoint_type='publicURL')
+        self.assertEqual(1, mock_cat.url_for.call_count)
+
+        obj.url_for(service_type='orchestration', endpoint_type='publicURL')
+        obj.url_for(service_type='image', endpoint_type='publicURL',
+                    region_name='north')
+        other = clients.OpenStackClients(utils.dummy_context(tenant_id='t2'))
+        other.url_for(service_type='image', endpoint_type='publicURL')
+        self.assertEqual(4, mock_cat.url_for.call_count)
+
+    @mock.patch('time.time')
+    @mock.patch.object(clients.OpenStackClients, 'keystone')
+    def test_url_for_cache_expires(self, mock_keystone, mock_time):
+        mock_cat = mock_keystone.return_value.client.service_catalog
+        cfg.CONF.set_override('service_catalog_cache_ttl', 60)
+        obj = clients.OpenStackClients(utils.dummy_context())
+        mock_time.return_value = 1000
+        obj.url_for(service_type='image')
+        mock_time.return_value = 1059
+        obj.url_for(service_type='image')
+        self.assertEqual(1, mock_cat.url_for.call_count)
+        mock_time.return_value = 1061
+        obj.url_for(service_type='image')
+        self.assertEqual(2, mock_cat.url_for.call_count)
+
+    @mock.patch.object(clients.OpenStackClients, 'keystone')
+    def test_url_for_cache_disabled(self, mock_keystone):
+        mock_cat = mock_keystone.return_value.client.service_catalog
+        cfg.CONF.set_override('service_catalog_cache_ttl', 0)
+        obj = clients.OpenStackClients(utils.dummy_context())
+        obj.url_for(service_type='image')
+        obj.url_for(service_type='image')
+        self.assertEqual(2, mock_cat.url_for.call_count)
+
     @mock.patch.object(barbicanclient, 'Client')
     @mock.patch.object(barbicanauth, 'KeystoneAuthV2')
     def test_clients_barbican(self, mock_auth, mock_call):
@@ -0,0 +1,77 @@
+# Copyright 2014 - Rackspace Hosting
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+from oslo.config import cfg
+
+from solum.common import heat_utils
+from solum.tests import base
+from solum.tests import utils
+
+
+def fake_clients(tenant_id='test_tenant_id'):
+    osc = mock.MagicMock()
+    osc.context = utils.dummy_context(tenant_id=tenant_id)
+    osc.neutron.return_value.list_networks.return_value = {
+        "networks": [{"router:external": True,
+                      "id": "public_net_id"},
+                     {"router:external": False,
+                      "id": "private_net_id",
+                      "subnets": ["private_subnet_id"]}]}
+    return osc
+
+
+class TestNetworkParameters(base.BaseTestCase):
+
+    def test_get_network_parameters(self):
+        params = heat_utils.get_network_parameters(fake_clients())
+        self.assertEqual({'public_net': 'public_net_id',
+                          'private_net': 'private_net_id',
+                          'private_subnet': 'private_subnet_id'}, params)
+
+    def test_networks_listed_once_per_tenant(self):
+        osc = fake_clients()
+        other = fake_clients('other_tenant')
+        heat_utils.get_network_parameters(osc)
+        params = heat_utils.get_network_parameters(osc)
+        heat_utils.get_network_parameters(other)
+        self.assertEqual(1, osc.neutron().list_networks.call_count)
+        self.assertEqual(1, other.neutron().list_networks.call_count)
+
+        # Callers may add to the parameters without touching the cache.
+        params['image'] = 'xyz'
+        self.assertNotIn('image', heat_utils.get_network_parameters(osc))
+
+    @mock.patch('time.time')
+    def test_expired_entry_is_listed_again(self, mock_time):
+        osc = fake_clients()
+        mock_time.return_value = 1000
+        heat_utils.get_network_parameters(osc)
+        mock_time.return_value = 1000 + cfg.CONF.network_parameters_cache_ttl
+        heat_utils.get_network_parameters(osc)
+        self.assertEqual(2, osc.neutron().list_networks.call_count)
+
+    def test_invalidate(self):
+        osc = fake_clients()
+        heat_utils.get_network_parameters(osc)
+        heat_utils.network_cache.invalidate('test_tenant_id')
+        heat_utils.get_network_parameters(osc)
+        self.assertEqual(2, osc.neutron().list_networks.call_count)
+
+    def test_cache_disabled(self):
+        cfg.CONF.set_override('network_parameters_cache_ttl', 0)
+        osc = fake_clients()
+        heat_utils.get_network_parameters(osc)
+        heat_utils.get_network_parameters(osc)
+        self.assertEqual(2, osc.neutron().list_networks.call_count)
@@ -17,6 +17,7 @@ test_service
 Tests for `solum.common.service` module.
 """
 
+import mock
 import testtools
 
 from solum.common import service
@@ -34,3 +35,8 @@ class TestService(base.BaseTestCase):
         service.prepare_service([])
         self.assertTrue(issubclass(objects.registry.Component,
                                    abstract.Component))
+
+    @mock.patch('solum.common.catalog.load')
+    def test_prepare_loads_catalog(self, mock_load):
+        service.prepare_service([])
+        mock_load.assert_called_once_with()
@@ -12,10 +12,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import eventlet
 import mock
+from oslo.config import cfg
 
 from solum.conductor.handlers import default
+from solum.objects.sqlalchemy import assembly
 from solum.tests import base
+from solum.tests import utils
 
 
 class HandlerTest(base.BaseTestCase):
@@ -25,3 +29,117 @@ class HandlerTest(base.BaseTestCase):
         handler.echo = mock.MagicMock()
         handler.echo({}, 'foo')
         handler.echo.assert_called_once_with({}, 'foo')
+
+    @mock.patch('solum.objects.registry')
+    def test_build_job_update(self, mock_registry):
+        handler = default.Handler()
+        handler.build_job_update({}, 5, 'BUILDING', 'building', None, 44)
+        mock_registry.Image.update_build.assert_called_once_with(
+            {}, 5, {'state': 'BUILDING', 'description': 'building',
+                    'created_image_id': None}, 44)
+
+    @mock.patch('solum.objects.registry')
+    def test_build_job_update_records_timings(self, mock_registry):
+        handler = default.Handler()
+        timings = {'clone': 3, 'build': 60.2}
+        handler.build_job_update({}, 5, 'COMPLETE', 'built', 'glance-id',
+                                 None, timings)
+        mock_registry.Image.update_build.assert_called_once_with(
+            {}, 5, {'state': 'COMPLETE', 'description': 'built',
+                    'created_image_id': 'glance-id',
+                    'stage_timings': timings}, None)
+
+    @mock.patch('solum.objects.registry')
+    def test_build_job_updates(self, mock_registry):
+        handler = default.Handler()
+        timings = {'build': 60.2}
+        updates = [
+            {'build_id': 5, 'state': 'BUILDING', 'description': 'building',
+             'created_image_id': None, 'assembly_id': 44, 'timings': None},
+            {'build_id': 6, 'state': 'BUILDING', 'description': 'building',
+             'created_image_id': None, 'assembly_id': 45, 'timings': None},
+            {'build_id': 5, 'state': 'COMPLETE', 'description': 'built',
+             'created_image_id': 'glance-id', 'assembly_id': 44,
+             'timings': timings},
+            {'build_id': 5, 'state': 'COMPLETE', 'description': 'built',
+             'created_image_id': 'glance-id', 'assembly_id': 44,
+             'timings': None}]
+        handler.build_job_updates({}, updates)
+        self.assertEqual([
+            mock.call({}, 6, {'state': 'BUILDING', 'description': 'building',
+                              'created_image_id': None}, 45),
+            mock.call({}, 5, {'state': 'COMPLETE', 'description': 'built',
+                              'created_image_id': 'glance-id',
+                              'stage_timings': timings}, 44)],
+            mock_registry.Image.update_build.call_args_list)
+
+    @mock.patch('solum.objects.registry')
+    def test_update_assembly_status_coalesced(self, mock_registry):
+        cfg.CONF.set_override('assembly_status_coalesce_interval', 0.001,
+                              group='conductor')
+        handler = default.Handler()
+        handler.update_assembly_status({}, 44, 'UNIT_TESTING')
+        handler.update_assembly_status({}, 45, 'UNIT_TESTING')
+        handler.update_assembly_status({}, 44, 'BUILDING')
+        self.assertFalse(mock_registry.Assembly.update_status.called)
+        eventlet.sleep(0.01)
+        self.assertEqual([mock.call({}, 44, 'BUILDING',
+                                    keep_states=default.DEPLOYER_STATES),
+                          mock.call({}, 45, 'UNIT_TESTING',
+                                    keep_states=default.DEPLOYER_STATES)],
+                         mock_registry.Assembly.update_status.call_args_list)
+
+    @mock.patch('solum.objects.registry')
+    def test_update_assembly_status_at_once(self, mock_registry):
+        cfg.CONF.set_override('assembly_status_coalesce_interval', 0,
+                              group='conductor')
+        handler = default.Handler()
+        handler.update_assembly_status({}, 44, 'READY')
+        mock_registry.Assembly.update_status.assert_called_once_with(
+            {}, 44, 'READY', keep_states=default.DEPLOYER_STATES)
+
+
+class AssemblyStatusTest(base.BaseTestCase):
+    def setUp(self):
+        super(AssemblyStatusTest, self).setUp()
+        self.db = self.useFixture(utils.Database())
+        self.ctx = utils.dummy_context()
+        self.data = [{'uuid': 'assembly', 'status': 'READY',
+                      'project_id': self.ctx.tenant}]
+        utils.create_models_from_data(assembly.Assembly, self.data,
+                                      self.ctx)
+        cfg.CONF.set_override('assembly_status_coalesce_interval', 0.001,
+                              group='conductor')
+
+    def _status(self):
+        return assembly.Assembly.get_by_id(self.ctx,
+                                           self.data[0]['id']).status
+
+    def test_rebuild_of_ready_assembly(self):
+        # The API sets the assembly PENDING when it starts the build.
+        assembly.Assembly.update_status(self.ctx, self.data[0]['id'],
+                                        'PENDING')
+        handler = default.Handler()
+        handler.update_assembly_status(self.ctx, self.data[0]['id'],
+                                       'BUILDING')
+        eventlet.sleep(0.01)
+        self.assertEqual('BUILDING', self._status())
+
+    def test_late_status_of_deployed_build(self):
+        handler = default.Handler()
+        handler.update_assembly_status(self.ctx, self.data[0]['id'],
+                                       'BUILDING')
+        eventlet.sleep(0.01)
+        self.assertEqual('READY', self._status())
+
+    def test_cached_build_with_no_op_deploy(self):
+        # On a build cache hit the worker casts BUILDING and then the
+        # deploy at once; a no-op deploy then sets READY straight away.
+        handler = default.Handler()
+        handler.update_assembly_status(self.ctx, self.data[0]['id'],
+                                       'BUILDING')
+        assem = assembly.Assembly.get_by_id(self.ctx, self.data[0]['id'])
+        assem.status = 'READY'
+        assem.save(self.ctx)
+        eventlet.sleep(0.01)
+        self.assertEqual('READY', self._status())
@@ -38,16 +38,19 @@ class HandlerTest(base.BaseTestCase):
         handler.echo({}, 'foo')
         handler.echo.assert_called_once_with({}, 'foo')
 
+    @mock.patch('solum.common.catalog.get_parsed')
     @mock.patch('solum.common.catalog.get')
     @mock.patch('solum.objects.registry')
     @mock.patch('solum.common.clients.OpenStackClients')
-    def test_deploy(self, mock_clients, mock_registry, mock_get_templ):
+    def test_deploy(self, mock_clients, mock_registry, mock_get_templ,
+                    mock_get_parsed):
         handler = heat_handler.Handler()
 
         fake_assembly = fakes.FakeAssembly()
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
         fake_template = json.dumps({'description': 'test'})
         mock_get_templ.return_value = fake_template
+        mock_get_parsed.return_value = {'description': 'test'}
         handler._find_id_if_stack_exists = mock.MagicMock(return_value=(None))
         stacks = mock_clients.return_value.heat.return_value.stacks
         stacks.create.return_value = {"stack": {
@@ -61,7 +64,7 @@ class HandlerTest(base.BaseTestCase):
                          {"router:external": False,
                           "id": "private_net_id",
                           "subnets": ["private_subnet_id"]}]}
-        handler._update_assembly_status = mock.MagicMock()
+        handler._watcher = mock.MagicMock()
         handler.deploy(self.ctx, 77, 'created_image_id')
         parameters = {'image': 'created_image_id',
                       'app_name': 'faker',
@@ -79,29 +82,33 @@ class HandlerTest(base.BaseTestCase):
         assign_and_create_mock.assert_called_once_with(self.ctx,
                                                        fake_assembly,
                                                        comp_name,
-                                                       'Heat Stack',
+                                                       'heat_stack',
                                                        'Heat Stack test',
                                                        'http://fake.ref',
                                                        'fake_id')
+        handler._watcher.watch.assert_called_once_with(self.ctx, 'fake_id',
+                                                       mock.ANY)
 
+    @mock.patch('solum.common.catalog.get_parsed')
     @mock.patch('solum.common.catalog.get')
     @mock.patch('solum.objects.registry')
     @mock.patch('solum.common.clients.OpenStackClients')
     def test_comp_name_error(self, mock_clients, mock_registry,
-                             mock_get_templ):
+                             mock_get_templ, mock_get_parsed):
         handler = heat_handler.Handler()
 
         fake_assembly = fakes.FakeAssembly()
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
         fake_template = json.dumps({'description': 'test'})
         mock_get_templ.return_value = fake_template
+        mock_get_parsed.return_value = {'description': 'test'}
         handler._find_id_if_stack_exists = mock.MagicMock(return_value=(None))
         stacks = mock_clients.return_value.heat.return_value.stacks
         stacks.create.return_value = {"stack": {
             "id": "fake_id",
             "links": [{"href": "http://fake.ref",
                        "rel": "self"}]}}
-        handler._update_assembly_status = mock.MagicMock()
+        handler._watcher = mock.MagicMock()
         handler.deploy(self.ctx, 77, 'created_image_id')
         assign_and_create_mock = mock_registry.Component.assign_and_create
         comp_name = 'Heat Stack for %s' % fake_assembly.name
@@ -109,25 +116,27 @@ class HandlerTest(base.BaseTestCase):
                           assign_and_create_mock.assert_called_once_with,
                           comp_name)
 
+    @mock.patch('solum.common.catalog.get_parsed')
     @mock.patch('solum.common.catalog.get')
     @mock.patch('solum.objects.registry')
     @mock.patch('solum.common.clients.OpenStackClients')
     @mock.patch('solum.deployer.handlers.heat.cfg.CONF.api.image_format')
     def test_deploy_docker(self, image_format, mock_clients, mock_registry,
-                           mock_get_templ):
+                           mock_get_templ, mock_get_parsed):
         handler = heat_handler.Handler()
         image_format.return_value = "docker"
         fake_assembly = fakes.FakeAssembly()
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
         fake_template = json.dumps({'description': 'test'})
         mock_get_templ.return_value = fake_template
+        mock_get_parsed.return_value = {'description': 'test'}
         handler._find_id_if_stack_exists = mock.MagicMock(return_value=(None))
         stacks = mock_clients.return_value.heat.return_value.stacks
         stacks.create.return_value = {"stack": {
             "id": "fake_id",
             "links": [{"href": "http://fake.ref",
                        "rel": "self"}]}}
-        handler._update_assembly_status = mock.MagicMock()
+        handler._watcher = mock.MagicMock()
         handler.deploy(self.ctx, 77, 'created_image_id')
         parameters = {'image': 'created_image_id',
                       'app_name': 'faker'}
@@ -139,36 +148,115 @@ class HandlerTest(base.BaseTestCase):
         assign_and_create_mock.assert_called_once_with(self.ctx,
                                                        fake_assembly,
                                                        comp_name,
-                                                       'Heat Stack',
+                                                       'heat_stack',
                                                        'Heat Stack test',
                                                        'http://fake.ref',
                                                        'fake_id')
 
+    @mock.patch('solum.common.catalog.get')
+    @mock.patch('solum.objects.registry')
     @mock.patch('solum.common.clients.OpenStackClients')
-    def test_update_assembly_status(self, mock_clients):
+    def test_deploy_unchanged_stack(self, mock_clients, mock_registry,
+                                    mock_get_templ):
+        handler = heat_handler.Handler()
+        handler._watcher = mock.MagicMock()
+        fake_assembly = fakes.FakeAssembly()
+        mock_registry.Assembly.get_by_id.return_value = fake_assembly
+        mock_get_templ.return_value = 'fake template'
+        handler._find_id_if_stack_exists = mock.MagicMock(return_value='42')
+        comp = fake_assembly.heat_stack_component
+
+        handler.deploy(self.ctx, 8, 'created_image_id')
+        handler._watcher.watch.assert_called_once_with(self.ctx, '42',
+                                                       mock.ANY)
+        self.assertIsNone(comp.stack_fingerprint)
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        self.assertEqual(1, stacks.update.call_count)
+
+        # The same image deployed again once the stack is up.
+        callback = handler._watcher.watch.call_args[0][2]
+        handler._parse_server_url = mock.MagicMock(return_value='xyz')
+        callback('COMPLETE', mock.MagicMock())
+        fake_assembly.status = STATES.BUILDING
+        handler.deploy(self.ctx, 8, 'created_image_id')
+        self.assertEqual(1, stacks.update.call_count)
+        self.assertEqual(1, handler._watcher.watch.call_count)
+        self.assertEqual(STATES.READY, fake_assembly.status)
+
+        # A new image updates the stack.
+        handler.deploy(self.ctx, 8, 'new_image_id')
+        self.assertEqual(2, stacks.update.call_count)
+
+    @mock.patch('solum.objects.registry')
+    def test_stack_settled_ready(self, mock_registry):
         handler = heat_handler.Handler()
         fake_assembly = fakes.FakeAssembly()
-        stack = mock.MagicMock()
-        stack.status = 'COMPLETE'
-        mock_clients.heat().stacks.get.return_value = stack
+        mock_registry.Assembly.get_by_id.return_value = fake_assembly
         handler._parse_server_url = mock.MagicMock(return_value=('xyz'))
-        handler._update_assembly_status(self.ctx, fake_assembly, mock_clients,
-                                        'fake_id')
+        handler._on_stack_settled(self.ctx, 8, 'fp', 'COMPLETE',
+                                  mock.MagicMock())
         self.assertEqual(fake_assembly.status, 'READY')
+        comp = fake_assembly.heat_stack_component
+        self.assertEqual('fp', comp.stack_fingerprint)
+        comp.save.assert_called_once_with(self.ctx)
+        self.assertEqual(fake_assembly.application_uri, 'xyz')
         fake_assembly.save.assert_called_once_with(self.ctx)
 
-    @mock.patch('solum.common.clients.OpenStackClients')
-    def test_update_assembly_status_failed(self, mock_clients):
+    @mock.patch('solum.objects.registry')
+    def test_stack_settled_without_url(self, mock_registry):
+        handler = heat_handler.Handler()
+        fake_assembly = fakes.FakeAssembly()
+        mock_registry.Assembly.get_by_id.return_value = fake_assembly
+        handler._parse_server_url = mock.MagicMock(return_value=None)
+        done = handler._on_stack_settled(self.ctx, 8, 'fp', 'COMPLETE',
+                                         mock.MagicMock())
+        self.assertFalse(done)
+        self.assertFalse(fake_assembly.save.called)
+
+    @mock.patch('solum.objects.registry')
+    def test_stack_settled_failed(self, mock_registry):
         handler = heat_handler.Handler()
         fake_assembly = fakes.FakeAssembly()
-        stack = mock.MagicMock()
-        stack.status = 'FAILED'
-        mock_clients.heat().stacks.get.return_value = stack
-        handler._update_assembly_status(self.ctx, fake_assembly, mock_clients,
-                                        'fake_id')
+        mock_registry.Assembly.get_by_id.return_value = fake_assembly
+        handler._on_stack_settled(self.ctx, 8, 'fp', 'FAILED',
+                                  mock.MagicMock())
         self.assertEqual(fake_assembly.status, 'ERROR')
         fake_assembly.save.assert_called_once_with(self.ctx)
 
+    @mock.patch('solum.common.heat_utils.network_cache')
+    @mock.patch('solum.objects.registry')
+    def test_stack_failed_forgets_networks(self, mock_registry, mock_cache):
+        handler = heat_handler.Handler()
+        mock_registry.Assembly.get_by_id.return_value = fakes.FakeAssembly()
+        handler._on_stack_settled(self.ctx, 8, 'fp', 'FAILED',
+                                  mock.MagicMock())
+        mock_cache.invalidate.assert_called_once_with(self.ctx.tenant)
+
+    @mock.patch('solum.common.heat_utils.get_network_parameters')
+    @mock.patch('solum.common.solum_keystoneclient.KeystoneClientV3')
+    @mock.patch('solum.objects.registry')
+    @mock.patch('solum.common.clients.OpenStackClients')
+    def test_prewarm_network_parameters(self, mock_clients, mock_registry,
+                                        mock_ks, mock_get_params):
+        assemblies = [mock.MagicMock(project_id='p1', trust_id='t1'),
+                      mock.MagicMock(project_id='p1', trust_id='t2'),
+                      mock.MagicMock(project_id='p2', trust_id=None)]
+        mock_registry.AssemblyList.get_all.return_value = assemblies
+        handler = heat_handler.Handler()
+        handler._prewarm_network_parameters()
+        self.assertEqual(1, mock_ks.call_count)
+        mock_get_params.assert_called_once_with(mock_clients.return_value)
+
+    @mock.patch('solum.objects.registry')
+    def test_stack_settled_timeout(self, mock_registry):
+        handler = heat_handler.Handler()
+        fake_assembly = fakes.FakeAssembly()
+        mock_registry.Assembly.get_by_id.return_value = fake_assembly
+        handler._on_stack_settled(self.ctx, 8, 'fp', 'TIMEOUT', None)
+        self.assertEqual(STATES.ERROR_STACK_CREATE_FAILED,
+                         fake_assembly.status)
+        fake_assembly.save.assert_called_once_with(self.ctx)
+
     def test_parse_server_url(self):
         handler = heat_handler.Handler()
         heat_output = mock.MagicMock()
@@ -198,19 +286,20 @@ class HandlerTest(base.BaseTestCase):
         fake_assem = fakes.FakeAssembly()
         mock_registry.Assembly.get_by_id.return_value = fake_assem
 
-        handler = heat_handler.Handler()
+        stacks = mock_client.return_value.heat.return_value.stacks
+        stacks.list.return_value = []
 
+        cfg.CONF.set_override('max_attempts', 1, group='deployer')
+        cfg.CONF.set_override('wait_interval', 0, group='deployer')
+        handler = heat_handler.Handler()
         handler._find_id_if_stack_exists = mock.MagicMock(return_value='42')
-        handler._get_stack_id_from_heat = mock.MagicMock(return_value=None)
-
-        cfg.CONF.deployer.max_attempts = 1
-        cfg.CONF.deployer.wait_interval = 0
-        cfg.CONF.deployer.growth_factor = 1.2
 
         handler.destroy(self.ctx, fake_assem.id)
+        handler._watcher.wait()
 
-        mock_client.heat.stacks.delete.assert_called_once()
-        fake_assem.destroy.assert_called_once()
+        stacks.delete.assert_called_once_with('42')
+        stacks.list.assert_called_once_with(filters={'id': ['42']})
+        fake_assem.destroy.assert_called_once_with(self.ctx)
 
     @mock.patch('solum.objects.registry')
     @mock.patch('solum.common.clients.OpenStackClients')
@@ -218,16 +307,21 @@ class HandlerTest(base.BaseTestCase):
         fake_assem = fakes.FakeAssembly()
         mock_registry.Assembly.get_by_id.return_value = fake_assem
 
+        stack = mock.MagicMock(id='42', stack_status='DELETE_IN_PROGRESS',
+                               status='IN_PROGRESS')
+        stacks = mock_client.return_value.heat.return_value.stacks
+        stacks.list.return_value = [stack]
+
+        cfg.CONF.set_override('max_attempts', 1, group='deployer')
+        cfg.CONF.set_override('wait_interval', 0, group='deployer')
         handler = heat_handler.Handler()
         handler._find_id_if_stack_exists = mock.MagicMock(return_value='42')
 
-        cfg.CONF.deployer.max_attempts = 1
-        cfg.CONF.deployer.wait_interval = 0
-        cfg.CONF.deployer.growth_factor = 1.2
-
         handler.destroy(self.ctx, fake_assem.id)
+        handler._watcher.wait()
 
-        mock_client.heat.stacks.delete.assert_called_once()
+        stacks.delete.assert_called_once_with('42')
+        self.assertFalse(fake_assem.destroy.called)
         fake_assem.save.assert_called_once_with(self.ctx)
         self.assertEqual(STATES.ERROR_STACK_DELETE_FAILED, fake_assem.status)
 
@@ -241,5 +335,6 @@ class HandlerTest(base.BaseTestCase):
         handler._find_id_if_stack_exists = mock.MagicMock(return_value=None)
         handler.destroy(self.ctx, fake_assem.id)
 
-        assert not mock_client.heat.stacks.delete.called
-        fake_assem.destroy.assert_called_once()
+        stacks = mock_client.return_value.heat.return_value.stacks
+        self.assertFalse(stacks.delete.called)
+        fake_assem.destroy.assert_called_once_with(self.ctx)
@@ -0,0 +1,215 @@
+# Copyright 2014 - Rackspace Hosting
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from solum.deployer import watcher
+from solum.tests import base
+from solum.tests import utils
+
+
+def fake_stack(stack_id, stack_status):
+    return mock.MagicMock(id=stack_id, stack_status=stack_status,
+                          status=stack_status.split('_', 1)[1])
+
+
+@mock.patch('solum.common.clients.OpenStackClients')
+class StackWatcherTest(base.BaseTestCase):
+    def setUp(self):
+        super(StackWatcherTest, self).setUp()
+        self.ctx = utils.dummy_context()
+
+    def test_one_listing_per_tenant(self, mock_clients):
+        def list_stacks(filters):
+            return [fake_stack(i, 'CREATE_FAILED') for i in filters['id']]
+
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.side_effect = list_stacks
+        other = utils.dummy_context(tenant_id='other_tenant')
+        callback = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch(self.ctx, 'a', callback)
+        stack_watcher.watch(self.ctx, 'b', callback)
+        stack_watcher.watch(other, 'c', callback)
+        stack_watcher.wait()
+
+        listed = sorted(sorted(c[1]['filters']['id'])
+                        for c in stacks.list.call_args_list)
+        self.assertEqual([['a', 'b'], ['c']], listed)
+        self.assertEqual([mock.call(watcher.FAILED, mock.ANY)] * 3,
+                         callback.call_args_list)
+        self.assertEqual(0, len(stack_watcher))
+
+    def test_complete_stack_is_fetched_with_outputs(self, mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.side_effect = [[fake_stack('a', 'CREATE_IN_PROGRESS')],
+                                   [fake_stack('a', 'CREATE_COMPLETE')]]
+        callback = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch(self.ctx, 'a', callback)
+        stack_watcher.wait()
+
+        stacks.get.assert_called_once_with('a')
+        callback.assert_called_once_with(watcher.COMPLETE,
+                                         stacks.get.return_value)
+
+    def test_callback_keeps_watching(self, mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.return_value = [fake_stack('a', 'CREATE_COMPLETE')]
+        callback = mock.MagicMock(side_effect=[False, None])
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch(self.ctx, 'a', callback)
+        stack_watcher.wait()
+
+        self.assertEqual(2, stacks.list.call_count)
+        self.assertEqual(2, callback.call_count)
+
+    def test_deleted_stack(self, mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.side_effect = [[fake_stack('a', 'DELETE_IN_PROGRESS')],
+                                   []]
+        callback = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch_delete(self.ctx, 'a', callback)
+        stack_watcher.wait()
+
+        callback.assert_called_once_with(watcher.DELETED, None)
+
+    def test_failed_delete(self, mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.return_value = [fake_stack('a', 'DELETE_FAILED')]
+        callback = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch_delete(self.ctx, 'a', callback)
+        stack_watcher.wait()
+
+        callback.assert_called_once_with(watcher.FAILED, mock.ANY)
+
+    def test_delete_of_failed_stack(self, mock_clients):
+        # A stack that failed to update may still be deleted.
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.side_effect = [[fake_stack('a', 'UPDATE_FAILED')], []]
+        callback = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch_delete(self.ctx, 'a', callback)
+        stack_watcher.wait()
+
+        callback.assert_called_once_with(watcher.DELETED, None)
+
+    def test_clients_are_kept_between_rounds(self, mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.side_effect = [[fake_stack('a', 'CREATE_IN_PROGRESS')],
+                                   [fake_stack('a', 'CREATE_IN_PROGRESS')],
+                                   [fake_stack('a', 'CREATE_COMPLETE')]]
+        callback = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch(self.ctx, 'a', callback)
+        stack_watcher.wait()
+
+        self.assertEqual(3, stacks.list.call_count)
+        self.assertEqual(1, mock_clients.call_count)
+        self.assertEqual({}, stack_watcher._clients)
+
+    @mock.patch('solum.deployer.watcher.LOG')
+    def test_clients_are_rebuilt_after_failed_listing(self, mock_log,
+                                                      mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.side_effect = [Exception('token expired'),
+                                   [fake_stack('a', 'CREATE_IN_PROGRESS')],
+                                   [fake_stack('a', 'CREATE_COMPLETE')]]
+        callback = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch(self.ctx, 'a', callback)
+        stack_watcher.wait()
+
+        self.assertEqual(2, mock_clients.call_count)
+        callback.assert_called_once_with(watcher.COMPLETE, mock.ANY)
+
+    @mock.patch('solum.deployer.watcher.LOG')
+    def test_timeout_with_backoff(self, mock_log, mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.side_effect = Exception('heat is down')
+        callback = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0.001, 2, 3)
+        stack_watcher.watch(self.ctx, 'a', callback)
+        stack_watcher.wait()
+
+        self.assertEqual(3, stacks.list.call_count)
+        callback.assert_called_once_with(watcher.TIMEOUT, None)
+
+    @mock.patch('solum.deployer.watcher.LOG')
+    def test_failed_get_is_retried(self, mock_log, mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.side_effect = [
+            [fake_stack('a', 'CREATE_COMPLETE'),
+             fake_stack('b', 'CREATE_IN_PROGRESS')],
+            [fake_stack('a', 'CREATE_COMPLETE'),
+             fake_stack('b', 'CREATE_IN_PROGRESS')],
+            [fake_stack('b', 'CREATE_COMPLETE')]]
+        stacks.get.side_effect = [Exception('heat is down'), 'stack_a',
+                                  'stack_b']
+        callback_a = mock.MagicMock()
+        callback_b = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch(self.ctx, 'a', callback_a)
+        stack_watcher.watch(self.ctx, 'b', callback_b)
+        stack_watcher.wait()
+
+        callback_a.assert_called_once_with(watcher.COMPLETE, 'stack_a')
+        callback_b.assert_called_once_with(watcher.COMPLETE, 'stack_b')
+        self.assertEqual(0, len(stack_watcher))
+
+    @mock.patch('solum.deployer.watcher.LOG')
+    def test_failed_clients_are_retried(self, mock_log, mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.return_value = [fake_stack('a', 'CREATE_FAILED')]
+        mock_clients.side_effect = [Exception('no catalog'),
+                                    mock_clients.return_value]
+        callback = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 5)
+        stack_watcher.watch(self.ctx, 'a', callback)
+        stack_watcher.wait()
+
+        callback.assert_called_once_with(watcher.FAILED, mock.ANY)
+
+    @mock.patch('solum.deployer.watcher.LOG')
+    def test_failed_timeout_callback(self, mock_log, mock_clients):
+        stacks = mock_clients.return_value.heat.return_value.stacks
+        stacks.list.return_value = [fake_stack('a', 'CREATE_COMPLETE'),
+                                    fake_stack('b', 'CREATE_FAILED')]
+        callback_a = mock.MagicMock(side_effect=[False, Exception('boom')])
+        callback_b = mock.MagicMock()
+
+        stack_watcher = watcher.StackWatcher(0, 1, 1)
+        stack_watcher.watch(self.ctx, 'a', callback_a)
+        stack_watcher.watch(self.ctx, 'b', callback_b)
+        stack_watcher.wait()
+
+        self.assertEqual([mock.call(watcher.COMPLETE, mock.ANY),
+                          mock.call(watcher.TIMEOUT, None)],
+                         callback_a.call_args_list)
+        callback_b.assert_called_once_with(watcher.FAILED, mock.ANY)
+        self.assertEqual(1, mock_log.exception.call_count)
+        self.assertEqual(0, len(stack_watcher))
@@ -39,6 +39,7 @@ class FakePecanRequest(mock.Mock):
         self.body = ''
         self.content_type = 'text/unicode'
         self.params = {}
+        self.GET = {}
         self.path = '/v1/services'
         self.headers = fakeAuthTokenHeaders
         self.environ = {}
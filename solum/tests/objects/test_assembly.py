@@ -14,7 +14,10 @@
 
 import uuid
 
+import sqlalchemy
+
 from solum.common import exception
+from solum import objects
 from solum.objects import registry
 from solum.objects.sqlalchemy import assembly
 from solum.tests import base
@@ -27,7 +30,7 @@ class TestAssembly(base.BaseTestCase):
         self.db = self.useFixture(utils.Database())
         self.ctx = utils.dummy_context()
 
-        self.data = [{'project_id': 'project_id_blah',
+        self.data = [{'project_id': 'test_tenant_id',
                       'uuid': 'ce43e347f0b0422825245b3e5f140a81cef6e65b',
                       'user_id': 'fred',
                       'name': 'assembly1',
@@ -47,11 +50,95 @@ class TestAssembly(base.BaseTestCase):
         lst = assembly.AssemblyList()
         self.assertEqual(1, len(lst.get_all(self.ctx)))
 
+    def test_get_all_by_plan_uuid(self):
+        pl = registry.Plan()
+        pl.uuid = str(uuid.uuid4())
+        pl.create(self.ctx)
+        utils.create_models_from_data(
+            assembly.Assembly, [{'uuid': str(uuid.uuid4()), 'plan_id': pl.id,
+                                 'project_id': self.ctx.tenant,
+                                 'status': 'READY'}], self.ctx)
+        lst = assembly.AssemblyList.get_all(
+            self.ctx, filters={'plan_uuid': pl.uuid, 'status': 'READY'})
+        self.assertEqual([pl.id], [assem.plan_id for assem in lst])
+        self.assertEqual([pl.uuid], [assem.plan_uuid for assem in lst])
+
+    def test_get_all_reads_only_plan_uuid(self):
+        pl = registry.Plan()
+        pl.uuid = str(uuid.uuid4())
+        pl.raw_content = {'artifacts': []}
+        pl.create(self.ctx)
+        utils.create_models_from_data(
+            assembly.Assembly, [{'uuid': str(uuid.uuid4()), 'plan_id': pl.id,
+                                 'project_id': self.ctx.tenant}], self.ctx)
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            # leave out the ping of connections taken from the pool
+            if statement != 'SELECT 1':
+                statements.append(statement)
+
+        engine = objects.IMPL.get_engine()
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', count)
+        self.addCleanup(sqlalchemy.event.remove, engine,
+                        'before_cursor_execute', count)
+        assems = [assem.as_dict()
+                  for assem in assembly.AssemblyList.get_all(self.ctx)]
+        self.assertEqual(1, len(statements))
+        self.assertNotIn('raw_content', statements[0])
+        self.assertEqual([pl.uuid], [assem['plan_uuid'] for assem in assems])
+
+    def test_plan_uuid_after_repointing(self):
+        first = registry.Plan()
+        first.uuid = str(uuid.uuid4())
+        first.create(self.ctx)
+        second = registry.Plan()
+        second.uuid = str(uuid.uuid4())
+        second.create(self.ctx)
+        utils.create_models_from_data(
+            assembly.Assembly, [{'uuid': 'repointed', 'plan_id': first.id,
+                                 'project_id': self.ctx.tenant}], self.ctx)
+        assem = assembly.Assembly.get_by_uuid(self.ctx, 'repointed')
+        self.assertEqual(first.uuid, assem.plan_uuid)
+        assem.plan_uuid = second.uuid
+        self.assertEqual(second.uuid, assem.plan_uuid)
+        assem.save(self.ctx)
+        self.assertEqual(second.uuid, assem.plan_uuid)
+
+    def test_project_scoped(self):
+        other = utils.dummy_context(tenant_id='other_tenant')
+        self.assertEqual(0, len(assembly.AssemblyList.get_all(other)))
+        self.assertRaises(exception.ResourceNotFound,
+                          assembly.Assembly.get_by_uuid,
+                          other, self.data[0]['uuid'])
+
+        admin = utils.dummy_context(tenant_id='other_tenant')
+        admin.is_admin = True
+        self.assertEqual(0, len(assembly.AssemblyList.get_all(admin)))
+
+        admin.all_tenants = True
+        self.assertEqual(1, len(assembly.AssemblyList.get_all(admin)))
+        self.assertEqual(self.data[0]['id'], assembly.Assembly.get_by_uuid(
+            admin, self.data[0]['uuid']).id)
+
     def test_check_data(self):
         ta = assembly.Assembly().get_by_id(self.ctx, self.data[0]['id'])
         for key, value in self.data[0].items():
             self.assertEqual(value, getattr(ta, key))
 
+    def test_update_status(self):
+        assembly.Assembly.update_status(self.ctx, self.data[0]['id'],
+                                        'BUILDING')
+        ta = assembly.Assembly().get_by_id(self.ctx, self.data[0]['id'])
+        self.assertEqual('BUILDING', ta.status)
+
+    def test_update_status_keeps_states(self):
+        assembly.Assembly.update_status(self.ctx, self.data[0]['id'],
+                                        'UNIT_TESTING',
+                                        keep_states=('BUILDING',))
+        ta = assembly.Assembly().get_by_id(self.ctx, self.data[0]['id'])
+        self.assertEqual('BUILDING', ta.status)
+
     def test_check_data_by_trigger_id(self):
         ta = assembly.Assembly().get_by_trigger_id(self.ctx, self.data[0][
             'trigger_id'])
@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sqlalchemy
+
 from solum.common import exception
+from solum import objects
 from solum.objects import registry
 from solum.objects.sqlalchemy import assembly
 from solum.objects.sqlalchemy import component
@@ -26,7 +29,7 @@ class TestComponent(base.BaseTestCase):
         self.db = self.useFixture(utils.Database())
         self.ctx = utils.dummy_context()
         self.data_assembly = [
-            {'project_id': 'project_id_blah',
+            {'project_id': 'test_tenant_id',
              'uuid': 'ce43e347f0b0422825245b3e5f140a81cef6e65b',
              'user_id': 'fred',
              'name': 'assembly1',
@@ -39,7 +42,7 @@ class TestComponent(base.BaseTestCase):
         utils.create_models_from_data(assembly.Assembly, self.data_assembly,
                                       self.ctx)
 
-        self.data = [{'project_id': 'project_id_blah',
+        self.data = [{'project_id': 'test_tenant_id',
                       'user_id': 'fred',
                       'uuid': 'ce43e347f0b0422825245b3e5f140a81cef6e65b',
                       'name': 'component_no_assembly',
@@ -48,7 +51,7 @@ class TestComponent(base.BaseTestCase):
                       'parent_component_id': '87d98s',
                       'tags': 'component tags',
                       'heat_stack_id': '4c712026-dcd5-4664-90b8-0915494c1332'},
-                     {'project_id': 'project_id_dep',
+                     {'project_id': 'test_tenant_id',
                       'user_id': 'fred',
                       'uuid': '70763488-72e0-44ac-a612-e94bf5488555',
                       'name': 'component_assembly',
@@ -85,3 +88,21 @@ class TestComponent(base.BaseTestCase):
     def test_assembly_extra_key_not_found(self):
         self.assertRaises(exception.ResourceNotFound, setattr,
                           component.Component(), 'assembly_uuid', '42d')
+
+    def test_get_all_as_dict_in_one_query(self):
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            # leave out the ping of connections taken from the pool
+            if statement != 'SELECT 1':
+                statements.append(statement)
+
+        engine = objects.IMPL.get_engine()
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', count)
+        self.addCleanup(sqlalchemy.event.remove, engine,
+                        'before_cursor_execute', count)
+        comps = [comp.as_dict()
+                 for comp in component.ComponentList.get_all(self.ctx)]
+        self.assertEqual(1, len(statements))
+        self.assertEqual([None, self.data_assembly[0]['uuid']],
+                         [comp['assembly_uuid'] for comp in comps])
@@ -12,9 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+
+from solum.common import exception
 from solum import objects
 from solum.objects import registry
+from solum.objects.sqlalchemy import assembly
+from solum.objects.sqlalchemy import component
 from solum.objects.sqlalchemy import image
+from solum.objects.sqlalchemy import plan
+from solum.openstack.common import timeutils
 from solum.tests import base
 from solum.tests import utils
 
@@ -24,7 +31,7 @@ class TestImage(base.BaseTestCase):
         super(TestImage, self).setUp()
         self.db = self.useFixture(utils.Database())
         self.ctx = utils.dummy_context()
-        self.data = [{'project_id': 'test_id',
+        self.data = [{'project_id': 'test_tenant_id',
                       'user_id': 'fred',
                       'uuid': '12345678abcdefgh',
                       'name': 'image1',
@@ -44,6 +51,123 @@ class TestImage(base.BaseTestCase):
         for key, value in self.data[0].items():
             self.assertEqual(value, getattr(test_srvc, key))
 
+    def test_get_in_progress(self):
+        data = [{'uuid': 'building', 'name': 'app', 'assembly_id': 1,
+                 'commit_sha': 'abc', 'state': 'BUILDING'},
+                {'uuid': 'complete', 'name': 'app', 'assembly_id': 1,
+                 'commit_sha': 'def', 'state': 'COMPLETE'}]
+        utils.create_models_from_data(image.Image, data, self.ctx)
+        found = image.Image.get_in_progress(self.ctx, 1, 'app', 'abc', 60)
+        self.assertEqual('building', found.uuid)
+        self.assertIsNone(
+            image.Image.get_in_progress(self.ctx, 1, 'app', 'def', 60))
+        self.assertIsNone(
+            image.Image.get_in_progress(self.ctx, 2, 'app', 'abc', 60))
+
+    def test_get_in_progress_ignores_old_builds(self):
+        data = [{'uuid': 'stale', 'name': 'app', 'assembly_id': 1,
+                 'commit_sha': 'abc', 'state': 'PENDING',
+                 'created_at': timeutils.utcnow() -
+                 datetime.timedelta(hours=2)}]
+        utils.create_models_from_data(image.Image, data, self.ctx)
+        self.assertIsNone(
+            image.Image.get_in_progress(self.ctx, 1, 'app', 'abc', 3600))
+
+    def test_create_unless_in_progress(self):
+        assem = {'uuid': 'a', 'name': 'app', 'plan_id': 1,
+                 'project_id': 'test_tenant_id'}
+        utils.create_models_from_data(assembly.Assembly, [assem], self.ctx)
+        first, second = [image.Image(uuid=str(n), name='app',
+                                     assembly_id=assem['id'],
+                                     commit_sha='abc', state='PENDING',
+                                     project_id='test_tenant_id')
+                         for n in range(2)]
+        self.assertIsNone(first.create_unless_in_progress(self.ctx, 60))
+        in_progress = second.create_unless_in_progress(self.ctx, 60)
+        self.assertEqual('0', in_progress.uuid)
+        self.assertIsNone(image.Image.get_in_progress(
+            self.ctx, assem['id'], 'app', 'def', 60))
+        self.assertEqual(2, len(image.ImageList.get_all(self.ctx)))
+
+    def test_update_build(self):
+        build_id = self.data[0]['id']
+        image.Image.update_build(self.ctx, build_id,
+                                 {'state': 'COMPLETE',
+                                  'stage_timings': {'build': 1.5}})
+        img = image.Image.get_by_id(self.ctx, build_id)
+        self.assertEqual('COMPLETE', img.state)
+        self.assertEqual({'build': 1.5}, img.stage_timings)
+        self.assertEqual('test image', img.description)
+        self.assertIsNotNone(img.updated_at)
+
+    def test_update_build_keeps_final_state(self):
+        build_id = self.data[0]['id']
+        image.Image.update_build(self.ctx, build_id, {'state': 'ERROR'})
+        image.Image.update_build(self.ctx, build_id,
+                                 {'state': 'BUILDING',
+                                  'description': 'late'})
+        img = image.Image.get_by_id(self.ctx, build_id)
+        self.assertEqual('ERROR', img.state)
+        self.assertEqual('test image', img.description)
+
+    def test_update_build_not_found(self):
+        self.assertRaises(exception.ResourceNotFound,
+                          image.Image.update_build, self.ctx, 4242,
+                          {'state': 'COMPLETE'})
+
+    def _create_assembly(self):
+        plans = [{'uuid': 'plan', 'name': 'app'}]
+        utils.create_models_from_data(plan.Plan, plans, self.ctx)
+        assems = [{'uuid': 'assem', 'name': 'app',
+                   'plan_id': plans[0]['id']}]
+        utils.create_models_from_data(assembly.Assembly, assems, self.ctx)
+        assem_id = assems[0]['id']
+        comps = [{'uuid': 'stack', 'assembly_id': assem_id,
+                  'component_type': 'heat_stack', 'heat_stack_id': 'sid'}]
+        utils.create_models_from_data(component.Component, comps, self.ctx)
+        return assem_id
+
+    def _image_builds(self):
+        return [c for c in component.ComponentList.get_all(self.ctx)
+                if c.component_type == 'Image_Build']
+
+    def test_update_build_adds_component_once(self):
+        assem_id = self._create_assembly()
+        build_id = self.data[0]['id']
+        image.Image.update_build(self.ctx, build_id,
+                                 {'state': 'BUILDING'}, assem_id)
+        image.Image.update_build(self.ctx, build_id,
+                                 {'state': 'COMPLETE',
+                                  'created_image_id': 'glance-id'}, assem_id)
+
+        builds = self._image_builds()
+        self.assertEqual(1, len(builds))
+        self.assertEqual('Heat_Stack_for_app', builds[0].name)
+        self.assertEqual(assem_id, builds[0].assembly_id)
+        self.assertEqual('sid', builds[0].heat_stack_id)
+        self.assertEqual(self.ctx.tenant, builds[0].project_id)
+        self.assertEqual('glance-id', builds[0].resource_uri)
+
+    def test_update_build_follows_created_image(self):
+        assem_id = self._create_assembly()
+        data = [{'uuid': 'rebuild', 'name': 'app', 'assembly_id': assem_id,
+                 'state': 'PENDING'}]
+        utils.create_models_from_data(image.Image, data, self.ctx)
+
+        image.Image.update_build(self.ctx, self.data[0]['id'],
+                                 {'state': 'COMPLETE',
+                                  'created_image_id': 'first'}, assem_id)
+        image.Image.update_build(self.ctx, data[0]['id'],
+                                 {'state': 'BUILDING'}, assem_id)
+        self.assertEqual('first', self._image_builds()[0].resource_uri)
+
+        image.Image.update_build(self.ctx, data[0]['id'],
+                                 {'state': 'COMPLETE',
+                                  'created_image_id': 'second'}, assem_id)
+        builds = self._image_builds()
+        self.assertEqual(1, len(builds))
+        self.assertEqual('second', builds[0].resource_uri)
+
 
 class TestStates(base.BaseTestCase):
     def test_as_dict(self):
@@ -0,0 +1,112 @@
+# Copyright 2014 - Rackspace Hosting
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ast
+import glob
+import os
+
+from solum import objects
+from solum.objects import sqlalchemy as object_sqla
+from solum.objects.sqlalchemy import models
+from solum.tests import base
+
+
+def _column(node):
+    """Return the column of a `cls.column` or `module.Model.column` node."""
+    if not isinstance(node, ast.Attribute):
+        return None
+    owner = node.value
+    if isinstance(owner, ast.Name) and owner.id in ('cls', 'self'):
+        return node.attr
+    if isinstance(owner, ast.Attribute) and isinstance(owner.value,
+                                                       ast.Name):
+        return node.attr
+    return None
+
+
+def _filtered_columns(call):
+    """Return the columns a filter() or filter_by() call looks rows up by."""
+    if call.func.attr == 'filter_by':
+        return set(keyword.arg for keyword in call.keywords)
+    columns = set()
+    for arg in call.args:
+        if isinstance(arg, ast.Compare):
+            columns.add(_column(arg.left))
+        elif (isinstance(arg, ast.Call) and
+                isinstance(arg.func, ast.Attribute)):
+            # cls.column.in_(...) and the like
+            columns.add(_column(arg.func.value))
+    columns.discard(None)
+    return columns
+
+
+def find_lookups():
+    """Yield (location, columns) of the lookups of the sqlalchemy objects.
+
+    Generic helpers such as model_query and collection_query filter on
+    columns through a variable model; they are left out, and their
+    columns are indexed table by table.
+    """
+    root = os.path.dirname(object_sqla.__file__)
+    for path in sorted(glob.glob(os.path.join(root, '*.py'))):
+        with open(path) as source:
+            tree = ast.parse(source.read(), path)
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Call) and
+                    isinstance(node.func, ast.Attribute) and
+                    node.func.attr in ('filter', 'filter_by')):
+                columns = _filtered_columns(node)
+                if columns:
+                    location = '%s:%d' % (os.path.basename(path),
+                                          node.lineno)
+                    yield location, columns
+
+
+def leading_columns(table):
+    """Return the columns an index (or the primary key) of table leads with."""
+    leading = set(column.name for column in
+                  list(table.primary_key.columns)[:1])
+    for index in table.indexes:
+        leading.add(list(index.columns)[0].name)
+    return leading
+
+
+class TestLookupIndexes(base.BaseTestCase):
+    """Every lookup of the sqlalchemy objects must be able to use an index.
+
+    A lookup on columns a, b and c passes when, in every table with all of
+    those columns, an index or the primary key starts with one of them.
+    Lookups on optional columns pass while no table has them.
+    """
+
+    def setUp(self):
+        super(TestLookupIndexes, self).setUp()
+        objects.load()
+
+    def test_lookups_found(self):
+        lookups = [columns for _, columns in find_lookups()]
+        self.assertIn(set(['trigger_id']), lookups)
+        self.assertIn(set(['pipeline_id']), lookups)
+
+    def test_lookups_indexed(self):
+        tables = models.Base.metadata.tables.values()
+        unindexed = []
+        for location, columns in find_lookups():
+            matching = [table for table in tables
+                        if columns <= set(table.columns.keys())]
+            for table in matching:
+                if not columns & leading_columns(table):
+                    unindexed.append('%s: %s(%s)' % (
+                        location, table.name, ', '.join(sorted(columns))))
+        self.assertEqual([], unindexed)
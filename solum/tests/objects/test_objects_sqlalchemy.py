@@ -22,6 +22,7 @@ Tests for the sqlalchemy solum 'objects' implementation
 import datetime
 import uuid
 
+import sqlalchemy
 import testtools
 from testtools import matchers
 
@@ -115,3 +116,93 @@ class TestObjectsSqlalchemy(tests.BaseTestCase):
         component.save(self.ctx)
 
         self.assertThat(next_time, matchers.GreaterThan(component.created_at))
+
+
+class TestSave(tests.BaseTestCase):
+    def setUp(self):
+        super(TestSave, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.useFixture(utils.Database())
+        self.plan = objects.registry.Plan()
+        self.plan.uuid = str(uuid.uuid4())
+        self.plan.project_id = self.ctx.tenant
+        self.plan.name = 'before'
+        self.plan.description = 'before'
+        self.plan.create(self.ctx)
+
+    def _statements(self):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            # leave out pings and transaction statements
+            if statement.split()[0] in ('SELECT', 'INSERT', 'UPDATE',
+                                        'DELETE') and statement != 'SELECT 1':
+                statements.append(statement)
+
+        engine = objects.IMPL.get_engine()
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', record)
+        self.addCleanup(sqlalchemy.event.remove, engine,
+                        'before_cursor_execute', record)
+        return statements
+
+    def test_save_updates_changed_columns(self):
+        pl = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        statements = self._statements()
+        pl.name = 'after'
+        pl.save(self.ctx)
+        self.assertEqual(1, len(statements))
+        self.assertTrue(statements[0].startswith('UPDATE "plan" SET'))
+        self.assertIn('name=?', statements[0])
+        self.assertNotIn('description', statements[0])
+
+        # Nothing is left to write.
+        pl.save(self.ctx)
+        self.assertEqual(1, len(statements))
+
+    def test_save_keeps_concurrent_changes(self):
+        first = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        second = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        first.name = 'after'
+        first.save(self.ctx)
+        second.description = 'after'
+        second.save(self.ctx)
+
+        pl = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        self.assertEqual(('after', 'after'), (pl.name, pl.description))
+
+    def test_save_dict_changed_in_place(self):
+        pl = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        pl.raw_content = {'name': 'before'}
+        pl.save(self.ctx)
+        pl.raw_content['name'] = 'after'
+        pl.save(self.ctx)
+
+        pl = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        self.assertEqual({'name': 'after'}, pl.raw_content)
+
+    def test_save_unchanged_dict(self):
+        pl = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        pl.raw_content = {'name': 'before'}
+        pl.save(self.ctx)
+
+        statements = self._statements()
+        pl.save(self.ctx)
+        pl = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        pl.raw_content = {'name': 'before'}
+        pl.save(self.ctx)
+        self.assertEqual([], [s for s in statements
+                              if not s.startswith('SELECT')])
+
+    def test_save_sets_updated_at(self):
+        pl = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        pl.name = 'after'
+        pl.save(self.ctx)
+        self.assertIsNotNone(pl.updated_at)
+        self.assertEqual(pl.updated_at, objects.registry.Plan.get_by_id(
+            self.ctx, self.plan.id).updated_at)
+
+    def test_save_deleted_row(self):
+        pl = objects.registry.Plan.get_by_id(self.ctx, self.plan.id)
+        pl.destroy(self.ctx)
+        pl.name = 'after'
+        self.assertRaises(exception.ResourceNotFound, pl.save, self.ctx)
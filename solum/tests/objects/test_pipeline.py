@@ -25,7 +25,7 @@ class TestPipeline(base.BaseTestCase):
         self.db = self.useFixture(utils.Database())
         self.ctx = utils.dummy_context()
 
-        self.data = [{'project_id': 'project_id_blah',
+        self.data = [{'project_id': 'test_tenant_id',
                       'uuid': 'ce43e347f0b0422825245b3e5f140a81cef6e65b',
                       'user_id': 'fred',
                       'name': 'pipeline1',
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from solum.common import exception
 from solum.objects import registry
 from solum.objects.sqlalchemy import plan
 from solum.tests import base
@@ -27,7 +28,7 @@ class TestPlan(base.BaseTestCase):
             {'content':
              {'href': 'http://github.com/some/project'}}]}
         self.data = [{'uuid': 'test-uuid-123',
-                      'project_id': 'bla',
+                      'project_id': 'test_tenant_id',
                       'user_id': 'fred',
                       'description': 'some description',
                       'raw_content': raw_content}]
@@ -50,3 +51,62 @@ class TestPlan(base.BaseTestCase):
         pl = plan.Plan().get_by_uuid(self.ctx, self.data[0]['uuid'])
         for key, value in self.data[0].items():
             self.assertEqual(value, getattr(pl, key))
+
+
+class TestPlanList(base.BaseTestCase):
+    def setUp(self):
+        super(TestPlanList, self).setUp()
+        self.db = self.useFixture(utils.Database())
+        self.ctx = utils.dummy_context()
+        self.data = [{'uuid': 'plan-uuid-%d' % i,
+                      'project_id': 'test_tenant_id',
+                      'user_id': 'fred',
+                      'name': 'plan%d' % (i % 2)} for i in range(5)]
+        utils.create_models_from_data(plan.Plan, self.data, self.ctx)
+
+    def _uuids(self, plans):
+        return [pl.uuid for pl in plans]
+
+    def test_pages(self):
+        first = plan.PlanList.get_all(self.ctx, limit=2)
+        self.assertEqual(['plan-uuid-0', 'plan-uuid-1'], self._uuids(first))
+        second = plan.PlanList.get_all(self.ctx, limit=2,
+                                       marker=first[-1].uuid)
+        self.assertEqual(['plan-uuid-2', 'plan-uuid-3'], self._uuids(second))
+        last = plan.PlanList.get_all(self.ctx, limit=2,
+                                     marker=second[-1].uuid)
+        self.assertEqual(['plan-uuid-4'], self._uuids(last))
+
+    def test_sort(self):
+        plans = plan.PlanList.get_all(self.ctx, sort_key='name',
+                                      sort_dir='desc')
+        self.assertEqual(['plan-uuid-3', 'plan-uuid-1', 'plan-uuid-4',
+                          'plan-uuid-2', 'plan-uuid-0'], self._uuids(plans))
+
+    def test_sorted_pages(self):
+        first = plan.PlanList.get_all(self.ctx, limit=2, sort_key='name')
+        second = plan.PlanList.get_all(self.ctx, limit=2, sort_key='name',
+                                       marker=first[-1].uuid)
+        self.assertEqual(['plan-uuid-0', 'plan-uuid-2'], self._uuids(first))
+        self.assertEqual(['plan-uuid-4', 'plan-uuid-1'], self._uuids(second))
+
+    def test_filters(self):
+        plans = plan.PlanList.get_all(self.ctx, filters={'name': 'plan1'})
+        self.assertEqual(['plan-uuid-1', 'plan-uuid-3'], self._uuids(plans))
+
+    def test_created_range(self):
+        created = plan.Plan.get_by_uuid(self.ctx, 'plan-uuid-0').created_at
+        self.assertEqual(5, len(plan.PlanList.get_all(
+            self.ctx, filters={'created_after': created})))
+        self.assertEqual(0, len(plan.PlanList.get_all(
+            self.ctx, filters={'created_before': created})))
+
+    def test_invalid_query(self):
+        self.assertRaises(exception.BadRequest, plan.PlanList.get_all,
+                          self.ctx, sort_key='raw_contents')
+        self.assertRaises(exception.BadRequest, plan.PlanList.get_all,
+                          self.ctx, sort_dir='up')
+        self.assertRaises(exception.BadRequest, plan.PlanList.get_all,
+                          self.ctx, filters={'plan_uuid': 'plan-uuid-0'})
+        self.assertRaises(exception.ResourceNotFound, plan.PlanList.get_all,
+                          self.ctx, marker='no-such-plan')
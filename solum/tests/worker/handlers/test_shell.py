@@ -14,9 +14,14 @@
 
 import json
 import os.path
+import signal
 import uuid
 
+import eventlet
+from glanceclient import exc as glance_exc
 import mock
+from oslo.config import cfg
+import six
 
 from solum.openstack.common.gettextutils import _
 from solum.tests import base
@@ -76,25 +81,28 @@ class HandlerTest(base.BaseTestCase):
     def setUp(self):
         super(HandlerTest, self).setUp()
         self.ctx = utils.dummy_context()
+        # Send each build update as it is made, to check them in order.
+        cfg.CONF.set_override('job_update_batch_size', 1, group='worker')
 
     @mock.patch('solum.worker.handlers.shell.LOG')
     def test_echo(self, fake_LOG):
         shell_handler.Handler().echo({}, 'foo')
         fake_LOG.debug.assert_called_once_with(_('%s') % 'foo')
 
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
     @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
     @mock.patch('solum.objects.registry')
     @mock.patch('solum.conductor.api.API.build_job_update')
     @mock.patch('solum.deployer.api.API.deploy')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('eventlet.green.subprocess.Popen')
     def test_build(self, mock_popen, mock_deploy, mock_b_update, mock_registry,
-                   mock_get_env):
+                   mock_get_env, mock_a_update):
         handler = shell_handler.Handler()
         fake_assembly = fakes.FakeAssembly()
         fake_glance_id = str(uuid.uuid4())
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
-        mock_popen.return_value.communicate.return_value = [
-            'foo\ncreated_image_id=%s' % fake_glance_id, None]
+        mock_popen.return_value.stdout = six.StringIO(
+            'foo\ncreated_image_id=%s' % fake_glance_id)
         test_env = mock_environment()
         mock_get_env.return_value = test_env
         git_info = mock_git_info()
@@ -109,35 +117,38 @@ class HandlerTest(base.BaseTestCase):
         script = os.path.join(proj_dir, 'contrib/lp-cedarish/docker/build-app')
         mock_popen.assert_called_once_with([script, 'git://example.com/foo',
                                             'new_app', self.ctx.tenant,
-                                            '1-2-3-4', ''], env=test_env,
-                                           stdout=-1)
+                                            '1-2-3-4', '', ''], env=test_env,
+                                           stdout=-1, preexec_fn=os.setsid,
+                                           universal_newlines=True)
         expected = [mock.call(5, 'BUILDING', 'Starting the image build',
-                              None, 44),
+                              None, 44, None),
                     mock.call(5, 'COMPLETE', 'built successfully',
-                              fake_glance_id, 44)]
+                              fake_glance_id, 44, mock.ANY)]
 
         self.assertEqual(expected, mock_b_update.call_args_list)
+        mock_a_update.assert_called_once_with(44, 'BUILDING')
 
         expected = [mock.call(assembly_id=44, image_id=fake_glance_id)]
         self.assertEqual(expected, mock_deploy.call_args_list)
 
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
     @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
     @mock.patch('solum.objects.registry')
     @mock.patch('solum.conductor.api.API.build_job_update')
     @mock.patch('solum.deployer.api.API.deploy')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('eventlet.green.subprocess.Popen')
     @mock.patch('solum.common.clients.OpenStackClients.barbican')
     @mock.patch('ast.literal_eval')
     def test_build_with_private_github_repo(
             self, mock_ast, mock_barbican, mock_popen, mock_deploy,
-            mock_b_update, mock_registry, mock_get_env):
+            mock_b_update, mock_registry, mock_get_env, mock_a_update):
         handler = shell_handler.Handler()
         fake_assembly = fakes.FakeAssembly()
         fake_glance_id = str(uuid.uuid4())
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
         handler._update_assembly_status = mock.MagicMock()
-        mock_popen.return_value.communicate.return_value = [
-            'foo\ncreated_image_id=%s' % fake_glance_id, None]
+        mock_popen.return_value.stdout = six.StringIO(
+            'foo\ncreated_image_id=%s' % fake_glance_id)
         test_env = mock_environment()
         mock_get_env.return_value = test_env
         mock_ast.return_value = [{'source_url': 'git://example.com/foo',
@@ -154,36 +165,40 @@ class HandlerTest(base.BaseTestCase):
         script = os.path.join(proj_dir, 'contrib/lp-cedarish/docker/build-app')
         mock_popen.assert_called_once_with([script, 'git://example.com/foo',
                                             'new_app', self.ctx.tenant,
-                                            '1-2-3-4', 'some-private-key'],
-                                           env=test_env, stdout=-1)
+                                            '1-2-3-4', 'some-private-key', ''],
+                                           env=test_env, stdout=-1,
+                                           preexec_fn=os.setsid,
+                                           universal_newlines=True)
         expected = [mock.call(5, 'BUILDING', 'Starting the image build',
-                              None, 44),
+                              None, 44, None),
                     mock.call(5, 'COMPLETE', 'built successfully',
-                              fake_glance_id, 44)]
+                              fake_glance_id, 44, mock.ANY)]
 
         self.assertEqual(expected, mock_b_update.call_args_list)
 
         expected = [mock.call(assembly_id=44, image_id=fake_glance_id)]
         self.assertEqual(expected, mock_deploy.call_args_list)
 
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
     @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
     @mock.patch('solum.objects.registry')
     @mock.patch('solum.conductor.api.API.build_job_update')
     @mock.patch('solum.deployer.api.API.deploy')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('eventlet.green.subprocess.Popen')
     @mock.patch('shelve.open')
     @mock.patch('oslo.config.cfg.CONF.barbican_client')
     @mock.patch('ast.literal_eval')
     def test_build_with_private_github_repo_with_barbican_disabled(
             self, mock_ast, mock_config, mock_shelve, mock_popen,
-            mock_deploy, mock_b_update, mock_registry, mock_get_env):
+            mock_deploy, mock_b_update, mock_registry, mock_get_env,
+            mock_a_update):
         handler = shell_handler.Handler()
         fake_assembly = fakes.FakeAssembly()
         fake_glance_id = str(uuid.uuid4())
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
         handler._update_assembly_status = mock.MagicMock()
-        mock_popen.return_value.communicate.return_value = [
-            'foo\ncreated_image_id=%s' % fake_glance_id, None]
+        mock_popen.return_value.stdout = six.StringIO(
+            'foo\ncreated_image_id=%s' % fake_glance_id)
         test_env = mock_environment()
         mock_get_env.return_value = test_env
         mock_config.barbican_disabled.return_value = True
@@ -205,29 +220,32 @@ class HandlerTest(base.BaseTestCase):
         mock_shelve.call().__setitem__.assert_called_once()
         mock_popen.assert_called_once_with([script, 'git://example.com/foo',
                                             'new_app', self.ctx.tenant,
-                                            '1-2-3-4', 'some-private-key'],
-                                           env=test_env, stdout=-1)
+                                            '1-2-3-4', 'some-private-key', ''],
+                                           env=test_env, stdout=-1,
+                                           preexec_fn=os.setsid,
+                                           universal_newlines=True)
         expected = [mock.call(5, 'BUILDING', 'Starting the image build',
-                              None, 44),
+                              None, 44, None),
                     mock.call(5, 'COMPLETE', 'built successfully',
-                              fake_glance_id, 44)]
+                              fake_glance_id, 44, mock.ANY)]
 
         self.assertEqual(expected, mock_b_update.call_args_list)
 
         expected = [mock.call(assembly_id=44, image_id=fake_glance_id)]
         self.assertEqual(expected, mock_deploy.call_args_list)
 
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
     @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
     @mock.patch('solum.objects.registry')
     @mock.patch('solum.conductor.api.API.build_job_update')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('eventlet.green.subprocess.Popen')
     def test_build_fail(self, mock_popen, mock_b_update, mock_registry,
-                        mock_get_env):
+                        mock_get_env, mock_a_update):
         handler = shell_handler.Handler()
         fake_assembly = fakes.FakeAssembly()
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
-        mock_popen.return_value.communicate.return_value = [
-            'foo\ncreated_image_id= \n', None]
+        mock_popen.return_value.stdout = six.StringIO(
+            'foo\ncreated_image_id= \n')
         test_env = mock_environment()
         mock_get_env.return_value = test_env
         git_info = mock_git_info()
@@ -240,33 +258,357 @@ class HandlerTest(base.BaseTestCase):
         script = os.path.join(proj_dir, 'contrib/lp-cedarish/docker/build-app')
         mock_popen.assert_called_once_with([script, 'git://example.com/foo',
                                             'new_app', self.ctx.tenant,
-                                            '1-2-3-4', ''],
-                                           env=test_env, stdout=-1)
+                                            '1-2-3-4', '', ''],
+                                           env=test_env, stdout=-1,
+                                           preexec_fn=os.setsid,
+                                           universal_newlines=True)
 
         expected = [mock.call(5, 'BUILDING', 'Starting the image build',
-                              None, 44),
-                    mock.call(5, 'ERROR', 'image not created', None, 44)]
+                              None, 44, None),
+                    mock.call(5, 'ERROR', 'image not created', None, 44,
+                              mock.ANY)]
 
         self.assertEqual(expected, mock_b_update.call_args_list)
 
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
     @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
     @mock.patch('solum.objects.registry')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('solum.conductor.api.API.build_job_update')
+    @mock.patch('solum.deployer.api.API.deploy')
+    @mock.patch('eventlet.green.subprocess.Popen')
+    def test_build_streams_tlog_output(self, mock_popen, mock_deploy,
+                                       mock_b_update, mock_registry,
+                                       mock_get_env, mock_a_update):
+        handler = shell_handler.Handler()
+        fake_assembly = fakes.FakeAssembly()
+        fake_glance_id = str(uuid.uuid4())
+        mock_registry.Assembly.get_by_id.return_value = fake_assembly
+        lines = [json.dumps({'task': 'build', 'message': msg})
+                 for msg in ['Starting: git clone',
+                             '===> Building App',
+                             'created_image_id=%s' % fake_glance_id]]
+        mock_popen.return_value.stdout = six.StringIO('\n'.join(lines))
+        mock_get_env.return_value = mock_environment()
+        handler.build(self.ctx, build_id=5, git_info=mock_git_info(),
+                      name='new_app', base_image_id='1-2-3-4',
+                      source_format='heroku', image_format='docker',
+                      assembly_id=44, test_cmd=None)
+
+        expected = [mock.call(5, 'BUILDING', 'Starting the image build',
+                              None, 44, None),
+                    mock.call(5, 'BUILDING', 'Building App', None, 44,
+                              None),
+                    mock.call(5, 'COMPLETE', 'built successfully',
+                              fake_glance_id, 44, mock.ANY)]
+        self.assertEqual(expected, mock_b_update.call_args_list)
+        mock_popen.return_value.wait.assert_called_once_with()
+
+        expected = [mock.call(assembly_id=44, image_id=fake_glance_id)]
+        self.assertEqual(expected, mock_deploy.call_args_list)
+
+    @mock.patch('solum.worker.handlers.shell.Handler._image_exists')
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
+    @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
+    @mock.patch('solum.objects.registry')
+    @mock.patch('solum.conductor.api.API.build_job_update')
+    @mock.patch('solum.deployer.api.API.deploy')
+    @mock.patch('eventlet.green.subprocess.Popen')
+    def test_build_reuses_cached_image(self, mock_popen, mock_deploy,
+                                       mock_b_update, mock_registry,
+                                       mock_get_env, mock_a_update,
+                                       mock_exists):
+        handler = shell_handler.Handler()
+        mock_exists.return_value = True
+        fake_assembly = fakes.FakeAssembly()
+        fake_glance_id = str(uuid.uuid4())
+        mock_registry.Assembly.get_by_id.return_value = fake_assembly
+        mock_popen.return_value.stdout = six.StringIO(
+            'created_image_id=%s' % fake_glance_id)
+        mock_get_env.return_value = mock_environment()
+        git_info = mock_git_info()
+        git_info['commit_sha'] = 'abc123'
+        for build_id in (5, 6):
+            handler.build(self.ctx, build_id=build_id, git_info=git_info,
+                          name='new_app', base_image_id='1-2-3-4',
+                          source_format='heroku', image_format='docker',
+                          assembly_id=44, test_cmd=None)
+
+        self.assertEqual(1, mock_popen.call_count)
+        self.assertEqual('abc123', mock_popen.call_args[0][0][-1])
+        expected = [mock.call(5, 'BUILDING', 'Starting the image build',
+                              None, 44, None),
+                    mock.call(5, 'COMPLETE', 'built successfully',
+                              fake_glance_id, 44, mock.ANY),
+                    mock.call(6, 'COMPLETE',
+                              'reused image of an identical build',
+                              fake_glance_id, 44, {})]
+        self.assertEqual(expected, mock_b_update.call_args_list)
+
+        expected = [mock.call(assembly_id=44, image_id=fake_glance_id)] * 2
+        self.assertEqual(expected, mock_deploy.call_args_list)
+
+    @mock.patch('solum.worker.handlers.shell.Handler._image_exists')
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
+    @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
+    @mock.patch('solum.objects.registry')
+    @mock.patch('solum.conductor.api.API.build_job_update')
+    @mock.patch('solum.deployer.api.API.deploy')
+    @mock.patch('eventlet.green.subprocess.Popen')
+    def test_build_rebuilds_deleted_cached_image(self, mock_popen,
+                                                 mock_deploy, mock_b_update,
+                                                 mock_registry, mock_get_env,
+                                                 mock_a_update, mock_exists):
+        handler = shell_handler.Handler()
+        mock_exists.return_value = False
+        mock_registry.Assembly.get_by_id.return_value = fakes.FakeAssembly()
+        mock_get_env.return_value = mock_environment()
+        git_info = mock_git_info()
+        git_info['commit_sha'] = 'abc123'
+        for build_id in (5, 6):
+            mock_popen.return_value.stdout = six.StringIO(
+                'created_image_id=%s' % str(uuid.uuid4()))
+            handler.build(self.ctx, build_id=build_id, git_info=git_info,
+                          name='new_app', base_image_id='1-2-3-4',
+                          source_format='heroku', image_format='docker',
+                          assembly_id=44, test_cmd=None)
+
+        self.assertEqual(2, mock_popen.call_count)
+        self.assertEqual(1, mock_exists.call_count)
+        self.assertEqual(1, len(handler._build_cache))
+
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
+    @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
+    @mock.patch('solum.objects.registry')
+    @mock.patch('solum.conductor.api.API.build_job_update')
+    @mock.patch('solum.deployer.api.API.deploy')
+    @mock.patch('eventlet.green.subprocess.Popen')
+    def test_build_without_commit_is_not_cached(self, mock_popen,
+                                                mock_deploy, mock_b_update,
+                                                mock_registry, mock_get_env,
+                                                mock_a_update):
+        handler = shell_handler.Handler()
+        mock_registry.Assembly.get_by_id.return_value = fakes.FakeAssembly()
+        mock_popen.return_value.stdout = six.StringIO(
+            'created_image_id=%s' % str(uuid.uuid4()))
+        mock_get_env.return_value = mock_environment()
+        handler.build(self.ctx, build_id=5, git_info=mock_git_info(),
+                      name='new_app', base_image_id='1-2-3-4',
+                      source_format='heroku', image_format='docker',
+                      assembly_id=44, test_cmd=None)
+        self.assertEqual(0, len(handler._build_cache))
+
+    @mock.patch('solum.common.clients.OpenStackClients')
+    def test_image_exists(self, mock_clients):
+        images = mock_clients.return_value.glance.return_value.images
+        handler = shell_handler.Handler()
+        images.get.return_value = mock.MagicMock(status='active')
+        self.assertTrue(handler._image_exists(self.ctx, 'img'))
+        images.get.return_value = mock.MagicMock(status='deleted')
+        self.assertFalse(handler._image_exists(self.ctx, 'img'))
+        images.get.side_effect = glance_exc.HTTPNotFound()
+        self.assertFalse(handler._image_exists(self.ctx, 'img'))
+        images.get.assert_called_with('img')
+
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
+    @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
+    @mock.patch('solum.objects.registry')
+    @mock.patch('solum.conductor.api.API.build_job_update')
+    @mock.patch('solum.worker.handlers.shell.stage_timeout')
+    @mock.patch('shutil.rmtree')
+    @mock.patch('os.killpg')
+    @mock.patch('eventlet.green.subprocess.Popen')
+    def test_build_timeout(self, mock_popen, mock_killpg, mock_rmtree,
+                           mock_timeout, mock_b_update, mock_registry,
+                           mock_get_env, mock_a_update):
+        handler = shell_handler.Handler()
+        mock_registry.Assembly.get_by_id.return_value = fakes.FakeAssembly()
+        mock_timeout.return_value = 0.01
+        mock_popen.return_value.stdout.readline.side_effect = (
+            lambda: eventlet.sleep(1))
+        mock_get_env.return_value = mock_environment()
+        handler.build(self.ctx, build_id=5, git_info=mock_git_info(),
+                      name='new_app', base_image_id='1-2-3-4',
+                      source_format='heroku', image_format='docker',
+                      assembly_id=44, test_cmd=None)
+
+        mock_timeout.assert_called_once_with('build', 'heroku')
+        mock_killpg.assert_called_once_with(mock_popen.return_value.pid,
+                                            signal.SIGKILL)
+        self.assertEqual(1, mock_rmtree.call_count)
+        expected = [mock.call(5, 'BUILDING', 'Starting the image build',
+                              None, 44, None),
+                    mock.call(5, 'ERROR',
+                              'build timed out after 0.01 seconds',
+                              None, 44, mock.ANY)]
+        self.assertEqual(expected, mock_b_update.call_args_list)
+        self.assertEqual({}, handler._running)
+
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
+    @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
+    @mock.patch('solum.objects.registry')
+    @mock.patch('solum.conductor.api.API.build_job_update')
+    @mock.patch('shutil.rmtree')
+    @mock.patch('os.killpg')
+    @mock.patch('eventlet.green.subprocess.Popen')
+    def test_build_cancel(self, mock_popen, mock_killpg, mock_rmtree,
+                          mock_b_update, mock_registry, mock_get_env,
+                          mock_a_update):
+        handler = shell_handler.Handler()
+        mock_registry.Assembly.get_by_id.return_value = fakes.FakeAssembly()
+
+        def cancel_midway():
+            handler.cancel(self.ctx, 5)
+            return ''
+
+        mock_popen.return_value.stdout.readline.side_effect = cancel_midway
+        mock_get_env.return_value = mock_environment()
+        handler.build(self.ctx, build_id=5, git_info=mock_git_info(),
+                      name='new_app', base_image_id='1-2-3-4',
+                      source_format='heroku', image_format='docker',
+                      assembly_id=44, test_cmd=None)
+
+        mock_killpg.assert_called_once_with(mock_popen.return_value.pid,
+                                            signal.SIGKILL)
+        self.assertEqual(1, mock_rmtree.call_count)
+        self.assertEqual(mock.call(5, 'ERROR', 'build cancelled', None, 44,
+                                   mock.ANY),
+                         mock_b_update.call_args)
+        self.assertEqual({}, handler._cancelled)
+
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
+    @mock.patch('solum.conductor.api.API.build_job_update')
+    @mock.patch('solum.deployer.api.API.deploy')
+    @mock.patch('eventlet.green.subprocess.Popen')
+    def test_build_cancelled_before_start(self, mock_popen, mock_deploy,
+                                          mock_b_update, mock_a_update):
+        handler = shell_handler.Handler()
+        handler.cancel(self.ctx, 5)
+        handler.build(self.ctx, build_id=5, git_info=mock_git_info(),
+                      name='new_app', base_image_id='1-2-3-4',
+                      source_format='heroku', image_format='docker',
+                      assembly_id=44, test_cmd='tox')
+
+        self.assertFalse(mock_popen.called)
+        self.assertFalse(mock_a_update.called)
+        self.assertFalse(mock_deploy.called)
+        mock_b_update.assert_called_once_with(5, 'ERROR',
+                                              'unittest cancelled', None, 44,
+                                              None)
+        self.assertEqual({}, handler._cancelled)
+
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
+    @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
+    @mock.patch('solum.objects.registry')
+    @mock.patch('solum.conductor.api.API.build_job_update')
+    @mock.patch('solum.deployer.api.API.deploy')
+    @mock.patch('eventlet.green.subprocess.Popen')
+    def test_build_cancelled_after_unittest(self, mock_popen, mock_deploy,
+                                            mock_b_update, mock_registry,
+                                            mock_get_env, mock_a_update):
+        handler = shell_handler.Handler()
+        mock_registry.Assembly.get_by_id.return_value = fakes.FakeAssembly()
+        mock_get_env.return_value = mock_environment()
+        mock_popen.return_value.stdout = six.StringIO('')
+
+        def cancel_on_exit():
+            handler.cancel(self.ctx, 5)
+            return 0
+
+        mock_popen.return_value.wait.side_effect = cancel_on_exit
+        handler.build(self.ctx, build_id=5, git_info=mock_git_info(),
+                      name='new_app', base_image_id='1-2-3-4',
+                      source_format='heroku', image_format='docker',
+                      assembly_id=44, test_cmd='tox')
+
+        self.assertEqual(1, mock_popen.call_count)
+        self.assertFalse(mock_deploy.called)
+        self.assertEqual(mock.call(5, 'ERROR', 'unittest cancelled', None, 44,
+                                   mock.ANY),
+                         mock_b_update.call_args)
+        self.assertNotIn(mock.call(self.ctx, 44, 'BUILDING'),
+                         mock_a_update.call_args_list)
+
+    @mock.patch('solum.worker.handlers.shell.Handler._image_exists')
+    @mock.patch('solum.conductor.api.API.update_assembly_status')
+    @mock.patch('solum.conductor.api.API.build_job_update')
+    @mock.patch('solum.deployer.api.API.deploy')
+    def test_cached_build_cancelled(self, mock_deploy, mock_b_update,
+                                    mock_a_update, mock_exists):
+        handler = shell_handler.Handler()
+        git_info = mock_git_info()
+        git_info['commit_sha'] = 'abc123'
+        handler._build_cache.put(
+            shell_handler.BuildCache.key(self.ctx, git_info['source_url'],
+                                         'abc123', '1-2-3-4', 'heroku',
+                                         'docker'),
+            'image')
+
+        def cancel_during_lookup(ctxt, image_id):
+            handler.cancel(self.ctx, 5)
+            return True
+
+        mock_exists.side_effect = cancel_during_lookup
+        handler.build(self.ctx, build_id=5, git_info=git_info,
+                      name='new_app', base_image_id='1-2-3-4',
+                      source_format='heroku', image_format='docker',
+                      assembly_id=44, test_cmd=None)
+
+        self.assertFalse(mock_deploy.called)
+        mock_b_update.assert_called_once_with(5, 'ERROR', 'deploy cancelled',
+                                              None, 44, {})
+
+    @mock.patch('os.killpg')
+    def test_cancel_unknown_build(self, mock_killpg):
+        handler = shell_handler.Handler()
+        handler.cancel(self.ctx, 5)
+        self.assertFalse(mock_killpg.called)
+        self.assertIn(5, handler._cancelled)
+
+    def test_cancels_are_bounded(self):
+        handler = shell_handler.Handler()
+        for build_id in range(shell_handler.MAX_CANCELLED + 1):
+            handler.cancel(self.ctx, build_id)
+        self.assertEqual(shell_handler.MAX_CANCELLED, len(handler._cancelled))
+        self.assertNotIn(0, handler._cancelled)
+
+    def test_work_dir(self):
+        handler = shell_handler.Handler()
+        git = {'source_url': 'git://example.com/foo'}
+        docker = handler.work_dir(self.ctx, 'build', git_info=git,
+                                  name='app', source_format='heroku',
+                                  image_format='docker')
+        self.assertEqual(handler._app_dir(self.ctx, 'git://example.com/foo'),
+                         docker)
+        vm = handler.work_dir(self.ctx, 'build', git_info=git, name='app',
+                              source_format='heroku', image_format='qcow2')
+        self.assertEqual('/opt/solum/apps/%s/app' % self.ctx.tenant, vm)
+        dockerfile = handler.work_dir(self.ctx, 'build', git_info=git,
+                                      name='app', source_format='dockerfile',
+                                      image_format='docker')
+        self.assertEqual(vm, dockerfile)
+        self.assertIsNone(handler.work_dir(self.ctx, 'unittest',
+                                           git_info=git, name='app'))
+
+    @mock.patch('solum.worker.handlers.shell.upload_task_log')
+    @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
+    @mock.patch('solum.objects.registry')
+    @mock.patch('eventlet.green.subprocess.Popen')
     @mock.patch('solum.worker.handlers.shell.update_assembly_status')
     def test_unittest(self, mock_a_update, mock_popen, mock_registry,
-                      mock_get_env):
+                      mock_get_env, mock_upload):
         handler = shell_handler.Handler()
         fake_assembly = fakes.FakeAssembly()
-        mock_registry.Assembly.get_by_id.return_value = fake_assembly
         test_env = mock_environment()
         mock_get_env.return_value = test_env
         mock_popen.return_value.wait.return_value = 0
+        mock_popen.return_value.stdout = six.StringIO('')
         git_info = mock_git_info()
         handler.unittest(self.ctx, build_id=5, name='new_app',
                          base_image_id='1-2-3-4', source_format='chef',
                          image_format='docker', assembly_id=fake_assembly.id,
                          git_info=git_info, test_cmd='tox',
-                         source_creds_ref=None)
+                         source_creds_ref=None,
+                         assembly_uuid=fake_assembly.uuid)
 
         proj_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
                                                 '..', '..', '..', '..'))
@@ -274,14 +616,21 @@ class HandlerTest(base.BaseTestCase):
                               'contrib/lp-chef/docker/unittest-app')
         mock_popen.assert_called_once_with([script, 'git://example.com/foo',
                                             '', self.ctx.tenant, '',
-                                            'tox'], env=test_env, stdout=-1)
+                                            'tox'], env=test_env, stdout=-1,
+                                           preexec_fn=os.setsid,
+                                           universal_newlines=True)
         expected = [mock.call(self.ctx, 8, 'UNIT_TESTING')]
 
         self.assertEqual(expected, mock_a_update.call_args_list)
+        # The assembly uuid comes with the job, not from the database.
+        self.assertFalse(mock_registry.Assembly.get_by_id.called)
+        mock_upload.assert_called_once_with(
+            self.ctx, mock.ANY, fake_assembly.uuid, test_env['BUILD_ID'],
+            'unittest')
 
     @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
     @mock.patch('solum.objects.registry')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('eventlet.green.subprocess.Popen')
     @mock.patch('solum.worker.handlers.shell.update_assembly_status')
     def test_unittest_failure(self, mock_a_update, mock_popen,
                               mock_registry, mock_get_env):
@@ -291,6 +640,7 @@ class HandlerTest(base.BaseTestCase):
         test_env = mock_environment()
         mock_get_env.return_value = test_env
         mock_popen.return_value.wait.return_value = 1
+        mock_popen.return_value.stdout = six.StringIO('')
         git_info = mock_git_info()
         handler.unittest(self.ctx, build_id=5, name='new_app',
                          assembly_id=fake_assembly.id,
@@ -305,7 +655,9 @@ class HandlerTest(base.BaseTestCase):
                               'contrib/lp-chef/docker/unittest-app')
         mock_popen.assert_called_once_with([script, 'git://example.com/foo',
                                             '', self.ctx.tenant, '',
-                                            'tox'], env=test_env, stdout=-1)
+                                            'tox'], env=test_env, stdout=-1,
+                                           preexec_fn=os.setsid,
+                                           universal_newlines=True)
         expected = [mock.call(self.ctx, 8, 'UNIT_TESTING'),
                     mock.call(self.ctx, 8, 'UNIT_TESTING_FAILED')]
 
@@ -313,7 +665,7 @@ class HandlerTest(base.BaseTestCase):
 
     @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
     @mock.patch('solum.objects.registry')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('eventlet.green.subprocess.Popen')
     @mock.patch('solum.conductor.api.API.build_job_update')
     @mock.patch('solum.worker.handlers.shell.update_assembly_status')
     @mock.patch('solum.deployer.api.API.deploy')
@@ -325,9 +677,11 @@ class HandlerTest(base.BaseTestCase):
         fake_assembly = fakes.FakeAssembly()
         fake_glance_id = str(uuid.uuid4())
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
-        mock_popen.return_value.wait.return_value = 0
-        mock_popen.return_value.communicate.return_value = [
-            'foo\ncreated_image_id=%s' % fake_glance_id, None]
+        mock_unittest = mock.MagicMock(stdout=six.StringIO(''))
+        mock_unittest.wait.return_value = 0
+        mock_build = mock.MagicMock(stdout=six.StringIO(
+            'foo\ncreated_image_id=%s' % fake_glance_id))
+        mock_popen.side_effect = [mock_unittest, mock_build]
         test_env = mock_environment()
         mock_get_env.return_value = test_env
         git_info = mock_git_info()
@@ -345,16 +699,18 @@ class HandlerTest(base.BaseTestCase):
         expected = [
             mock.call([u_script, 'git://example.com/foo', '',
                        self.ctx.tenant, '', 'faketests'], env=test_env,
-                      stdout=-1),
+                      stdout=-1, preexec_fn=os.setsid,
+                      universal_newlines=True),
             mock.call([b_script, 'git://example.com/foo', 'new_app',
-                       self.ctx.tenant, '1-2-3-4', ''], env=test_env,
-                      stdout=-1)]
+                       self.ctx.tenant, '1-2-3-4', '', ''], env=test_env,
+                      stdout=-1, preexec_fn=os.setsid,
+                      universal_newlines=True)]
         self.assertEqual(expected, mock_popen.call_args_list)
 
         expected = [mock.call(5, 'BUILDING', 'Starting the image build',
-                              None, 44),
+                              None, 44, None),
                     mock.call(5, 'COMPLETE', 'built successfully',
-                              fake_glance_id, 44)]
+                              fake_glance_id, 44, mock.ANY)]
         self.assertEqual(expected, mock_b_update.call_args_list)
 
         expected = [mock.call(self.ctx, 44, 'UNIT_TESTING'),
@@ -365,7 +721,7 @@ class HandlerTest(base.BaseTestCase):
         self.assertEqual(expected, mock_deploy.call_args_list)
 
     @mock.patch('solum.worker.handlers.shell.Handler._get_environment')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('eventlet.green.subprocess.Popen')
     @mock.patch('solum.worker.handlers.shell.update_assembly_status')
     @mock.patch('solum.objects.registry')
     def test_unittest_no_build(self, mock_registry, mock_a_update, mock_popen,
@@ -374,6 +730,7 @@ class HandlerTest(base.BaseTestCase):
         mock_assembly = mock.MagicMock()
         mock_registry.Assembly.get_by_id.return_value = mock_assembly
         mock_popen.return_value.wait.return_value = 1
+        mock_popen.return_value.stdout = six.StringIO('')
         test_env = mock_environment()
         mock_get_env.return_value = test_env
         git_info = mock_git_info()
@@ -390,7 +747,8 @@ class HandlerTest(base.BaseTestCase):
         expected = [
             mock.call([u_script, 'git://example.com/foo', '',
                        self.ctx.tenant, '', 'faketests'], env=test_env,
-                      stdout=-1)]
+                      stdout=-1, preexec_fn=os.setsid,
+                      universal_newlines=True)]
         self.assertEqual(expected, mock_popen.call_args_list)
 
         expected = [mock.call(self.ctx, 44, 'UNIT_TESTING'),
@@ -402,24 +760,120 @@ class TestNotifications(base.BaseTestCase):
     def setUp(self):
         super(TestNotifications, self).setUp()
         self.ctx = utils.dummy_context()
-        self.db = self.useFixture(utils.Database())
 
-    @mock.patch('solum.objects.registry')
-    def test_update_assembly_status(self, mock_registry):
-        mock_assembly = mock.MagicMock()
-        mock_registry.Assembly.get_by_id.return_value = mock_assembly
+    @mock.patch('solum.conductor.api.API')
+    def test_update_assembly_status(self, mock_api):
         shell_handler.update_assembly_status(self.ctx, '1234',
                                              'BUILDING')
-        mock_registry.Assembly.get_by_id.assert_called_once_with(self.ctx,
-                                                                 '1234')
-        mock_assembly.save.assert_called_once_with(self.ctx)
-        self.assertEqual(mock_assembly.status, 'BUILDING')
+        mock_api.assert_called_once_with(context=self.ctx)
+        mock_api.return_value.update_assembly_status.assert_called_once_with(
+            '1234', 'BUILDING')
 
-    @mock.patch('solum.objects.registry')
-    def test_update_assembly_status_pass(self, mock_registry):
+    @mock.patch('solum.conductor.api.API')
+    def test_update_assembly_status_pass(self, mock_api):
         shell_handler.update_assembly_status(self.ctx, None,
                                              'BUILDING')
-        self.assertEqual(mock_registry.call_count, 0)
+        self.assertEqual(mock_api.call_count, 0)
+
+
+class TestBuildCache(base.BaseTestCase):
+    def setUp(self):
+        super(TestBuildCache, self).setUp()
+        self.ctx = utils.dummy_context()
+
+    def _key(self, commit_sha):
+        return shell_handler.BuildCache.key(self.ctx, 'git://a', commit_sha,
+                                            'auto', 'heroku', 'docker')
+
+    def test_lru_eviction(self):
+        cache = shell_handler.BuildCache(2)
+        cache.put(self._key('a'), 'image-a')
+        cache.put(self._key('b'), 'image-b')
+        self.assertEqual('image-a', cache.get(self._key('a')))
+        cache.put(self._key('c'), 'image-c')
+        self.assertIsNone(cache.get(self._key('b')))
+        self.assertEqual('image-a', cache.get(self._key('a')))
+        self.assertEqual('image-c', cache.get(self._key('c')))
+
+    def test_key_is_tenant_scoped(self):
+        cache = shell_handler.BuildCache(2)
+        cache.put(self._key('a'), 'image-a')
+        other = shell_handler.BuildCache.key(
+            utils.dummy_context(tenant_id='other'), 'git://a', 'a', 'auto',
+            'heroku', 'docker')
+        self.assertIsNone(cache.get(other))
+
+    @mock.patch('time.time')
+    def test_ttl(self, mock_time):
+        cache = shell_handler.BuildCache(2, ttl=60)
+        mock_time.return_value = 1000
+        cache.put(self._key('a'), 'image-a')
+        mock_time.return_value = 1061
+        self.assertIsNone(cache.get(self._key('a')))
+        self.assertEqual(0, len(cache))
+
+    def test_disabled(self):
+        cache = shell_handler.BuildCache(0)
+        cache.put(self._key('a'), 'image-a')
+        self.assertIsNone(cache.get(self._key('a')))
+
+    def test_discard(self):
+        cache = shell_handler.BuildCache(2)
+        cache.put(self._key('a'), 'image-a')
+        cache.discard(self._key('a'))
+        cache.discard(self._key('b'))
+        self.assertIsNone(cache.get(self._key('a')))
+        self.assertEqual(0, len(cache))
+
+
+class TestParseLogLine(base.BaseTestCase):
+    def test_tlog_line(self):
+        line = ('{ "@timestamp": "2014-10-01 10:00:00.000", '
+                '"task": "build", "message": "created_image_id=abc"}\n')
+        self.assertEqual('created_image_id=abc',
+                         shell_handler.parse_log_line(line))
+
+    def test_plain_line(self):
+        line = 'created_image_id=abc\n'
+        self.assertEqual('created_image_id=abc',
+                         shell_handler.parse_log_line(line))
+
+    def test_malformed_json(self):
+        line = '{ "message": "say "hi""}'
+        self.assertEqual(line, shell_handler.parse_log_line(line))
+
+
+class TestParseStageTiming(base.BaseTestCase):
+    def test_stages(self):
+        lines = {
+            'Finished: git clone -q git://a /dev/shm/x [Elapsed: 3 sec] '
+            '(EXIT_STATUS=0)': ('clone', 3),
+            'Finished: git --git-dir=/m/a.git fetch -q --prune origin '
+            '[Elapsed: 1 sec] (EXIT_STATUS=0)': ('clone', 1),
+            'FAILED: sudo docker build -t app . [Elapsed: 40 sec] '
+            '(EXIT_STATUS=1)': ('docker_build', 40),
+            'Finished: sudo docker logs --tail=all -f 1a2b '
+            '[Elapsed: 95 sec] (EXIT_STATUS=0)': ('slug_build', 95),
+            'Finished: glance image-create [Elapsed: 12 sec]':
+            ('glance_upload', 12),
+        }
+        for line, expected in lines.items():
+            self.assertEqual(expected, shell_handler.parse_stage_timing(line))
+
+    def test_other_lines(self):
+        for line in ['Starting: git clone git://a /tmp/b',
+                     'Finished: mkdir -p /tmp/b [Elapsed: 0 sec]',
+                     '===> Building App']:
+            self.assertIsNone(shell_handler.parse_stage_timing(line))
+
+    def test_consume_output_adds_up_stages(self):
+        out = six.StringIO(
+            'Finished: git clone a b [Elapsed: 3 sec] (EXIT_STATUS=0)\n'
+            'Finished: git checkout -q abc [Elapsed: 1 sec] (EXIT_STATUS=0)\n'
+            'Finished: sudo docker build -t a . [Elapsed: 7 sec]\n')
+        timings = {}
+        shell_handler.Handler()._consume_output(out, timings=timings)
+        self.assertEqual({'clone': 4, 'docker_build': 7}, timings)
 
 
 class TestBuildCommand(base.BaseTestCase):
@@ -459,7 +913,7 @@ class TestBuildCommand(base.BaseTestCase):
                                          'testa',
                                          self.base_image_id,
                                          self.source_format,
-                                         self.image_format, '', '')
+                                         self.image_format, 'asdf', '')
         self.assertIn(self.expect_b, cmd[0])
         self.assertEqual('http://example.com/a.git', cmd[1])
         self.assertEqual('testa', cmd[2])
@@ -468,6 +922,7 @@ class TestBuildCommand(base.BaseTestCase):
             self.assertEqual('cedarish', cmd[4])
         else:
             self.assertEqual(self.base_image_id, cmd[4])
+        self.assertEqual('asdf', cmd[6])
 
     def test_unittest_cmd(self):
         ctx = utils.dummy_context()
@@ -485,3 +940,17 @@ class TestBuildCommand(base.BaseTestCase):
         self.assertEqual(ctx.tenant, cmd[3])
         self.assertEqual('', cmd[4])
         self.assertEqual('pep8', cmd[5])
+
+
+class TestStageTimeout(base.BaseTestCase):
+    def test_default(self):
+        self.assertEqual(3600, shell_handler.stage_timeout('build', 'heroku'))
+        self.assertEqual(1800,
+                         shell_handler.stage_timeout('unittest', 'heroku'))
+
+    def test_format_override(self):
+        cfg.CONF.set_override('stage_timeouts',
+                              {'dockerfile.build': '7200'}, group='worker')
+        self.assertEqual(7200,
+                         shell_handler.stage_timeout('build', 'dockerfile'))
+        self.assertEqual(3600, shell_handler.stage_timeout('build', 'heroku'))
@@ -17,6 +17,7 @@ import uuid
 
 import mock
 from oslo.config import cfg
+import six
 
 from solum.tests import base
 from solum.tests import fakes
@@ -38,12 +39,14 @@ class HandlerTest(base.BaseTestCase):
     def setUp(self):
         super(HandlerTest, self).setUp()
         self.ctx = utils.dummy_context()
+        # Send each build update as it is made, to check them in order.
+        cfg.CONF.set_override('job_update_batch_size', 1, group='worker')
 
     # Notice most of these mocks do not modify shell_nobuild, but shell.
     @mock.patch('solum.worker.handlers.shell_nobuild.Handler._get_environment')
     @mock.patch('httplib2.Http.request')
     @mock.patch('solum.objects.registry')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('eventlet.green.subprocess.Popen')
     @mock.patch('solum.conductor.api.API.build_job_update')
     @mock.patch('solum.worker.handlers.shell.update_assembly_status')
     @mock.patch('solum.worker.handlers.shell_nobuild.update_assembly_status')
@@ -55,8 +58,8 @@ class HandlerTest(base.BaseTestCase):
         fake_glance_id = str(uuid.uuid4())
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
         mock_popen.return_value.wait.return_value = 0
-        mock_popen.return_value.communicate.return_value = [
-            'foo\ncreated_image_id=%s' % fake_glance_id, None]
+        mock_popen.return_value.stdout = six.StringIO(
+            'foo\ncreated_image_id=%s' % fake_glance_id)
         test_env = test_shell.mock_environment()
         mock_get_env.return_value = test_env
         git_info = test_shell.mock_git_info()
@@ -70,11 +73,10 @@ class HandlerTest(base.BaseTestCase):
                       image_format='docker', assembly_id=44,
                       test_cmd='faketests', source_creds_ref=None)
 
+        handler._status_publisher.wait()
+
+        # The pending status was still queued when the final one came in.
         expected = [
-            mock.call(status_url, 'POST',
-                      headers=test_shell.mock_request_hdr(status_token),
-                      body=test_shell.mock_req_pending_body(
-                          'https://log.com/commit/SHA')),
             mock.call(status_url, 'POST',
                       headers=test_shell.mock_request_hdr(status_token),
                       body=test_shell.mock_req_success_body(
@@ -90,7 +92,8 @@ class HandlerTest(base.BaseTestCase):
         expected = [
             mock.call([u_script, 'git://example.com/foo', '',
                        self.ctx.tenant, '', 'faketests'], env=test_env,
-                      stdout=-1)]
+                      stdout=-1, preexec_fn=os.setsid,
+                      universal_newlines=True)]
         self.assertEqual(expected, mock_popen.call_args_list)
 
         # The UNIT_TESTING update happens from shell...
@@ -103,7 +106,7 @@ class HandlerTest(base.BaseTestCase):
 
     @mock.patch('solum.worker.handlers.shell_nobuild.Handler._get_environment')
     @mock.patch('httplib2.Http.request')
-    @mock.patch('subprocess.Popen')
+    @mock.patch('eventlet.green.subprocess.Popen')
     @mock.patch('solum.worker.handlers.shell.update_assembly_status')
     @mock.patch('solum.objects.registry')
     def test_unittest_no_build(self, mock_registry, mock_a_update,
@@ -112,6 +115,7 @@ class HandlerTest(base.BaseTestCase):
         fake_assembly = fakes.FakeAssembly()
         mock_registry.Assembly.get_by_id.return_value = fake_assembly
         mock_popen.return_value.wait.return_value = 1
+        mock_popen.return_value.stdout = six.StringIO('')
         test_env = test_shell.mock_environment()
         mock_get_env.return_value = test_env
         git_info = test_shell.mock_git_info()
@@ -126,11 +130,10 @@ class HandlerTest(base.BaseTestCase):
                       assembly_id=44, test_cmd='faketests',
                       source_creds_ref=None)
 
+        handler._status_publisher.wait()
+
+        # The pending status was still queued when the final one came in.
         expected = [
-            mock.call(status_url, 'POST',
-                      headers=test_shell.mock_request_hdr(status_token),
-                      body=test_shell.mock_req_pending_body(
-                          'https://log.com/commit/SHA')),
             mock.call(status_url, 'POST',
                       headers=test_shell.mock_request_hdr(status_token),
                       body=test_shell.mock_req_failure_body(
@@ -145,36 +148,40 @@ class HandlerTest(base.BaseTestCase):
         expected = [
             mock.call([u_script, 'git://example.com/foo', '',
                        self.ctx.tenant, '', 'faketests'], env=test_env,
-                      stdout=-1)]
+                      stdout=-1, preexec_fn=os.setsid,
+                      universal_newlines=True)]
         self.assertEqual(expected, mock_popen.call_args_list)
 
         expected = [mock.call(self.ctx, 44, 'UNIT_TESTING'),
                     mock.call(self.ctx, 44, 'UNIT_TESTING_FAILED')]
         self.assertEqual(expected, mock_a_update.call_args_list)
 
+    def test_environment_shares_git_mirrors(self):
+        cfg.CONF.set_override('git_mirror_dir', '/srv/mirrors',
+                              group='worker')
+        env = shell_handler.Handler()._get_environment(self.ctx)
+        self.assertEqual('/srv/mirrors', env['SOLUM_GIT_MIRROR_DIR'])
+        self.assertEqual('10240', env['SOLUM_GIT_MIRROR_MAX_MB'])
+
 
 class TestNotifications(base.BaseTestCase):
     def setUp(self):
         super(TestNotifications, self).setUp()
         self.ctx = utils.dummy_context()
-        self.db = self.useFixture(utils.Database())
 
-    @mock.patch('solum.objects.registry')
-    def test_update_assembly_status(self, mock_registry):
-        mock_assembly = mock.MagicMock()
-        mock_registry.Assembly.get_by_id.return_value = mock_assembly
+    @mock.patch('solum.conductor.api.API')
+    def test_update_assembly_status(self, mock_api):
         shell_handler.update_assembly_status(self.ctx, '1234',
                                              'BUILDING')
-        mock_registry.Assembly.get_by_id.assert_called_once_with(self.ctx,
-                                                                 '1234')
-        mock_assembly.save.assert_called_once_with(self.ctx)
-        self.assertEqual(mock_assembly.status, 'BUILDING')
+        mock_api.assert_called_once_with(context=self.ctx)
+        mock_api.return_value.update_assembly_status.assert_called_once_with(
+            '1234', 'BUILDING')
 
-    @mock.patch('solum.objects.registry')
-    def test_update_assembly_status_pass(self, mock_registry):
+    @mock.patch('solum.conductor.api.API')
+    def test_update_assembly_status_pass(self, mock_api):
         shell_handler.update_assembly_status(self.ctx, None,
                                              'BUILDING')
-        self.assertEqual(mock_registry.call_count, 0)
+        self.assertEqual(mock_api.call_count, 0)
 
 
 class TestBuildCommand(base.BaseTestCase):
@@ -0,0 +1,143 @@
+# Copyright 2014 - Rackspace Hosting
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import eventlet
+from eventlet import event
+import mock
+
+from solum.tests import base
+from solum.tests import utils
+from solum.worker import pool
+
+
+class FakeHandler(object):
+    def __init__(self):
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+        self.release = event.Event()
+
+    def echo(self, ctxt, message):
+        pass
+
+    def build(self, ctxt, build_id, git_info):
+        self.started.append(build_id)
+        self.release.wait()
+        self.finished.append(build_id)
+
+    def unittest(self, ctxt, build_id, git_info):
+        raise Exception('broken')
+
+    def cancel(self, ctxt, build_id):
+        self.cancelled.append(build_id)
+
+    def work_dir(self, ctxt, method, build_id, git_info):
+        if method == 'build':
+            return git_info['source_url']
+
+
+def git_info(url):
+    return {'source_url': url}
+
+
+class BuildPoolTest(base.BaseTestCase):
+    def setUp(self):
+        super(BuildPoolTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.handler = FakeHandler()
+
+    def test_builds_run_concurrently(self):
+        bpool = pool.BuildPool(self.handler, 2)
+        bpool.build(self.ctx, build_id=1, git_info=git_info('git://a'))
+        bpool.build(self.ctx, build_id=2, git_info=git_info('git://b'))
+        eventlet.sleep(0)
+        self.assertEqual([1, 2], self.handler.started)
+        self.assertEqual(0, bpool.free)
+
+        self.handler.release.send()
+        bpool.waitall()
+        self.assertEqual([1, 2], sorted(self.handler.finished))
+        self.assertEqual(2, bpool.free)
+
+    def test_same_repo_is_serialized(self):
+        bpool = pool.BuildPool(self.handler, 2)
+        bpool.build(self.ctx, build_id=1, git_info=git_info('git://a'))
+        bpool.build(self.ctx, build_id=2, git_info=git_info('git://a'))
+        eventlet.sleep(0)
+        self.assertEqual([1], self.handler.started)
+
+        self.handler.release.send()
+        bpool.waitall()
+        self.assertEqual([1, 2], self.handler.finished)
+        self.assertEqual({}, bpool._queued)
+
+    def test_queued_job_does_not_take_a_slot(self):
+        bpool = pool.BuildPool(self.handler, 2)
+        for build_id in (1, 2, 3):
+            bpool.build(self.ctx, build_id=build_id,
+                        git_info=git_info('git://a'))
+        eventlet.sleep(0)
+        self.assertEqual(1, bpool.free)
+
+        # Another repository still gets the free slot right away.
+        bpool.build(self.ctx, build_id=4, git_info=git_info('git://b'))
+        eventlet.sleep(0)
+        self.assertEqual([1, 4], self.handler.started)
+
+        self.handler.release.send()
+        bpool.waitall()
+        self.assertEqual([1, 2, 3, 4], sorted(self.handler.finished))
+        self.assertEqual([1, 2, 3],
+                         [b for b in self.handler.finished if b != 4])
+        self.assertEqual(2, bpool.free)
+
+    def test_full_pool_blocks_dispatch(self):
+        bpool = pool.BuildPool(self.handler, 1)
+        bpool.build(self.ctx, build_id=1, git_info=git_info('git://a'))
+        dispatcher = eventlet.spawn(bpool.build, self.ctx, build_id=2,
+                                    git_info=git_info('git://b'))
+        eventlet.sleep(0)
+        self.assertEqual([1], self.handler.started)
+        self.assertFalse(dispatcher.dead)
+
+        self.handler.release.send()
+        dispatcher.wait()
+        bpool.waitall()
+        self.assertEqual([1, 2], self.handler.finished)
+
+    @mock.patch('solum.worker.pool.LOG')
+    def test_failed_job_frees_slot(self, mock_log):
+        bpool = pool.BuildPool(self.handler, 1)
+        bpool.unittest(self.ctx, build_id=1, git_info=git_info('git://a'))
+        bpool.waitall()
+        self.assertEqual(1, bpool.free)
+        self.assertEqual(1, mock_log.exception.call_count)
+
+    def test_cancel_while_pool_is_full(self):
+        bpool = pool.BuildPool(self.handler, 1)
+        canceller = pool.Canceller(self.handler)
+        bpool.build(self.ctx, build_id=1, git_info=git_info('git://a'))
+        dispatcher = eventlet.spawn(bpool.build, self.ctx, build_id=2,
+                                    git_info=git_info('git://b'))
+        eventlet.sleep(0)
+        self.assertFalse(dispatcher.dead)
+
+        canceller.cancel(self.ctx, build_id=2)
+        canceller.cancel(self.ctx, build_id=1)
+        self.assertEqual([2, 1], self.handler.cancelled)
+        self.assertEqual([1], self.handler.started)
+
+        self.handler.release.send()
+        dispatcher.wait()
+        bpool.waitall()
@@ -0,0 +1,89 @@
+# Copyright 2014 - Rackspace Hosting
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+
+import httplib2
+import mock
+
+from solum.tests import base
+from solum.worker import status
+
+URL_A = 'https://api.github.com/repos/u/r/statuses/A'
+URL_B = 'https://api.github.com/repos/u/r/statuses/B'
+
+
+def posted(url, state):
+    return mock.call(url, 'POST',
+                     headers={'Authorization': 'token tok',
+                              'Content-Type': 'application/json'},
+                     body=json.dumps({'state': state}))
+
+
+@mock.patch('httplib2.Http.request', return_value=({'status': '201'}, ''))
+class StatusPublisherTest(base.BaseTestCase):
+
+    def test_latest_status_of_a_commit_wins(self, mock_req):
+        pub = status.StatusPublisher(10)
+        pub.publish(URL_A, 'tok', {'state': 'pending'})
+        pub.publish(URL_B, 'tok', {'state': 'pending'})
+        pub.publish(URL_A, 'tok', {'state': 'success'})
+        pub.wait()
+        self.assertEqual([posted(URL_A, 'success'), posted(URL_B, 'pending')],
+                         mock_req.call_args_list)
+
+    @mock.patch('solum.worker.status.LOG')
+    def test_full_queue_drops_oldest(self, mock_log, mock_req):
+        pub = status.StatusPublisher(1)
+        pub.publish(URL_A, 'tok', {'state': 'pending'})
+        pub.publish(URL_B, 'tok', {'state': 'pending'})
+        pub.wait()
+        self.assertEqual([posted(URL_B, 'pending')], mock_req.call_args_list)
+        self.assertEqual(1, mock_log.warn.call_count)
+
+    @mock.patch('eventlet.sleep')
+    def test_retry_with_backoff(self, mock_sleep, mock_req):
+        mock_req.side_effect = [httplib2.HttpLib2Error(),
+                                ({'status': '502'}, ''),
+                                ({'status': '201'}, '')]
+        pub = status.StatusPublisher(10, retries=3, retry_interval=2)
+        pub.publish(URL_A, 'tok', {'state': 'success'})
+        pub.wait()
+        self.assertEqual(3, mock_req.call_count)
+        self.assertEqual([mock.call(2), mock.call(4)],
+                         mock_sleep.call_args_list)
+
+    @mock.patch('eventlet.sleep')
+    def test_client_error_is_not_retried(self, mock_sleep, mock_req):
+        mock_req.return_value = ({'status': '401'}, '')
+        pub = status.StatusPublisher(10, retries=3)
+        pub.publish(URL_A, 'tok', {'state': 'success'})
+        pub.wait()
+        self.assertEqual(1, mock_req.call_count)
+        self.assertFalse(mock_sleep.called)
+
+    def test_newer_status_replaces_retry(self, mock_req):
+        pub = status.StatusPublisher(10, retries=3, retry_interval=0)
+
+        def fail_first(*args, **kwargs):
+            if mock_req.call_count == 1:
+                pub.publish(URL_A, 'tok', {'state': 'success'})
+                return {'status': '503'}, ''
+            return {'status': '201'}, ''
+
+        mock_req.side_effect = fail_first
+        pub.publish(URL_A, 'tok', {'state': 'pending'})
+        pub.wait()
+        self.assertEqual([posted(URL_A, 'pending'), posted(URL_A, 'success')],
+                         mock_req.call_args_list)
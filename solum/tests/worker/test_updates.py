@@ -0,0 +1,70 @@
+# Copyright 2014 - Rackspace Hosting
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import eventlet
+import mock
+from oslo.config import cfg
+
+from solum.tests import base
+from solum.tests import utils
+from solum.worker import updates
+
+
+def update(build_id, state):
+    return {'build_id': build_id, 'state': state, 'description': None,
+            'created_image_id': None, 'assembly_id': None, 'timings': None}
+
+
+@mock.patch('solum.conductor.api.API')
+class JobUpdateBufferTest(base.BaseTestCase):
+    def setUp(self):
+        super(JobUpdateBufferTest, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.buf = updates.JobUpdateBuffer()
+        self.addCleanup(self.buf.flush)
+
+    def test_flush_on_size(self, mock_api):
+        cfg.CONF.set_override('job_update_batch_size', 2, group='worker')
+        self.buf.add(self.ctx, update(1, 'BUILDING'))
+        self.assertFalse(mock_api.called)
+        self.buf.add(self.ctx, update(2, 'BUILDING'))
+        mock_api.assert_called_once_with(context=self.ctx)
+        mock_api.return_value.build_job_updates.assert_called_once_with(
+            [update(1, 'BUILDING'), update(2, 'BUILDING')])
+
+    def test_flush_on_time(self, mock_api):
+        cfg.CONF.set_override('job_update_flush_interval', 0,
+                              group='worker')
+        self.buf.add(self.ctx, update(1, 'BUILDING'))
+        self.buf.add(self.ctx, update(1, 'COMPLETE'))
+        eventlet.sleep(0)
+        mock_api.return_value.build_job_updates.assert_called_once_with(
+            [update(1, 'BUILDING'), update(1, 'COMPLETE')])
+
+    def test_batches_per_context(self, mock_api):
+        other = utils.dummy_context(tenant_id='other_tenant')
+        self.buf.add(self.ctx, update(1, 'BUILDING'))
+        self.buf.add(other, update(2, 'BUILDING'))
+        self.buf.flush()
+        self.assertEqual([mock.call(context=self.ctx),
+                          mock.call(context=other)],
+                         mock_api.call_args_list)
+        self.assertEqual(2, mock_api.return_value.build_job_updates.call_count)
+
+    def test_unbatched(self, mock_api):
+        cfg.CONF.set_override('job_update_batch_size', 1, group='worker')
+        self.buf.add(self.ctx, update(1, 'BUILDING'))
+        mock_api.return_value.build_job_update.assert_called_once_with(
+            1, 'BUILDING', None, None, None, None)
+        self.assertFalse(mock_api.return_value.build_job_updates.called)
@@ -23,14 +23,24 @@ class API(service.API):
     def __init__(self, transport=None, context=None):
         cfg.CONF.import_opt('topic', 'solum.worker.config',
                             group='worker')
+        cfg.CONF.import_opt('cancel_topic', 'solum.worker.config',
+                            group='worker')
         super(API, self).__init__(transport, context,
                                   topic=cfg.CONF.worker.topic)
+        self._cancels = service.API(transport, context,
+                                    topic=cfg.CONF.worker.cancel_topic)
 
     def perform_action(self, verb, build_id, git_info, name, base_image_id,
                        source_format, image_format, assembly_id=None,
-                       test_cmd=None, source_creds_ref=None):
+                       test_cmd=None, source_creds_ref=None,
+                       assembly_uuid=None):
         self._cast(verb, build_id=build_id, git_info=git_info,
                    name=name, base_image_id=base_image_id,
                    source_format=source_format, image_format=image_format,
                    assembly_id=assembly_id, test_cmd=test_cmd,
-                   source_creds_ref=source_creds_ref)
+                   source_creds_ref=source_creds_ref,
+                   assembly_uuid=assembly_uuid)
+
+    def cancel(self, build_id):
+        # Any worker may be running the build, so ask all of them.
+        self._cancels._fanout_cast('cancel', build_id=build_id)
@@ -21,9 +21,25 @@ SERVICE_OPTS = [
     cfg.StrOpt('topic',
                default='solum-worker',
                help='The queue to add build tasks to'),
+    cfg.StrOpt('cancel_topic',
+               default='solum-worker-cancel',
+               help=('The queue build cancels are fanned out on. It is '
+                     'served apart from the build queue, so that cancels '
+                     'never wait for a free build slot.')),
     cfg.StrOpt('host',
                default='localhost',
                help='The location of the build rpc queue'),
+    cfg.StrOpt('rpc_executor',
+               default='blocking',
+               choices=['blocking', 'eventlet'],
+               help=('How the worker handles RPC messages: "blocking" '
+                     'handles one message at a time, "eventlet" handles '
+                     'each in its own green thread.')),
+    cfg.IntOpt('rpc_pool_size',
+               default=64,
+               help=('With the eventlet executor, the number of messages '
+                     'the worker handles at once. Further messages wait '
+                     'for one of these to finish.')),
     cfg.StrOpt('handler',
                default='shell',
                help='The worker endpoint to employ'),
@@ -44,6 +60,65 @@ SERVICE_OPTS = [
     cfg.StrOpt('log_upload_swift_container',
                default='solum-logs',
                help='The name of the Swift container to upload logs to.'),
+    cfg.IntOpt('max_concurrent_builds',
+               default=1,
+               help=('The number of builds and unit test runs a worker '
+                     'process executes at the same time. The worker stops '
+                     'taking new requests off the queue while all are busy.')),
+    cfg.IntOpt('build_cache_size',
+               default=128,
+               help=('The number of built images a worker remembers by '
+                     'source, commit and build formats. A build of a '
+                     'remembered commit reuses the image instead of running '
+                     'the build script. 0 disables the cache.')),
+    cfg.IntOpt('build_cache_ttl',
+               default=86400,
+               help=('Seconds after which a remembered image is no longer '
+                     'reused. 0 keeps entries until they are evicted.')),
+    cfg.IntOpt('status_queue_size',
+               default=1000,
+               help=('The number of commits whose status may wait to be '
+                     'sent back to the source host. The oldest waiting '
+                     'status is dropped beyond that.')),
+    cfg.IntOpt('status_retries',
+               default=3,
+               help='How many times to retry sending a commit status.'),
+    cfg.IntOpt('status_retry_interval',
+               default=2,
+               help=('Seconds to wait before the first retry of a commit '
+                     'status; the wait doubles on each further retry.')),
+    cfg.StrOpt('git_mirror_dir',
+               default='/opt/solum/git-mirrors',
+               help=('The directory holding bare mirrors of public source '
+                     'repositories, shared by the builds on this host. An '
+                     'empty value disables the mirrors.')),
+    cfg.IntOpt('git_mirror_max_size',
+               default=10240,
+               help=('Megabytes of disk the git mirrors may use before the '
+                     'least recently used ones are removed. 0 disables '
+                     'eviction.')),
+    cfg.IntOpt('unittest_timeout',
+               default=1800,
+               help=('Seconds a unit test run may take before it is killed. '
+                     '0 disables the timeout.')),
+    cfg.IntOpt('build_timeout',
+               default=3600,
+               help=('Seconds an image build may take before it is killed. '
+                     '0 disables the timeout.')),
+    cfg.DictOpt('stage_timeouts',
+                default={},
+                help=('Timeouts overriding unittest_timeout and build_timeout '
+                      'for a language pack format, as '
+                      '<source_format>.<stage>:<seconds> pairs, e.g. '
+                      'dockerfile.build:7200.')),
+    cfg.IntOpt('job_update_batch_size',
+               default=20,
+               help=('The number of build updates sent to the conductor in '
+                     'one message. 1 sends every update on its own.')),
+    cfg.FloatOpt('job_update_flush_interval',
+                 default=1.0,
+                 help=('Seconds a build update may wait for others to '
+                       'share its message to the conductor.')),
 ]
 
 opt_group = cfg.OptGroup(
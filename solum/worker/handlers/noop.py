@@ -25,7 +25,7 @@ class Handler(object):
 
     def build(self, ctxt, build_id, source_uri, name, base_image_id,
               source_format, image_format, assembly_id,
-              test_cmd, source_creds_ref=None):
+              test_cmd, source_creds_ref=None, assembly_uuid=None):
         message = ("Build %s %s %s %s %s %s %s %s %s" %
                    (build_id, source_uri, name, base_image_id, source_format,
                     image_format, assembly_id,
@@ -34,9 +34,12 @@ class Handler(object):
 
     def unittest(self, ctxt, build_id, source_uri, name, base_image_id,
                  source_format, image_format, assembly_id,
-                 test_cmd, source_creds_ref=None):
+                 test_cmd, source_creds_ref=None, assembly_uuid=None):
         message = ("Unittest %s %s %s %s %s %s %s %s %s" %
                    (build_id, source_uri, name, base_image_id, source_format,
                     image_format, assembly_id,
                     test_cmd, (source_creds_ref or '')))
         LOG.debug("%s" % message)
+
+    def cancel(self, ctxt, build_id):
+        LOG.debug("Cancel %s" % build_id)
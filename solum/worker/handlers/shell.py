@@ -15,18 +15,26 @@
 """Solum Worker shell handler."""
 
 import ast
+import collections
+import contextlib
+import hashlib
 import json
 import os
+import re
 import shelve
-import subprocess
+import shutil
+import signal
+import time
 
-import httplib2
+import eventlet
+from eventlet.green import subprocess
+from glanceclient import exc as glance_exc
 from oslo.config import cfg
+import six
 
 import solum
 from solum.common import clients
 from solum.common import exception
-from solum.common import solum_keystoneclient
 from solum.conductor import api as conductor_api
 from solum.deployer import api as deployer_api
 from solum.objects import assembly
@@ -36,6 +44,8 @@ from solum.openstack.common import uuidutils
 import solum.uploaders.common as uploader_common
 import solum.uploaders.local as local_uploader
 import solum.uploaders.swift as swift_uploader
+from solum.worker import status
+from solum.worker import updates
 
 LOG = logging.getLogger(__name__)
 
@@ -47,6 +57,31 @@ cfg.CONF.import_opt('proj_dir', 'solum.worker.config', group='worker')
 cfg.CONF.import_opt('log_url_prefix', 'solum.worker.config', group='worker')
 cfg.CONF.import_opt('log_upload_strategy', 'solum.worker.config',
                     group='worker')
+cfg.CONF.import_opt('build_cache_size', 'solum.worker.config',
+                    group='worker')
+cfg.CONF.import_opt('build_cache_ttl', 'solum.worker.config',
+                    group='worker')
+cfg.CONF.import_opt('status_queue_size', 'solum.worker.config',
+                    group='worker')
+cfg.CONF.import_opt('status_retries', 'solum.worker.config', group='worker')
+cfg.CONF.import_opt('status_retry_interval', 'solum.worker.config',
+                    group='worker')
+cfg.CONF.import_opt('git_mirror_dir', 'solum.worker.config', group='worker')
+cfg.CONF.import_opt('git_mirror_max_size', 'solum.worker.config',
+                    group='worker')
+cfg.CONF.import_opt('unittest_timeout', 'solum.worker.config',
+                    group='worker')
+cfg.CONF.import_opt('build_timeout', 'solum.worker.config', group='worker')
+cfg.CONF.import_opt('stage_timeouts', 'solum.worker.config',
+                    group='worker')
+
+# Where the docker build-app scripts keep their checkouts, see
+# contrib/lp-cedarish/docker/build-app.
+APPS_DIR = '/dev/shm/apps'
+
+# How many cancelled builds a worker remembers. Cancels are sent to every
+# worker, so most of them are for builds that never run here.
+MAX_CANCELLED = 1024
 
 
 def upload_task_log(ctxt, original_path, assembly_id, build_id, stage):
@@ -61,38 +96,190 @@ def upload_task_log(ctxt, original_path, assembly_id, build_id, stage):
 
 
 def job_update_notification(ctxt, build_id, state=None, description=None,
-                            created_image_id=None, assembly_id=None):
+                            created_image_id=None, assembly_id=None,
+                            timings=None):
     """send a status update to the conductor."""
     LOG.debug('build id:%s %s (%s) %s %s' % (build_id, state, description,
                                              created_image_id, assembly_id),
               context=solum.TLS.trace)
-    conductor_api.API(context=ctxt).build_job_update(build_id, state,
-                                                     description,
-                                                     created_image_id,
-                                                     assembly_id)
-
-
-def get_assembly_by_id(ctxt, assembly_id):
-    return solum.objects.registry.Assembly.get_by_id(ctxt, assembly_id)
+    if timings:
+        # One JSON document per finished build, for log based metrics.
+        LOG.info('build_timings %s' % json.dumps(
+            {'build_id': build_id, 'assembly_id': assembly_id,
+             'state': state, 'timings': timings}, sort_keys=True))
+    updates.job_updates.add(ctxt, {'build_id': build_id,
+                                   'state': state,
+                                   'description': description,
+                                   'created_image_id': created_image_id,
+                                   'assembly_id': assembly_id,
+                                   'timings': timings})
+
+
+def parse_log_line(line):
+    """Return the message carried by a line of build script output.
+
+    Lines emitted through TLOG (see contrib/common/utils) are JSON
+    documents with the interesting text under "message"; any other line
+    is returned as-is.
+    """
+    line = line.strip()
+    if line.startswith('{'):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return line
+        if isinstance(record, dict) and 'message' in record:
+            return six.text_type(record['message']).strip()
+    return line
+
+
+# PRUN (see contrib/common/utils) reports how long each command took.
+PRUN_ELAPSED = re.compile(
+    r'^(?:Finished|FAILED): (.*) \[Elapsed: (\d+) sec\]')
+
+# The build stage the time of a build script command counts towards.
+STAGE_COMMANDS = (
+    ('clone', re.compile(r'\bgit\b.* (clone|fetch|pull|checkout)\b')),
+    ('slug_build', re.compile(r'\bdocker logs\b')),
+    ('docker_build', re.compile(r'\bdocker build\b')),
+    ('glance_upload',
+     re.compile(r'\bglance image-create\b|\bdocker push\b')),
+)
+
+
+def parse_stage_timing(message):
+    """Return the stage and seconds a PRUN summary line reports, if any."""
+    match = PRUN_ELAPSED.match(message)
+    if match is None:
+        return None
+    command, seconds = match.groups()
+    for stage, pattern in STAGE_COMMANDS:
+        if pattern.search(command):
+            return stage, int(seconds)
+    return None
+
+
+def stage_timeout(stage, source_format):
+    """Return the seconds a stage may run for, 0 meaning no limit."""
+    override = cfg.CONF.worker.stage_timeouts.get(
+        '%s.%s' % (source_format, stage))
+    if override is not None:
+        return int(override)
+    return getattr(cfg.CONF.worker, '%s_timeout' % stage)
+
+
+def kill_process_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError as ex:
+        LOG.debug("Could not kill process group %s: %s" % (proc.pid, ex))
 
 
 def update_assembly_status(ctxt, assembly_id, status):
-    # TODO(datsun180b): use conductor to update assembly status
     if assembly_id is None:
         return
-    assem = get_assembly_by_id(ctxt, assembly_id)
-    assem.status = status
-    assem.save(ctxt)
+    conductor_api.API(context=ctxt).update_assembly_status(assembly_id,
+                                                           status)
+
+
+class BuildCache(object):
+    """Map the inputs of a build to the image it produced.
+
+    Least recently used entries are evicted once more than `size` are
+    held, and entries older than `ttl` seconds (if set) are ignored.
+    """
+
+    def __init__(self, size, ttl=0):
+        self.size = size
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+
+    @staticmethod
+    def key(ctxt, source_uri, commit_sha, base_image_id, source_format,
+            image_format):
+        return (ctxt.tenant, source_uri, commit_sha, base_image_id,
+                source_format, image_format)
+
+    def get(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        image_id, stored_at = entry
+        if self.ttl and time.time() - stored_at > self.ttl:
+            return None
+        self._entries[key] = entry
+        return image_id
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def put(self, key, image_id):
+        if self.size <= 0:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = (image_id, time.time())
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
 
 
 class Handler(object):
+    def __init__(self):
+        super(Handler, self).__init__()
+        self._build_cache = BuildCache(cfg.CONF.worker.build_cache_size,
+                                       cfg.CONF.worker.build_cache_ttl)
+        self._status_publisher = status.StatusPublisher(
+            cfg.CONF.worker.status_queue_size,
+            cfg.CONF.worker.status_retries,
+            cfg.CONF.worker.status_retry_interval)
+        self._running = {}
+        self._cancelled = collections.OrderedDict()
+
     def echo(self, ctxt, message):
         LOG.debug("%s" % message)
 
+    def cancel(self, ctxt, build_id):
+        """Cancel the build or unit test run of build_id.
+
+        A script running for it is killed. The cancel is remembered
+        either way, so that a job of build_id that is queued, or between
+        two stages, stops before its next stage.
+        """
+        LOG.debug("Cancelling build %s" % build_id)
+        self._cancelled[build_id] = True
+        while len(self._cancelled) > MAX_CANCELLED:
+            self._cancelled.popitem(last=False)
+        runner = self._running.get(build_id)
+        if runner is not None:
+            kill_process_group(runner)
+
+    @contextlib.contextmanager
+    def _job(self, build_id):
+        """Run a job of build_id, forgetting about its cancel once done."""
+        try:
+            yield
+        finally:
+            self._cancelled.pop(build_id, None)
+
+    def _stop_if_cancelled(self, ctxt, build_id, stage, assembly_id,
+                           timings=None):
+        """Report build_id as failed if it was cancelled.
+
+        Returns whether it was, in which case the job must not go on.
+        """
+        if build_id not in self._cancelled:
+            return False
+        LOG.debug("Build %s was cancelled before %s" % (build_id, stage))
+        job_update_notification(ctxt, build_id, IMAGE_STATES.ERROR,
+                                description='%s cancelled' % stage,
+                                assembly_id=assembly_id, timings=timings)
+        return True
+
     @exception.wrap_keystone_exception
     def _get_environment(self, ctxt):
-        kc = solum_keystoneclient.KeystoneClientV3(ctxt)
-        image_url = kc.client.service_catalog.url_for(
+        image_url = clients.OpenStackClients(ctxt).url_for(
             service_type='image',
             endpoint_type='publicURL')
 
@@ -109,6 +296,9 @@ class Handler(object):
 
         user_env['BUILD_ID'] = uuidutils.generate_uuid()
         user_env['SOLUM_TASK_DIR'] = cfg.CONF.worker.task_log_dir
+        user_env['SOLUM_GIT_MIRROR_DIR'] = cfg.CONF.worker.git_mirror_dir
+        user_env['SOLUM_GIT_MIRROR_MAX_MB'] = str(
+            cfg.CONF.worker.git_mirror_max_size)
         return user_env
 
     @property
@@ -144,15 +334,13 @@ class Handler(object):
         elif stage == 'build':
             build_app = os.path.join(build_app_path, 'build-app')
             return [build_app, source_uri, name, ctxt.tenant,
-                    base_image_id, source_private_key]
+                    base_image_id, source_private_key, commit_sha]
 
     def _send_status(self, test_result, status_url, status_token,
                      pending=False):
         if status_url and status_token:
             commit_id = status_url.rstrip('/').split('/')[-1]
             log_url = cfg.CONF.worker.log_url_prefix + commit_id
-            headers = {'Authorization': 'token ' + status_token,
-                       'Content-Type': 'application/json'}
             if pending:
                 data = {'state': 'pending',
                         'description': 'Solum says: Testing in progress',
@@ -165,29 +353,124 @@ class Handler(object):
                 data = {'state': 'failure',
                         'description': 'Solum says: Tests failed',
                         'target_url': log_url}
-
-            try:
-                http = httplib2.Http()
-                resp, _ = http.request(status_url, 'POST', headers=headers,
-                                       body=json.dumps(data))
-                if resp['status'] != '201':
-                    LOG.debug("Failed to send back status. Error code %s,"
-                              "status_url %s, status_token %s" %
-                              (resp['status'], status_url, status_token))
-            except httplib2.HttpLib2Error as ex:
-                LOG.debug("Error in sending status %s" % ex)
+            self._status_publisher.publish(status_url, status_token, data)
         else:
             LOG.debug("No url or token available to send back status")
 
+    def _consume_output(self, stream, progress=None, timings=None):
+        """Process build script output line by line as it is produced.
+
+        Progress markers ("===> ...") are handed to the optional progress
+        callback while the script runs, and the time spent in each stage
+        is added up in the optional timings dict. Returns the last
+        created_image_id announced by the script, or None.
+        """
+        created_image_id = None
+        # NOTE: iterating the pipe directly would read ahead in large
+        # blocks; readline hands lines over as soon as they are written.
+        for line in iter(stream.readline, ''):
+            message = parse_log_line(line)
+            if 'created_image_id' in message:
+                solum.TLS.trace.support_info(build_out_line=message)
+                created_image_id = message.split('=')[-1].strip()
+            elif message.startswith('===>') and progress is not None:
+                progress(message[4:].strip())
+            elif timings is not None:
+                timing = parse_stage_timing(message)
+                if timing is not None:
+                    stage, seconds = timing
+                    timings[stage] = timings.get(stage, 0) + seconds
+        return created_image_id
+
+    def _execute(self, build_id, stage, source_format, command, user_env,
+                 progress=None, timings=None):
+        """Run a build script, enforcing the stage timeout.
+
+        Returns the exit code, the created_image_id announced by the
+        script and, when the script was killed, the reason why.
+        """
+        if build_id in self._cancelled:
+            return -1, None, '%s cancelled' % stage
+        timeout = stage_timeout(stage, source_format)
+        started = time.time()
+        # The script runs in its own process group so that killing it
+        # also stops the git and docker processes it started.
+        # Text mode, so that lines are read as str on every Python.
+        runner = subprocess.Popen(command, env=user_env,
+                                  stdout=subprocess.PIPE,
+                                  universal_newlines=True,
+                                  preexec_fn=os.setsid)
+        self._running[build_id] = runner
+        created_image_id = None
+        killed_by = None
+        timer = eventlet.Timeout(timeout or None)
+        try:
+            created_image_id = self._consume_output(runner.stdout, progress,
+                                                    timings)
+            returncode = runner.wait()
+        except eventlet.Timeout as t:
+            if t is not timer:
+                raise
+            kill_process_group(runner)
+            returncode = runner.wait()
+            killed_by = '%s timed out after %s seconds' % (stage, timeout)
+        finally:
+            timer.cancel()
+            del self._running[build_id]
+            if timings is not None:
+                timings[stage] = round(time.time() - started, 1)
+        if build_id in self._cancelled:
+            killed_by = '%s cancelled' % stage
+        return returncode, created_image_id, killed_by
+
+    def _app_dir(self, ctxt, source_uri):
+        # build-app derives the directory from "echo $GIT | md5sum".
+        checksum = hashlib.md5((source_uri + '\n').encode('utf-8')).hexdigest()
+        return os.path.join(APPS_DIR, ctxt.tenant, checksum)
+
+    def _cleanup_app_dir(self, ctxt, source_uri):
+        shutil.rmtree(self._app_dir(ctxt, source_uri), ignore_errors=True)
+
+    def work_dir(self, ctxt, method, git_info=None, name=None,
+                 source_format=None, image_format=None, **kwargs):
+        """Return the directory the scripts of a job share with others.
+
+        Unit tests run in a directory of their own, so None is returned
+        for them. The docker build-app of lp-cedarish works in a checkout
+        per tenant and repository, the other build-apps in a directory per
+        tenant and app name.
+        """
+        if method != 'build':
+            return None
+        if (image_format == 'docker' and
+                source_format not in ('dib', 'dockerfile', 'chef')):
+            return self._app_dir(ctxt, (git_info or {}).get('source_url'))
+        return os.path.join('/opt/solum/apps', ctxt.tenant, name or '')
+
     def build(self, ctxt, build_id, git_info, name, base_image_id,
               source_format, image_format, assembly_id,
-              test_cmd, source_creds_ref=None):
+              test_cmd, source_creds_ref=None, assembly_uuid=None):
+        with self._job(build_id):
+            self._build(ctxt, build_id, git_info, name, base_image_id,
+                        source_format, image_format, assembly_id, test_cmd,
+                        source_creds_ref, assembly_uuid)
+
+    def _build(self, ctxt, build_id, git_info, name, base_image_id,
+               source_format, image_format, assembly_id,
+               test_cmd, source_creds_ref=None, assembly_uuid=None):
+
+        # Seconds spent in each stage, reported with the final status.
+        timings = {}
 
         # TODO(datsun180b): This is only temporary, until Mistral becomes our
         # workflow engine.
         if self._run_unittest(ctxt, build_id, git_info, name, base_image_id,
                               source_format, image_format, assembly_id,
-                              test_cmd, source_creds_ref) != 0:
+                              test_cmd, source_creds_ref, timings,
+                              assembly_uuid) != 0:
+            return
+        if self._stop_if_cancelled(ctxt, build_id, 'build', assembly_id,
+                                   timings):
             return
 
         update_assembly_status(ctxt, assembly_id, ASSEMBLY_STATES.BUILDING)
@@ -196,10 +479,35 @@ class Handler(object):
         solum.TLS.trace.import_context(ctxt)
 
         source_uri = git_info['source_url']
+
+        # Only a pinned commit tells us the source is what we built before.
+        cache_key = None
+        commit_sha = git_info.get('commit_sha')
+        if commit_sha:
+            cache_key = BuildCache.key(ctxt, source_uri, commit_sha,
+                                       base_image_id, source_format,
+                                       image_format)
+            created_image_id = self._build_cache.get(cache_key)
+            if (created_image_id is not None and
+                    not self._image_exists(ctxt, created_image_id)):
+                LOG.debug("Cached image %s is gone, rebuilding" %
+                          created_image_id)
+                self._build_cache.discard(cache_key)
+                created_image_id = None
+            if created_image_id is not None:
+                LOG.debug("Reusing image %s built from %s at %s" %
+                          (created_image_id, source_uri, commit_sha))
+                self._finish_build(ctxt, build_id, assembly_id,
+                                   created_image_id,
+                                   'reused image of an identical build',
+                                   timings)
+                return
+
         build_cmd = self._get_build_command(ctxt, 'build', source_uri,
                                             name, base_image_id,
-                                            source_format, image_format, '',
-                                            test_cmd, source_creds_ref)
+                                            source_format, image_format,
+                                            commit_sha or '', test_cmd,
+                                            source_creds_ref)
         solum.TLS.trace.support_info(build_cmd=' '.join(build_cmd),
                                      assembly_id=assembly_id)
 
@@ -223,49 +531,77 @@ class Handler(object):
         logpath = "%s/%s.log" % (user_env['SOLUM_TASK_DIR'],
                                  user_env['BUILD_ID'])
         LOG.debug("Build logs stored at %s" % logpath)
-        out = None
         try:
-            out = subprocess.Popen(build_cmd,
-                                   env=user_env,
-                                   stdout=subprocess.PIPE).communicate()[0]
+            _, created_image_id, killed_by = self._execute(
+                build_id, 'build', source_format, build_cmd, user_env,
+                progress=lambda desc: job_update_notification(
+                    ctxt, build_id, IMAGE_STATES.BUILDING, description=desc,
+                    assembly_id=assembly_id),
+                timings=timings)
         except OSError as subex:
             LOG.exception(subex)
             job_update_notification(ctxt, build_id, IMAGE_STATES.ERROR,
-                                    description=subex, assembly_id=assembly_id)
+                                    description=subex, assembly_id=assembly_id,
+                                    timings=timings)
             return
 
-        assem = get_assembly_by_id(ctxt, assembly_id)
-        assembly_uuid = assem.uuid
         upload_task_log(ctxt, logpath, assembly_uuid, user_env['BUILD_ID'],
                         'build')
 
-        # we expect one line in the output that looks like:
-        # created_image_id=<the glance_id>
-        created_image_id = None
-        for line in out.split('\n'):
-            if 'created_image_id' in line:
-                solum.TLS.trace.support_info(build_out_line=line)
-                created_image_id = line.split('=')[-1].strip()
+        if killed_by is not None:
+            # A killed git or docker run can leave a broken checkout behind.
+            self._cleanup_app_dir(ctxt, source_uri)
+            job_update_notification(ctxt, build_id, IMAGE_STATES.ERROR,
+                                    description=killed_by,
+                                    assembly_id=assembly_id, timings=timings)
+            return
+
         if not uuidutils.is_uuid_like(created_image_id):
             job_update_notification(ctxt, build_id, IMAGE_STATES.ERROR,
                                     description='image not created',
-                                    assembly_id=assembly_id)
+                                    assembly_id=assembly_id, timings=timings)
+            return
+        if cache_key is not None:
+            self._build_cache.put(cache_key, created_image_id)
+        self._finish_build(ctxt, build_id, assembly_id, created_image_id,
+                           'built successfully', timings)
+
+    def _image_exists(self, ctxt, image_id):
+        """Return whether image_id is still an active image in Glance."""
+        try:
+            image = clients.OpenStackClients(ctxt).glance().images.get(
+                image_id)
+        except glance_exc.HTTPNotFound:
+            return False
+        except Exception as ex:
+            LOG.debug("Could not look up image %s: %s" % (image_id, ex))
+            return False
+        return image.status == 'active'
+
+    def _finish_build(self, ctxt, build_id, assembly_id, created_image_id,
+                      description, timings=None):
+        if self._stop_if_cancelled(ctxt, build_id, 'deploy', assembly_id,
+                                   timings):
             return
         job_update_notification(ctxt, build_id, IMAGE_STATES.COMPLETE,
-                                description='built successfully',
+                                description=description,
                                 created_image_id=created_image_id,
-                                assembly_id=assembly_id)
-        if created_image_id is not None:
-            deployer_api.API(context=ctxt).deploy(assembly_id=assembly_id,
-                                                  image_id=created_image_id)
+                                assembly_id=assembly_id, timings=timings)
+        deployer_api.API(context=ctxt).deploy(assembly_id=assembly_id,
+                                              image_id=created_image_id)
 
     def _run_unittest(self, ctxt, build_id, git_info, name, base_image_id,
                       source_format, image_format, assembly_id,
-                      test_cmd, source_creds_ref=None):
+                      test_cmd, source_creds_ref=None, timings=None,
+                      assembly_uuid=None):
         if test_cmd is None:
             LOG.debug("Unit test command is None; skipping unittests.")
             return 0
 
+        if self._stop_if_cancelled(ctxt, build_id, 'unittest', assembly_id,
+                                   timings):
+            return -1
+
         commit_sha = git_info.get('commit_sha', '')
 
         LOG.debug("Running unittests.")
@@ -292,20 +628,24 @@ class Handler(object):
         LOG.debug("Unittest logs stored at %s" % logpath)
 
         returncode = -1
+        killed_by = None
         try:
-            runtest = subprocess.Popen(command, env=user_env,
-                                       stdout=subprocess.PIPE)
-            returncode = runtest.wait()
+            returncode, _, killed_by = self._execute(
+                build_id, 'unittest', source_format, command, user_env,
+                timings=timings)
         except OSError as subex:
             LOG.exception("Exception running unit tests:")
             LOG.exception(subex)
 
-        assem = get_assembly_by_id(ctxt, assembly_id)
-        assembly_uuid = assem.uuid
-
         upload_task_log(ctxt, logpath, assembly_uuid, user_env['BUILD_ID'],
                         'unittest')
 
+        if killed_by is not None:
+            job_update_notification(ctxt, build_id, IMAGE_STATES.ERROR,
+                                    description=killed_by,
+                                    assembly_id=assembly_id, timings=timings)
+            returncode = returncode or -1
+
         if returncode != 0:
             LOG.error("Unit tests failed. Return code is %r" % (returncode))
             update_assembly_status(ctxt, assembly_id,
@@ -315,10 +655,12 @@ class Handler(object):
 
     def unittest(self, ctxt, build_id, git_info, name, base_image_id,
                  source_format, image_format, assembly_id,
-                 test_cmd, source_creds_ref=None):
-        self._run_unittest(ctxt, build_id, git_info, name, base_image_id,
-                           source_format, image_format, assembly_id,
-                           test_cmd, source_creds_ref)
+                 test_cmd, source_creds_ref=None, assembly_uuid=None):
+        with self._job(build_id):
+            self._run_unittest(ctxt, build_id, git_info, name, base_image_id,
+                               source_format, image_format, assembly_id,
+                               test_cmd, source_creds_ref,
+                               assembly_uuid=assembly_uuid)
 
     def _get_private_key(self, source_creds_ref, source_url):
         source_private_key = ''
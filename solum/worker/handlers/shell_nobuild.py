@@ -32,9 +32,9 @@ update_assembly_status = shell_handler.update_assembly_status
 
 
 class Handler(shell_handler.Handler):
-    def build(self, ctxt, build_id, git_info, name, base_image_id,
-              source_format, image_format, assembly_id,
-              test_cmd, source_creds_ref=None):
+    def _build(self, ctxt, build_id, git_info, name, base_image_id,
+               source_format, image_format, assembly_id,
+               test_cmd, source_creds_ref=None, assembly_uuid=None):
 
         # TODO(datsun180b): This is only temporary, until Mistral becomes our
         # workflow engine.
@@ -46,7 +46,8 @@ class Handler(shell_handler.Handler):
         ret_code = self._run_unittest(ctxt, build_id, git_info, name,
                                       base_image_id, source_format,
                                       image_format, assembly_id, test_cmd,
-                                      source_creds_ref)
+                                      source_creds_ref,
+                                      assembly_uuid=assembly_uuid)
         self._send_status(ret_code, status_url, status_token)
 
         # Deployer is normally in charge of declaring an assembly READY.
@@ -66,4 +67,7 @@ class Handler(shell_handler.Handler):
 
         user_env['BUILD_ID'] = uuidutils.generate_uuid()
         user_env['SOLUM_TASK_DIR'] = cfg.CONF.worker.task_log_dir
+        user_env['SOLUM_GIT_MIRROR_DIR'] = cfg.CONF.worker.git_mirror_dir
+        user_env['SOLUM_GIT_MIRROR_MAX_MB'] = str(
+            cfg.CONF.worker.git_mirror_max_size)
         return user_env
@@ -0,0 +1,115 @@
+# Copyright 2014 - Rackspace Hosting
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Bounded pool running worker jobs concurrently."""
+
+import collections
+
+from eventlet import greenpool
+
+import solum
+from solum.common import trace_data
+from solum.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class BuildPool(object):
+    """Run the build and unittest calls of a worker handler concurrently.
+
+    At most `size` jobs run at once. Once every slot is taken, dispatching
+    the next message blocks until a job finishes, so the RPC server stops
+    consuming from the queue instead of piling up work in memory.
+
+    Jobs whose build scripts share a working directory (see the work_dir
+    method of the handler) are run one after the other. A job arriving
+    while another one uses its directory does not take a slot: it is
+    queued behind that job, which runs it in its own slot when done.
+    Cancels are not taken from the build queue, see Canceller.
+    """
+
+    def __init__(self, handler, size):
+        self.handler = handler
+        self._pool = greenpool.GreenPool(size)
+        self._queued = {}
+
+    @property
+    def running(self):
+        return self._pool.running()
+
+    @property
+    def free(self):
+        return self._pool.free()
+
+    def echo(self, ctxt, message):
+        self.handler.echo(ctxt, message)
+
+    def build(self, ctxt, **kwargs):
+        self._spawn('build', ctxt, kwargs)
+
+    def unittest(self, ctxt, **kwargs):
+        self._spawn('unittest', ctxt, kwargs)
+
+    def waitall(self):
+        self._pool.waitall()
+
+    def _work_dir(self, ctxt, method, kwargs):
+        work_dir = getattr(self.handler, 'work_dir', None)
+        if work_dir is None:
+            return None
+        return work_dir(ctxt, method, **kwargs)
+
+    def _spawn(self, method, ctxt, kwargs):
+        key = self._work_dir(ctxt, method, kwargs)
+        if key is not None:
+            if key in self._queued:
+                self._queued[key].append((method, ctxt, kwargs))
+                return
+            self._queued[key] = collections.deque()
+        # spawn_n blocks while every slot of the pool is in use.
+        self._pool.spawn_n(self._run, key, method, ctxt, kwargs)
+
+    def _run(self, key, method, ctxt, kwargs):
+        while True:
+            self._run_job(method, ctxt, kwargs)
+            if key is None:
+                return
+            queued = self._queued[key]
+            if not queued:
+                del self._queued[key]
+                return
+            method, ctxt, kwargs = queued.popleft()
+
+    def _run_job(self, method, ctxt, kwargs):
+        # Each job gets its own trace data, see solum.cmd.worker.
+        solum.TLS.trace = trace_data.TraceData()
+        try:
+            getattr(self.handler, method)(ctxt, **kwargs)
+        except Exception:
+            LOG.exception("Worker %s job failed" % method)
+
+
+class Canceller(object):
+    """Hand the cancels of the worker queue for cancels to a handler.
+
+    A full BuildPool blocks the server of the build queue, so cancels
+    are served by a server of their own. The handler remembers cancels
+    of jobs that have not started yet.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def cancel(self, ctxt, build_id):
+        self.handler.cancel(ctxt, build_id)
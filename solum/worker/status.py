@@ -0,0 +1,93 @@
+# Copyright 2014 - Rackspace Hosting
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Background publisher of commit statuses."""
+
+import collections
+import json
+
+import eventlet
+import httplib2
+
+from solum.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+class StatusPublisher(object):
+    """Post commit statuses from a green thread, off the build path.
+
+    Only the latest status of a commit is kept while it waits to be sent,
+    so a pending status overtaken by the final one is never posted. At
+    most `size` commits wait at once; beyond that the oldest is dropped.
+
+    Failed posts are retried `retries` times, waiting `retry_interval`
+    seconds and doubling the wait on each attempt. A single HTTP client
+    is used so connections to the status host are kept open.
+    """
+
+    def __init__(self, size, retries=0, retry_interval=1):
+        self.size = size
+        self.retries = retries
+        self.retry_interval = retry_interval
+        self._pending = collections.OrderedDict()
+        self._http = httplib2.Http()
+        self._thread = None
+
+    def publish(self, status_url, status_token, data):
+        # Assigning an existing key keeps the commit's place in line.
+        self._pending[status_url] = (status_token, data)
+        while len(self._pending) > self.size:
+            dropped, _ = self._pending.popitem(last=False)
+            LOG.warn("Status queue full, dropped status for %s" % dropped)
+        if self._thread is None:
+            self._thread = eventlet.spawn(self._run)
+
+    def wait(self):
+        """Wait until every queued status has been sent."""
+        if self._thread is not None:
+            self._thread.wait()
+
+    def _run(self):
+        try:
+            while self._pending:
+                status_url, (status_token, data) = self._pending.popitem(
+                    last=False)
+                self._post(status_url, status_token, data)
+        finally:
+            self._thread = None
+
+    def _post(self, status_url, status_token, data):
+        headers = {'Authorization': 'token ' + status_token,
+                   'Content-Type': 'application/json'}
+        body = json.dumps(data)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                eventlet.sleep(self.retry_interval * 2 ** (attempt - 1))
+                if status_url in self._pending:
+                    # A newer status of this commit replaces this one.
+                    return
+            try:
+                resp, _ = self._http.request(status_url, 'POST',
+                                             headers=headers, body=body)
+            except (httplib2.HttpLib2Error, EnvironmentError) as ex:
+                LOG.debug("Error in sending status %s" % ex)
+                continue
+            if resp['status'] == '201':
+                return
+            LOG.debug("Failed to send back status. Error code %s,"
+                      "status_url %s" % (resp['status'], status_url))
+            if not resp['status'].startswith('5'):
+                # The request itself is wrong; sending it again won't help.
+                return
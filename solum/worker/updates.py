@@ -0,0 +1,81 @@
+# Copyright 2014 - Rackspace Hosting
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Batching of build updates sent to the conductor."""
+
+import collections
+
+import eventlet
+from oslo.config import cfg
+
+from solum.conductor import api as conductor_api
+from solum.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+cfg.CONF.import_opt('job_update_batch_size', 'solum.worker.config',
+                    group='worker')
+cfg.CONF.import_opt('job_update_flush_interval', 'solum.worker.config',
+                    group='worker')
+
+
+class JobUpdateBuffer(object):
+    """Collect build updates and send them to the conductor together.
+
+    Updates are sent once job_update_batch_size of them are waiting, or
+    job_update_flush_interval seconds after the first of them came in.
+    Updates are grouped by the user and project of their context, as the
+    conductor acts on behalf of the context a message carries.
+    """
+
+    def __init__(self):
+        self._pending = collections.OrderedDict()
+        self._count = 0
+        self._timer = None
+
+    def add(self, ctxt, update):
+        batch_size = cfg.CONF.worker.job_update_batch_size
+        if batch_size <= 1:
+            conductor_api.API(context=ctxt).build_job_update(
+                update['build_id'], update['state'], update['description'],
+                update['created_image_id'], update['assembly_id'],
+                update['timings'])
+            return
+
+        key = (ctxt.user, ctxt.tenant)
+        self._pending.setdefault(key, (ctxt, []))[1].append(update)
+        self._count += 1
+        if self._count >= batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = eventlet.spawn_after(
+                cfg.CONF.worker.job_update_flush_interval, self.flush)
+
+    def flush(self):
+        """Send every waiting update now."""
+        if self._timer is not None:
+            # Cancelling the timer that is calling us is harmless.
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, collections.OrderedDict()
+        self._count = 0
+        for ctxt, updates in pending.values():
+            try:
+                conductor_api.API(context=ctxt).build_job_updates(updates)
+            except Exception:
+                LOG.exception("Could not send %d build updates" %
+                              len(updates))
+
+
+job_updates = JobUpdateBuffer()